@@ -1,5 +1,7 @@
 from django.contrib import admin
 
+from core.admin import CountersModelAdmin
+
 from .models import Card
 
-admin.site.register(Card)
+admin.site.register(Card, CountersModelAdmin)
@@ -1,11 +1,16 @@
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
 from rest_framework import serializers
 
 from cards import services
 from cards.models import Card
+from core.serializers import SparseFieldsetsMixin
 from users.api.v1.serializers import UserShortSerializer
 
+CARD_CHOICE_LABEL_LENGTH = 80
 
-class CardListSerializer(serializers.ModelSerializer):
+
+class CardListSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     author = UserShortSerializer(read_only=True)
     is_saved = serializers.BooleanField(read_only=True)
 
@@ -14,14 +19,17 @@ class CardListSerializer(serializers.ModelSerializer):
         fields = [
             "id",
             "question",
+            "answer_excerpt",
             "is_saved",
+            "saved_count",
+            "deck_count",
             "author",
             "created_at",
             "updated_at",
         ]
 
 
-class CardDetailSerializer(serializers.ModelSerializer):
+class CardDetailSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     author = UserShortSerializer(read_only=True)
     is_saved = serializers.BooleanField(read_only=True)
 
@@ -56,7 +64,12 @@ class CardCreateUpdateSerializer(serializers.ModelSerializer):
         return services.update_card(card=instance, **validated_data)
 
 
-class CardShortSerializer(serializers.ModelSerializer):
+class CardImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    deck_title = serializers.CharField(max_length=255, required=False)
+
+
+class CardShortSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     author = UserShortSerializer(read_only=True)
     is_saved = serializers.BooleanField(read_only=True)
 
@@ -68,3 +81,21 @@ class CardShortSerializer(serializers.ModelSerializer):
             "is_saved",
             "author",
         ]
+
+
+class CardChoiceSerializer(serializers.ModelSerializer):
+    label = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Card
+        fields = ["id", "label"]
+
+    def get_label(self, obj):
+        return Truncator(strip_tags(obj.question)).chars(CARD_CHOICE_LABEL_LENGTH)
+
+
+class CardSimilarSerializer(CardShortSerializer):
+    similarity = serializers.FloatField(read_only=True)
+
+    class Meta(CardShortSerializer.Meta):
+        fields = CardShortSerializer.Meta.fields + ["similarity"]
@@ -1,18 +1,21 @@
 from urllib.parse import quote
 
-from django.http import HttpResponse
-from rest_framework import viewsets
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from rest_framework import serializers, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from cards import services
+from cards import importing, services
 from core.permissions import IsAuthorOrReadOnly
 
 from .serializers import (
+    CardChoiceSerializer,
     CardCreateUpdateSerializer,
     CardDetailSerializer,
+    CardImportSerializer,
     CardListSerializer,
+    CardSimilarSerializer,
 )
 
 
@@ -21,15 +24,40 @@ class CardViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user if self.request.user.is_authenticated else None
-        if self.action in ["list", "retrieve", "toggle_save"]:
+        if self.action == "list":
+            return services.filter_sort_cards(
+                cards=services.get_cards(),
+                query=self.request.query_params.get("query", ""),
+                sort_by=self.request.query_params.get("sort_by", ""),
+            )
+        if self.action in ["retrieve", "toggle_save"]:
             return services.get_cards_with_saved_status(user=user)
+        if self.action == "similar":
+            return services.get_cards().only(
+                *services.CARD_LIST_FIELDS, "question_bands"
+            )
         return services.get_cards()
 
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+
+        if page is not None and self.action == "list":
+            user = self.request.user if self.request.user.is_authenticated else None
+            services.attach_saved_status(cards=page, user=user)
+
+        return page
+
     def get_serializer_class(self):
         if self.action == "list":
             return CardListSerializer
         if self.action in ["create", "update", "partial_update"]:
             return CardCreateUpdateSerializer
+        if self.action == "import_cards":
+            return CardImportSerializer
+        if self.action == "similar":
+            return CardSimilarSerializer
+        if self.action == "choices":
+            return CardChoiceSerializer
         return CardDetailSerializer
 
     def perform_create(self, serializer):
@@ -43,6 +71,26 @@ class CardViewSet(viewsets.ModelViewSet):
         )
         return Response({"is_saved": is_saved, "message": message})
 
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def choices(self, request):
+        cards = services.get_card_choices(
+            user=request.user, query=request.query_params.get("query", "")
+        )
+
+        page = self.paginate_queryset(cards)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=["get"])
+    def similar(self, request, pk):
+        user = request.user if request.user.is_authenticated else None
+
+        cards = services.get_similar_cards(card=self.get_object())
+        services.attach_saved_status(cards=cards, user=user)
+
+        serializer = self.get_serializer(cards, many=True)
+        return Response(serializer.data)
+
     @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
     def export(self, request, pk):
         card = services.get_card_created_or_saved_by_user(card_id=pk, user=request.user)
@@ -54,3 +102,60 @@ class CardViewSet(viewsets.ModelViewSet):
         )
 
         return response
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        permission_classes=[IsAuthenticated],
+    )
+    def export_collection(self, request):
+        try:
+            filename, content_type, chunks = services.prepare_collection_for_export(
+                user=request.user,
+                export_format=request.query_params.get("export_format", "txt"),
+                compression=request.query_params.get("compression") or None,
+            )
+        except ValueError as error:
+            raise serializers.ValidationError({"detail": str(error)})
+
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response["Content-Disposition"] = (
+            "attachment; " f"filename*=UTF-8''{quote(filename)}"
+        )
+
+        return response
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        permission_classes=[IsAuthenticated],
+    )
+    def import_cards(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        task_id = services.queue_cards_import(
+            author=request.user,
+            file=serializer.validated_data["file"],
+            deck_title=serializer.validated_data.get("deck_title"),
+        )
+
+        return Response({"task_id": task_id}, status=status.HTTP_202_ACCEPTED)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"import/(?P<task_id>[0-9a-f]+)",
+        permission_classes=[IsAuthenticated],
+    )
+    def import_status(self, request, task_id):
+        import_status = importing.get_import_status(
+            user=request.user, import_id=task_id
+        )
+
+        if import_status is None:
+            raise Http404
+
+        return Response(import_status)
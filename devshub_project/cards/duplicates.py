@@ -0,0 +1,94 @@
+"""
+Поиск похожих карточек по вопросу.
+
+Вопрос нормализуется (без HTML, регистра, пунктуации и лишних пробелов).
+Отпечаток (fingerprint) — md5 нормализованного вопроса, он совпадает
+у дубликатов. Для похожих вопросов считается MinHash сигнатура по
+символьным шинглам, которая делится на полосы (LSH). Хэши полос хранятся
+в массиве с GIN индексом: кандидаты — карточки, у которых совпадает хотя
+бы одна полоса, поэтому поиск не просматривает всю таблицу. Похожесть
+кандидатов затем считается точно (коэффициент Жаккара по шинглам).
+"""
+
+import hashlib
+import html
+import random
+import re
+
+SHINGLE_SIZE = 3
+
+MINHASH_PERMUTATIONS = 60
+
+MINHASH_BANDS = 10
+
+MINHASH_ROWS = MINHASH_PERMUTATIONS // MINHASH_BANDS
+
+SIMILARITY_THRESHOLD = 0.8
+
+CANDIDATES_LIMIT = 500
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+_random = random.Random(0)
+
+PERMUTATIONS = [
+    (_random.randrange(1, MERSENNE_PRIME), _random.randrange(MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+TAG_RE = re.compile(r"<[^>]+>")
+
+NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def normalize_question(question):
+    """Возвращает вопрос без HTML, пунктуации, регистра и лишних пробелов."""
+    text = html.unescape(TAG_RE.sub(" ", question)).lower()
+    return " ".join(NON_WORD_RE.sub(" ", text).split())
+
+
+def get_shingles(question):
+    """Возвращает множество символьных шинглов нормализованного вопроса."""
+    return _get_shingles(normalize_question(question))
+
+
+def _get_shingles(normalized):
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized}
+
+    return {
+        normalized[i : i + SHINGLE_SIZE]
+        for i in range(len(normalized) - SHINGLE_SIZE + 1)
+    }
+
+
+def _hash(value, signed=False):
+    digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=signed)
+
+
+def get_question_signature(question):
+    """
+    Возвращает пару (fingerprint, bands) для вопроса:
+    md5 нормализованного вопроса и хэши полос MinHash сигнатуры.
+    """
+    normalized = normalize_question(question)
+    hashes = [_hash(shingle) for shingle in _get_shingles(normalized)]
+
+    minhash = [
+        min((a * value + b) % MERSENNE_PRIME for value in hashes)
+        for a, b in PERMUTATIONS
+    ]
+    bands = [
+        _hash(
+            f"{band}:{minhash[band * MINHASH_ROWS : (band + 1) * MINHASH_ROWS]}", True
+        )
+        for band in range(MINHASH_BANDS)
+    ]
+
+    return hashlib.md5(normalized.encode()).hexdigest(), bands
+
+
+def get_similarity(first_shingles, second_shingles):
+    """Возвращает коэффициент Жаккара двух множеств шинглов."""
+    return len(first_shingles & second_shingles) / len(first_shingles | second_shingles)
@@ -0,0 +1,172 @@
+"""
+Потоковый экспорт карточек.
+
+Карточки читаются из базы данных серверным курсором (iterator),
+форматируются в txt (формат импорта, см. importing), CSV или JSON Lines
+и при необходимости сжимаются gzip или zip на лету. Генераторы
+возвращают байты блоками около EXPORT_BUFFER_SIZE, поэтому память
+не зависит от количества карточек.
+"""
+
+import csv
+import json
+import zipfile
+import zlib
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+EXPORT_FIELDS = ["id", "question", "answer", "author_id", "created_at"]
+
+FORMATS = {
+    "txt": "text/plain; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+}
+
+COMPRESSIONS = {
+    "gzip": ("gz", "application/gzip"),
+    "zip": ("zip", "application/zip"),
+}
+
+
+def format_txt(card):
+    """Возвращает карточку в формате экспорта txt."""
+    return (
+        f"#author_id: {card.author_id}\n"
+        f"#card_id: {card.id}\n"
+        f"{card.question}\t{card.answer}\n"
+        "\n"
+    )
+
+
+def format_jsonl(card):
+    """Возвращает карточку строкой JSON Lines."""
+    data = {field: getattr(card, field) for field in EXPORT_FIELDS}
+    data["created_at"] = card.created_at.isoformat()
+
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
+
+class _Echo:
+    """Файлоподобный объект для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def _generate_csv(cards):
+    writer = csv.writer(_Echo())
+
+    yield writer.writerow(EXPORT_FIELDS)
+
+    for card in cards:
+        yield writer.writerow(
+            [
+                card.id,
+                card.question,
+                card.answer,
+                card.author_id,
+                card.created_at.isoformat(),
+            ]
+        )
+
+
+def _generate_records(cards, export_format):
+    if export_format == "csv":
+        return _generate_csv(cards)
+
+    format_card = format_txt if export_format == "txt" else format_jsonl
+    return (format_card(card) for card in cards)
+
+
+def _buffer(records):
+    """Объединяет строки в блоки байтов около EXPORT_BUFFER_SIZE."""
+    buffer = []
+    size = 0
+
+    for record in records:
+        buffer.append(record)
+        size += len(record)
+
+        if size >= EXPORT_BUFFER_SIZE:
+            yield "".join(buffer).encode()
+            buffer = []
+            size = 0
+
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+
+    for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+
+    yield compressor.flush()
+
+
+class _ZipStream:
+    """Поток без seek для zipfile, из которого забираются записанные байты."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _zip(chunks, filename):
+    stream = _ZipStream()
+
+    with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(filename, "w", force_zip64=True) as file:
+            for chunk in chunks:
+                file.write(chunk)
+                if data := stream.pop():
+                    yield data
+
+    yield stream.pop()
+
+
+def export_cards(cards, filename, export_format="txt", compression=None):
+    """
+    Подготавливает карточки queryset cards к потоковому экспорту.
+    filename — имя файла без расширения.
+    Возвращает кортеж (filename, content_type, chunks).
+    """
+    if export_format not in FORMATS:
+        raise ValueError(f"Неизвестный формат: {export_format}")
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"Неизвестное сжатие: {compression}")
+
+    filename = f"{filename}.{export_format}"
+    content_type = FORMATS[export_format]
+
+    cards = cards.select_related(None).only(*EXPORT_FIELDS).order_by("pk")
+    chunks = _buffer(
+        _generate_records(cards.iterator(chunk_size=EXPORT_CHUNK_SIZE), export_format)
+    )
+
+    if compression == "gzip":
+        chunks = _gzip(chunks)
+    elif compression == "zip":
+        chunks = _zip(chunks, filename)
+
+    if compression is not None:
+        extension, content_type = COMPRESSIONS[compression]
+        filename = f"{filename}.{extension}"
+
+    return filename, content_type, chunks
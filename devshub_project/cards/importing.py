@@ -0,0 +1,340 @@
+"""
+Импорт карточек из текстовых файлов.
+
+Поддерживаются два формата:
+
+- формат экспорта карточек и колод: перед каждой карточкой строки
+  "#author_id: ..." и "#card_id: ...", затем вопрос и ответ через
+  табуляцию (ответ может занимать несколько строк);
+- TSV в стиле Anki: одна карточка в строке (поля с переводами строк
+  в кавычках) и необязательные заголовки "#separator:", "#html:",
+  "#... column:" в начале файла.
+
+Файл читается построчно, карточки очищаются от вредоносного HTML
+и создаются пачками через bulk_create. Файлы из API импортируются
+задачей celery (см. services.queue_cards_import), пул процессов
+для очистки используется только командой import_cards.
+"""
+
+import csv
+import hashlib
+import html
+import io
+import itertools
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.functions import MD5
+
+from core.utils import clean_html, render_html
+from decks import services as deck_services
+
+from . import duplicates
+from .models import Card
+
+IMPORT_CHUNK_SIZE = 1000
+
+IMPORT_WORKERS = min(4, os.cpu_count() or 1)
+
+QUESTION_MAX_LENGTH = Card._meta.get_field("question").max_length
+
+EXPORT_HEADER_RE = re.compile(r"#(author_id|card_id): \d+")
+
+ANKI_SEPARATORS = {
+    "tab": "\t",
+    "comma": ",",
+    "semicolon": ";",
+    "space": " ",
+    "pipe": "|",
+    "colon": ":",
+}
+
+ANKI_META_COLUMNS = ["guid", "notetype", "deck", "tags"]
+
+IMPORT_STATUS_TIMEOUT = 60 * 60 * 24
+
+IMPORT_ERROR_MESSAGE = "Не удалось импортировать файл"
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+def read_lines(file):
+    """
+    Возвращает итератор строк бинарного файла в UTF-8
+    (с BOM или без) с сохранением переводов строк.
+    """
+    return io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+
+
+def parse_cards(lines):
+    """
+    Возвращает генератор пар (вопрос, ответ) из итератора строк файла.
+    Формат определяется по первой непустой строке. Строки должны
+    сохранять переводы строк (файл открыт с newline="").
+    Для записей без ответа возвращается пустой ответ.
+    """
+    lines = iter(lines)
+
+    for line in lines:
+        if line.strip():
+            break
+    else:
+        return iter([])
+
+    lines = itertools.chain([line], lines)
+
+    if EXPORT_HEADER_RE.match(line):
+        return _parse_export(lines)
+
+    return _parse_anki(lines)
+
+
+def _split_record(record):
+    question, _, answer = "\n".join(record).strip("\n").partition("\t")
+    return question, answer
+
+
+def _parse_export(lines):
+    record = []
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+
+        if EXPORT_HEADER_RE.fullmatch(line):
+            if record:
+                yield _split_record(record)
+            record = []
+        elif record or line:
+            record.append(line)
+
+    if record:
+        yield _split_record(record)
+
+
+def _parse_anki(lines):
+    """
+    Разбирает заголовки Anki, затем строки как CSV с разделителем
+    из "#separator:" (по умолчанию табуляция). Столбцы guid, notetype,
+    deck и tags из заголовков "#... column:" пропускаются.
+    """
+    delimiter = "\t"
+    is_html = True
+    meta_columns = set()
+
+    for line in lines:
+        if not line.startswith("#"):
+            break
+
+        name, _, value = line[1:].rstrip("\r\n").partition(":")
+        name, value = name.strip().lower(), value.strip()
+
+        if name == "separator":
+            delimiter = ANKI_SEPARATORS.get(value.lower(), value)
+            if len(delimiter) != 1:
+                raise ImportFormatError(f"Неизвестный разделитель: {value}")
+        elif name == "html":
+            is_html = value.lower() == "true"
+        elif name.removesuffix(" column") in ANKI_META_COLUMNS and value.isdigit():
+            meta_columns.add(int(value) - 1)
+    else:
+        return
+
+    rows = csv.reader(itertools.chain([line], lines), delimiter=delimiter)
+
+    for row in rows:
+        fields = [field for i, field in enumerate(row) if i not in meta_columns]
+
+        if not any(fields):
+            continue
+
+        question, answer = (fields + ["", ""])[:2]
+
+        if not is_html:
+            question, answer = html.escape(question), html.escape(answer)
+
+        yield question, answer
+
+
+def _prepare_card(fields):
+    """
+    Очищает вопрос и ответ, отрисовывает ответ и считает сигнатуру
+    вопроса. Возвращает словарь полей карточки или None,
+    если карточку нельзя создать.
+    """
+    question, answer = fields
+    question, answer = clean_html(question.strip()), clean_html(answer.strip())
+
+    if not question or not answer or len(question) > QUESTION_MAX_LENGTH:
+        return None
+
+    fingerprint, bands = duplicates.get_question_signature(question)
+
+    return {
+        "question": question,
+        "answer": answer,
+        "answer_html": render_html(answer),
+        "question_fingerprint": fingerprint,
+        "question_bands": bands,
+    }
+
+
+def _get_card_key(card):
+    """
+    Возвращает ключ повторяющейся карточки: сигнатуру вопроса и хэш
+    ответа (MD5, как в базе данных), чтобы не хранить ответы в памяти.
+    """
+    answer_hash = hashlib.md5(card["answer"].encode()).hexdigest()
+    return card["question_fingerprint"], answer_hash
+
+
+def _get_existing_card_ids(author, cards):
+    """
+    Возвращает словарь {ключ карточки: id} карточек автора
+    с теми же вопросами и ответами, что и у cards (см. _get_card_key).
+    """
+    keys = {_get_card_key(card) for card in cards}
+
+    existing = (
+        Card.objects.filter(
+            author=author,
+            question_fingerprint__in={fingerprint for fingerprint, _ in keys},
+        )
+        .annotate(answer_hash=MD5("answer"))
+        .values_list("question_fingerprint", "answer_hash", "pk")
+    )
+
+    return {
+        (fingerprint, answer_hash): pk
+        for fingerprint, answer_hash, pk in existing
+        if (fingerprint, answer_hash) in keys
+    }
+
+
+def import_cards(
+    author,
+    lines,
+    deck_title=None,
+    workers=1,
+    chunk_size=IMPORT_CHUNK_SIZE,
+):
+    """
+    Создает карточки автора из строк файла (см. parse_cards)
+    и, если указан deck_title, колоду из них. Карточки с тем же
+    нормализованным вопросом и ответом, что у уже существующей карточки
+    автора или ранее в файле, не создаются повторно, а попадают в колоду
+    как существующие. Импорт выполняется в одной транзакции.
+    Если workers больше 1, карточки очищаются в пуле процессов.
+    Возвращает словарь с количеством созданных, повторяющихся
+    и пропущенных карточек и id колоды.
+    """
+    card_ids = {}
+    created = duplicated = skipped = 0
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    try:
+        with transaction.atomic():
+            cards = parse_cards(lines)
+
+            while chunk := list(itertools.islice(cards, chunk_size)):
+                if executor is not None:
+                    prepared = executor.map(
+                        _prepare_card,
+                        chunk,
+                        chunksize=max(1, len(chunk) // (workers * 4)),
+                    )
+                else:
+                    prepared = map(_prepare_card, chunk)
+
+                prepared = [card for card in prepared if card is not None]
+                skipped += len(chunk) - len(prepared)
+                card_ids |= _get_existing_card_ids(author, prepared)
+
+                new_cards = {}
+                for card in prepared:
+                    key = _get_card_key(card)
+
+                    if key in card_ids or key in new_cards:
+                        duplicated += 1
+                    else:
+                        new_cards[key] = Card(author=author, **card)
+
+                Card.objects.bulk_create(new_cards.values())
+                created += len(new_cards)
+                card_ids |= {key: card.pk for key, card in new_cards.items()}
+
+            deck = None
+            if deck_title and card_ids:
+                deck = deck_services.create_deck(
+                    author=author, title=deck_title, cards=list(card_ids.values())
+                )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    cache.delete(f"cards_stats:user:{author.pk}")
+    cache.delete(f"decks_stats:user:{author.pk}")
+
+    return {
+        "created": created,
+        "duplicated": duplicated,
+        "skipped": skipped,
+        "deck_id": deck.pk if deck is not None else None,
+    }
+
+
+def _import_status_cache_key(user_id, import_id):
+    return f"card_import:user:{user_id}:{import_id}"
+
+
+def set_import_status(user_id, import_id, status):
+    cache.set(
+        _import_status_cache_key(user_id, import_id), status, IMPORT_STATUS_TIMEOUT
+    )
+
+
+def get_import_status(user, import_id):
+    """
+    Возвращает состояние импорта пользователя: {"status": "pending"},
+    {"status": "done", ...результат import_cards} или {"status": "failed",
+    "error": ...}. Возвращает None, если импорт не найден.
+    """
+    return cache.get(_import_status_cache_key(user.pk, import_id))
+
+
+def import_stored_file(author_id, import_id, path, deck_title=None):
+    """
+    Импортирует карточки из сохраненного в default_storage файла,
+    сохраняет состояние импорта и удаляет файл. Импорт, завершившийся
+    любой ошибкой, получает состояние "failed": ошибки формата файла
+    возвращаются пользователю, остальные записываются в лог.
+    """
+    try:
+        with default_storage.open(path, "rb") as file:
+            result = import_cards(
+                author=User.objects.get(pk=author_id),
+                lines=read_lines(file),
+                deck_title=deck_title,
+            )
+        status = {"status": "done", **result}
+    except (ImportFormatError, UnicodeDecodeError, csv.Error) as error:
+        status = {"status": "failed", "error": str(error)}
+    except Exception:
+        logger.exception("Card import %s failed", import_id)
+        status = {"status": "failed", "error": IMPORT_ERROR_MESSAGE}
+    finally:
+        default_storage.delete(path)
+
+    set_import_status(author_id, import_id, status)
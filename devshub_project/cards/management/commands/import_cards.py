@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from cards import importing
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Импортирует карточки из файла экспорта карточек и колод "
+        "или TSV в стиле Anki и, если указано название, создает из них колоду."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--author", required=True, help="Имя пользователя.")
+        parser.add_argument("--deck", dest="deck_title", help="Название колоды.")
+        parser.add_argument("--workers", type=int, default=importing.IMPORT_WORKERS)
+        parser.add_argument(
+            "--chunk-size", type=int, default=importing.IMPORT_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options["author"])
+        except User.DoesNotExist:
+            raise CommandError(f"Пользователь {options['author']} не найден.")
+
+        try:
+            with open(options["path"], "rb") as file:
+                result = importing.import_cards(
+                    author=author,
+                    lines=importing.read_lines(file),
+                    deck_title=options["deck_title"],
+                    workers=options["workers"],
+                    chunk_size=options["chunk_size"],
+                )
+        except (OSError, importing.ImportFormatError, UnicodeDecodeError) as error:
+            raise CommandError(error)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано карточек: {result['created']}, "
+                f"пропущено: {result['skipped']}, колода: {result['deck_id']}"
+            )
+        )
@@ -0,0 +1,133 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from cards import duplicates
+from cards.models import Card
+
+QUESTIONS_CHUNK_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Выводит отчет о дубликатах во всей таблице карточек: группы "
+        "карточек с одинаковым нормализованным вопросом и группы похожих "
+        "вопросов, найденные по полосам MinHash и проверенные точной "
+        "похожестью."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threshold", type=float, default=duplicates.SIMILARITY_THRESHOLD
+        )
+        parser.add_argument(
+            "--max-bucket",
+            type=int,
+            default=100,
+            help="Полосы, которые есть у большего числа карточек, пропускаются.",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=20, help="Сколько групп вывести."
+        )
+
+    def handle(self, *args, **options):
+        exact_groups = (
+            Card.objects.values("question_fingerprint")
+            .annotate(count=Count("id"))
+            .filter(count__gt=1)
+        )
+        exact = exact_groups.aggregate(groups=Count("*"), cards=Sum("count"))
+
+        pairs, skipped_buckets = self._get_candidate_pairs(options["max_bucket"])
+        groups = self._group_similar(pairs, options["threshold"])
+        groups.sort(key=len, reverse=True)
+
+        self.stdout.write(
+            f"Одинаковые вопросы: групп {exact['groups']}, "
+            f"карточек {exact['cards'] or 0}"
+        )
+        self.stdout.write(
+            f"Похожие вопросы (похожесть от {options['threshold']}): "
+            f"групп {len(groups)}, карточек {sum(len(group) for group in groups)}, "
+            f"пар кандидатов {len(pairs)}, пропущено полос {skipped_buckets}"
+        )
+
+        questions = dict(
+            Card.objects.filter(
+                pk__in=[pk for group in groups[: options["limit"]] for pk in group]
+            ).values_list("pk", "question")
+        )
+        for group in groups[: options["limit"]]:
+            self.stdout.write("")
+            for pk in sorted(group):
+                self.stdout.write(f"{pk:>10} {questions[pk]}")
+
+    def _get_candidate_pairs(self, max_bucket):
+        """
+        Возвращает множество пар id карточек, у которых совпадает
+        хотя бы одна полоса, и количество пропущенных больших полос.
+        """
+        pairs = set()
+        skipped = 0
+
+        with transaction.atomic(), connection.chunked_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT array_agg(id ORDER BY id)
+                FROM {Card._meta.db_table}, unnest(question_bands) AS band
+                GROUP BY band
+                HAVING count(*) > 1
+                """)
+
+            for (ids,) in cursor:
+                if len(ids) > max_bucket:
+                    skipped += 1
+                    continue
+
+                pairs.update(
+                    (first, second)
+                    for i, first in enumerate(ids)
+                    for second in ids[i + 1 :]
+                )
+
+        return pairs, skipped
+
+    def _group_similar(self, pairs, threshold):
+        """
+        Проверяет пары точной похожестью и объединяет похожие карточки
+        в группы (система непересекающихся множеств).
+        Возвращает список множеств id.
+        """
+        ids = sorted({pk for pair in pairs for pk in pair})
+        shingles = {}
+
+        for start in range(0, len(ids), QUESTIONS_CHUNK_SIZE):
+            cards = Card.objects.filter(
+                pk__in=ids[start : start + QUESTIONS_CHUNK_SIZE]
+            ).values_list("pk", "question")
+            shingles |= {
+                pk: duplicates.get_shingles(question) for pk, question in cards
+            }
+
+        parents = {}
+
+        def find(pk):
+            root = pk
+            while parents.get(root, root) != root:
+                root = parents[root]
+            if root != pk:
+                parents[pk] = root
+            return root
+
+        for first, second in pairs:
+            similarity = duplicates.get_similarity(shingles[first], shingles[second])
+            if similarity >= threshold:
+                first_root, second_root = find(first), find(second)
+                if first_root != second_root:
+                    parents[second_root] = first_root
+
+        groups = {}
+        for pk in list(parents):
+            root = find(pk)
+            groups.setdefault(root, {root}).add(pk)
+
+        return list(groups.values())
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:05
+
+import core.search
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cards", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="card",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.CombinedSearchVector(
+                        django.contrib.postgres.search.CombinedSearchVector(
+                            django.contrib.postgres.search.SearchVector(
+                                "question", config="russian", weight="A"
+                            ),
+                            "||",
+                            django.contrib.postgres.search.SearchVector(
+                                core.search.StripTags("answer"),
+                                config="russian",
+                                weight="B",
+                            ),
+                            django.contrib.postgres.search.SearchConfig("russian"),
+                        ),
+                        "||",
+                        django.contrib.postgres.search.SearchVector(
+                            "question", config="english", weight="A"
+                        ),
+                        django.contrib.postgres.search.SearchConfig("russian"),
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector(
+                        core.search.StripTags("answer"), config="english", weight="B"
+                    ),
+                    django.contrib.postgres.search.SearchConfig("russian"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="card",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="cards_card_search__f06ce9_gin"
+            ),
+        ),
+    ]
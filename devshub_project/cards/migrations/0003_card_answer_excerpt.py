@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:30
+
+import core.search
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0002_card_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='answer_excerpt',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Left(django.db.models.functions.text.Trim(core.search.CollapseWhitespace(core.search.StripTags('answer'))), 200), output_field=models.TextField()),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:34
+
+import html
+import re
+
+from django.db import migrations, models
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import TextLexer, get_lexer_by_name
+from pygments.util import ClassNotFound
+
+# Копия core.utils.render_html на момент миграции без кэша: миграция
+# не должна зависеть от Redis и от последующих изменений отрисовки.
+CODE_BLOCK_RE = re.compile(
+    r'<pre(?: class="language-([\w+#-]+)")?>\s*<code[^>]*>(.*?)</code>\s*</pre>',
+    re.DOTALL,
+)
+
+TAG_RE = re.compile(r"<[^>]+>")
+
+HTML_FORMATTER = HtmlFormatter(cssclass="highlight")
+
+
+def highlight_code_block(match):
+    language, code = match.groups()
+
+    try:
+        lexer = get_lexer_by_name(language) if language else TextLexer()
+    except ClassNotFound:
+        lexer = TextLexer()
+
+    return highlight(html.unescape(TAG_RE.sub("", code)), lexer, HTML_FORMATTER)
+
+
+def render_html(clean_user_html):
+    if "<pre" not in clean_user_html:
+        return clean_user_html
+
+    return CODE_BLOCK_RE.sub(highlight_code_block, clean_user_html)
+
+
+def render_answers(apps, schema_editor):
+    Model = apps.get_model("cards", "Card")
+
+    batch = []
+    for obj in Model.objects.only("id", "answer").iterator(chunk_size=1000):
+        obj.answer_html = render_html(obj.answer)
+        batch.append(obj)
+
+        if len(batch) >= 1000:
+            Model.objects.bulk_update(batch, ["answer_html"])
+            batch = []
+
+    Model.objects.bulk_update(batch, ["answer_html"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0003_card_answer_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='answer_html',
+            field=models.TextField(editable=False, null=True),
+        ),
+        migrations.RunPython(render_answers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:57
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+from cards.duplicates import get_question_signature
+
+
+def sign_questions(apps, schema_editor):
+    Card = apps.get_model("cards", "Card")
+
+    batch = []
+    for card in Card.objects.only("id", "question").iterator(chunk_size=1000):
+        card.question_fingerprint, card.question_bands = get_question_signature(
+            card.question
+        )
+        batch.append(card)
+
+        if len(batch) >= 1000:
+            Card.objects.bulk_update(batch, ["question_fingerprint", "question_bands"])
+            batch = []
+
+    Card.objects.bulk_update(batch, ["question_fingerprint", "question_bands"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0004_card_answer_html'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='question_bands',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='question_fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.RunPython(sign_questions, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['question_fingerprint'], name='cards_card_questio_0bf41b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['question_bands'], name='cards_card_questio_a65e8c_gin'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0005_card_question_signature'),
+        ('decks', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='deck_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='saved_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['-saved_count', '-created_at'], name='cards_card_saved_c_fffc3d_idx'),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE cards_card AS card SET saved_count = counts.value
+            FROM (
+                SELECT card_id, count(*) AS value
+                FROM cards_card_saved_by GROUP BY card_id
+            ) AS counts
+            WHERE card.id = counts.card_id;
+
+            UPDATE cards_card AS card SET deck_count = counts.value
+            FROM (
+                SELECT card_id, count(*) AS value
+                FROM decks_deck_cards GROUP BY card_id
+            ) AS counts
+            WHERE card.id = counts.card_id;
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
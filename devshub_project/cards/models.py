@@ -1,12 +1,19 @@
 from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.urls import reverse
 from tinymce.models import HTMLField
 
+from core.search import StripTags, excerpt_field, search_vector_field
+
+ANSWER_EXCERPT_LENGTH = 200
+
 
 class Card(models.Model):
     question = models.CharField(max_length=255)
     answer = HTMLField()
+    answer_html = models.TextField(null=True, editable=False)
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL, related_name="created_cards", on_delete=models.CASCADE
     )
@@ -15,12 +22,24 @@ class Card(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_vector = search_vector_field([("question", "A"), (StripTags("answer"), "B")])
+    answer_excerpt = excerpt_field("answer", ANSWER_EXCERPT_LENGTH)
+    question_fingerprint = models.CharField(max_length=32, blank=True, editable=False)
+    question_bands = ArrayField(
+        models.BigIntegerField(), default=list, blank=True, editable=False
+    )
+    saved_count = models.PositiveIntegerField(default=0, editable=False)
+    deck_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["question"]),
             models.Index(fields=["-created_at"]),
+            models.Index(fields=["-saved_count", "-created_at"]),
+            GinIndex(fields=["search_vector"]),
+            models.Index(fields=["question_fingerprint"]),
+            GinIndex(fields=["question_bands"]),
         ]
 
     def __str__(self):
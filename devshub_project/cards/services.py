@@ -1,23 +1,45 @@
+import uuid
+
 from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import transaction
 from django.db.models import Count, Exists, OuterRef, Q
 from django.shortcuts import get_object_or_404
 
+from core.search import search
 from core.utils import clean_html
+from decks import counters
+from decks.models import Deck
 
+from . import duplicates, exporting, importing
 from .models import Card
+from .tasks import import_cards_task
+
+CARD_IMPORTS_DIR = "card_imports"
+
+CARD_LIST_FIELDS = [
+    "id",
+    "question",
+    "answer_excerpt",
+    "created_at",
+    "updated_at",
+    "saved_count",
+    "deck_count",
+    "author__username",
+]
 
 
 def get_cards():
     """
     Возвращает queryset всех карточек.
+    Полный ответ не загружается (для списков), см. with_answer.
     """
-    return (
-        Card.objects.all()
-        .select_related("author")
-        .only(
-            "id", "question", "answer", "created_at", "updated_at", "author__username"
-        )
-    )
+    return Card.objects.all().select_related("author").only(*CARD_LIST_FIELDS)
+
+
+def with_answer(cards):
+    """Возвращает queryset карточек с загрузкой полного ответа."""
+    return cards.only(*CARD_LIST_FIELDS, "answer", "answer_html")
 
 
 def get_cards_with_saved_status(user=None):
@@ -25,7 +47,7 @@ def get_cards_with_saved_status(user=None):
     Возвращает queryset карточек с флагом,
     который указывает сохранена ли карточка пользователем.
     """
-    cards = get_cards()
+    cards = with_answer(get_cards())
 
     if user is not None:
         return cards.annotate(
@@ -60,22 +82,47 @@ def get_cards_created_or_saved_by_user(user):
     Возвращает queryset карточек,
     которые созданы или сохранены пользователем.
     """
-    cards = get_cards().filter(Q(author=user) | Q(saved_by=user)).distinct()
+    cards = get_cards().filter(
+        Q(author=user)
+        | Exists(Card.saved_by.through.objects.filter(card=OuterRef("pk"), user=user))
+    )
     return cards
 
 
-def get_user_cards_with_saved_status(user, current_user):
+def get_card_choices(user, query=""):
     """
-    Возвращает карточки созданные или сохраненные пользователем с флагом,
-    который указывает сохранена ли карточка текущим пользователем.
+    Возвращает карточки, созданные или сохраненные пользователем,
+    для выбора в форме колоды: только id и вопрос, с поиском по префиксам
+    слов (полнотекстовый индекс). Без запроса карточки упорядочены
+    от новых к старым.
     """
-    user_cards = get_cards_created_or_saved_by_user(user=user)
+    cards = (
+        get_cards_created_or_saved_by_user(user=user)
+        .select_related(None)
+        .only("id", "question", "created_at")
+    )
+    return filter_sort_cards(cards=cards, query=query, sort_by="")
 
-    if current_user is not None:
-        return user_cards.annotate(
-            is_saved=Exists(current_user.saved_cards.filter(pk=OuterRef("pk")))
-        )
-    return user_cards
+
+def attach_saved_status(cards, user=None):
+    """
+    Отмечает уже выбранные карточки (например, страницу списка) флагом
+    is_saved одним запросом к сохраненным карточкам пользователя
+    вместо подзапроса на каждую строку. Возвращает cards.
+    """
+    if user is None:
+        return cards
+
+    saved_ids = set(
+        Card.saved_by.through.objects.filter(
+            user=user, card_id__in=[card.pk for card in cards]
+        ).values_list("card_id", flat=True)
+    )
+
+    for card in cards:
+        card.is_saved = card.pk in saved_ids
+
+    return cards
 
 
 def get_card_created_or_saved_by_user(card_id, user):
@@ -84,23 +131,60 @@ def get_card_created_or_saved_by_user(card_id, user):
     Иначе вернет 404.
     """
     card = get_object_or_404(
-        get_cards().filter(Q(author=user) | Q(saved_by=user)).distinct(), pk=card_id
+        with_answer(get_cards_created_or_saved_by_user(user=user)), pk=card_id
     )
 
     return card
 
 
+def get_similar_cards(card, limit=10, threshold=duplicates.SIMILARITY_THRESHOLD):
+    """
+    Возвращает список до limit карточек с похожим вопросом
+    (похожесть не меньше threshold) по убыванию похожести.
+    У карточек есть атрибут similarity.
+    Кандидаты выбираются по индексу полос MinHash (см. duplicates).
+    """
+    if not card.question_bands:
+        return []
+
+    candidates = (
+        get_cards()
+        .filter(question_bands__overlap=card.question_bands)
+        .exclude(pk=card.pk)[: duplicates.CANDIDATES_LIMIT]
+    )
+
+    shingles = duplicates.get_shingles(card.question)
+
+    similar = []
+    for candidate in candidates:
+        candidate.similarity = duplicates.get_similarity(
+            shingles, duplicates.get_shingles(candidate.question)
+        )
+        if candidate.similarity >= threshold:
+            similar.append(candidate)
+
+    similar.sort(key=lambda candidate: candidate.similarity, reverse=True)
+
+    return similar[:limit]
+
+
 def filter_sort_cards(cards, query, sort_by):
     """
-    Фильтрует, сортирует, пагинирует карточки. Возвращает page_obj.
+    Фильтрует и сортирует карточки.
+    Поиск выполняется полнотекстово по вопросу и ответу,
+    без явной сортировки результаты упорядочены по релевантности.
     """
     if query:
-        cards = cards.filter(question__icontains=query)
+        cards = search(cards, query)
 
     if sort_by == "newest":
         cards = cards.order_by("-created_at")
     elif sort_by == "oldest":
         cards = cards.order_by("created_at")
+    elif sort_by == "popular":
+        cards = cards.order_by("-saved_count", "-created_at")
+    elif query:
+        cards = cards.order_by("-rank", "-created_at")
 
     return cards
 
@@ -110,9 +194,12 @@ def create_card(question, answer, author, **kwargs):
     Создает и возвращает карточку с указанным автором.
     Очищает question и answer от вредоносного HTML.
     """
+    question = clean_html(question)
+    answer = clean_html(answer)
+
     card = Card.objects.create(
-        question=clean_html(question),
-        answer=clean_html(answer),
+        question=question,
+        answer=answer,
         author=author,
         **kwargs,
     )
@@ -128,23 +215,29 @@ def update_card(card, **kwargs):
     """
     question = kwargs.pop("question", None)
     answer = kwargs.pop("answer", None)
+    update_fields = set(kwargs)
 
     if question:
         card.question = clean_html(question)
+        update_fields |= {"question", "question_fingerprint", "question_bands"}
     if answer:
         card.answer = clean_html(answer)
+        update_fields |= {"answer", "answer_html"}
 
     for key, value in kwargs.items():
         setattr(card, key, value)
-    card.save()
+    counters.save_without_counters(card, update_fields=update_fields)
 
     return card
 
 
 def delete_card(card):
-    """Удаляет карточку."""
+    """Удаляет карточку и уменьшает счетчики карточек ее колод."""
     author = card.author
-    card.delete()
+
+    with transaction.atomic():
+        counters.change_counter(Deck, "card_count", Deck.objects.filter(cards=card), -1)
+        card.delete()
     cache.delete(f"cards_stats:user:{author.pk}")
 
 
@@ -182,6 +275,43 @@ def generate_card_data_for_export(card):
     return filename, content
 
 
+def prepare_collection_for_export(user, export_format="txt", compression=None):
+    """
+    Подготавливает к экспорту все карточки, созданные
+    или сохраненные пользователем.
+    Возвращает кортеж (filename, content_type, chunks).
+    """
+    return exporting.export_cards(
+        cards=get_cards_created_or_saved_by_user(user=user),
+        filename=f"{user.username}_cards",
+        export_format=export_format,
+        compression=compression,
+    )
+
+
+def queue_cards_import(author, file, deck_title=None):
+    """
+    Сохраняет загруженный файл и ставит импорт карточек в очередь celery.
+    Возвращает id задачи, по которому можно узнать результат
+    (см. importing.get_import_status).
+    """
+    import_id = uuid.uuid4().hex
+    path = default_storage.save(f"{CARD_IMPORTS_DIR}/{import_id}.txt", file)
+
+    importing.set_import_status(author.pk, import_id, {"status": "pending"})
+    import_cards_task.apply_async(
+        kwargs={
+            "author_id": author.pk,
+            "import_id": import_id,
+            "path": path,
+            "deck_title": deck_title,
+        },
+        task_id=import_id,
+    )
+
+    return import_id
+
+
 def get_cards_stats(user):
     """
     Возвращает словарь со статистикой карточек для пользователя.
@@ -196,7 +326,7 @@ def get_cards_stats(user):
             created=Count("id", filter=Q(author=user), distinct=True),
             saved=Count("id", filter=Q(saved_by=user), distinct=True),
             in_study=Count(
-                "id", filter=Q(deck_progresses__learner=user), distinct=True
+                "id", filter=Q(decks__enrollments__learner=user), distinct=True
             ),
         )
         cache.set(cache_key, stats, timeout=60 * 5)
@@ -0,0 +1,31 @@
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from core.utils import render_html
+
+from . import duplicates
+from .models import Card
+
+
+@receiver(pre_save, sender=Card)
+def render_answer_html(sender, instance, update_fields, **kwargs):
+    """
+    Отрисовывает HTML ответа для показа при каждом сохранении ответа,
+    в том числе из админки. bulk_create и update сигналы не вызывают,
+    там answer_html заполняется явно (см. importing).
+    """
+    if update_fields is None or "answer" in update_fields:
+        instance.answer_html = render_html(instance.answer)
+
+
+@receiver(pre_save, sender=Card)
+def update_question_signature(sender, instance, update_fields, **kwargs):
+    """
+    Пересчитывает отпечаток и полосы MinHash вопроса (см. duplicates)
+    при каждом сохранении вопроса, в том числе из админки. bulk_create
+    и update сигналы не вызывают, там сигнатура заполняется явно.
+    """
+    if update_fields is None or "question" in update_fields:
+        instance.question_fingerprint, instance.question_bands = (
+            duplicates.get_question_signature(instance.question)
+        )
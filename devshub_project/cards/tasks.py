@@ -0,0 +1,14 @@
+from celery import shared_task
+
+from . import importing
+
+
+@shared_task
+def import_cards_task(author_id, import_id, path, deck_title=None):
+    """
+    Асинхронная задача, которая импортирует карточки
+    из загруженного через API файла.
+    """
+    importing.import_stored_file(
+        author_id=author_id, import_id=import_id, path=path, deck_title=deck_title
+    )
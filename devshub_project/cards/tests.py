@@ -1,8 +1,25 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import tempfile
+import tracemalloc
+import zipfile
+from pathlib import Path
+from unittest import mock
 
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings, tag
+from django.urls import reverse
+
+from decks import services as deck_services
 from users import services as user_services
 
-from . import services
+from . import duplicates, exporting, importing, services, tasks
+from .models import Card
 
 
 class CardTest(TestCase):
@@ -25,6 +42,46 @@ class CardTest(TestCase):
         db_card = services.get_cards().first()
         self.assertEqual(card.id, db_card.id)
 
+    def test_answer_html_is_rendered(self):
+        card = services.create_card(
+            author=self.user,
+            question="question",
+            answer='<pre class="language-python"><code>print(1)</code></pre>',
+        )
+
+        self.assertIn('<div class="highlight">', card.answer_html)
+        self.assertIn("print", card.answer_html)
+
+        card = services.update_card(card, answer="<p>answer</p>")
+        self.assertEqual(card.answer_html, "<p>answer</p>")
+
+        detail_card = services.get_card_with_saved_status(card_id=card.pk)
+        self.assertNotIn("answer_html", detail_card.get_deferred_fields())
+
+        # Изменение в обход сервисов (например, в админке)
+        card = Card.objects.get(pk=card.pk)
+        card.answer = "<pre><code>x = 1</code></pre>"
+        card.save()
+        self.assertIn('<div class="highlight">', card.answer_html)
+
+    def test_list_defers_answer(self):
+        card = services.create_card(
+            author=self.user,
+            question="question",
+            answer="<p>Цикл   <b>for</b></p>\n<pre><code>for i in x:\n    pass</code></pre>"
+            + "<p>текст</p>" * 100,
+        )
+
+        list_card = services.get_cards().get(pk=card.pk)
+        self.assertIn("answer", list_card.get_deferred_fields())
+        self.assertTrue(
+            list_card.answer_excerpt.startswith("Цикл for for i in x: pass")
+        )
+        self.assertEqual(len(list_card.answer_excerpt), 200)
+
+        detail_card = services.get_card_with_saved_status(card_id=card.pk)
+        self.assertNotIn("answer", detail_card.get_deferred_fields())
+
     def test_toggle_save_card(self):
         test_user = user_services.create_user("test_user", "password123")
 
@@ -48,6 +105,27 @@ class CardTest(TestCase):
         self.assertEqual(message, "Карточка удалена из вашего профиля")
         self.assertEqual(self.user.saved_cards.count(), 0)
 
+    def test_attach_saved_status(self):
+        test_user = user_services.create_user("test_user", "password123")
+        saved, unsaved = [
+            services.create_card(author=test_user, question=question, answer="answer")
+            for question in ["saved", "unsaved"]
+        ]
+        services.toggle_card_save_by_user(
+            card=services.get_card_with_saved_status(card_id=saved.pk, user=self.user),
+            user=self.user,
+        )
+
+        cards = list(services.get_cards())
+
+        with self.assertNumQueries(1):
+            services.attach_saved_status(cards=cards, user=self.user)
+
+        self.assertEqual(
+            {card.question: card.is_saved for card in cards},
+            {"saved": True, "unsaved": False},
+        )
+
     def test_toggle_save_own_card(self):
         test_user = user_services.create_user("test_user", "password123")
 
@@ -63,3 +141,357 @@ class CardTest(TestCase):
         self.assertEqual(is_saved, False)
         self.assertEqual(message, "Вы автор этой карточки")
         self.assertEqual(self.user.saved_cards.count(), 0)
+
+    def test_search_cards(self):
+        services.create_card(
+            author=self.user,
+            question="Что такое декоратор?",
+            answer="<p>Функция, которая <b>оборачивает</b> другую функцию</p>",
+        )
+        services.create_card(
+            author=self.user,
+            question="What is a generator?",
+            answer="<p>A function that uses <code>yield</code> and decorators</p>",
+        )
+        services.create_card(
+            author=self.user,
+            question="Unrelated question",
+            answer="<p>Nothing</p>",
+        )
+
+        def search(query, sort_by=""):
+            cards = services.filter_sort_cards(
+                cards=services.get_cards(), query=query, sort_by=sort_by
+            )
+            return [card.question for card in cards]
+
+        self.assertEqual(search("декораторы"), ["Что такое декоратор?"])
+        self.assertEqual(search("оборачива функц"), ["Что такое декоратор?"])
+        self.assertEqual(search("yield"), ["What is a generator?"])
+        self.assertEqual(search("p"), [])
+        self.assertEqual(search("???"), [])
+        self.assertEqual(search("decorator generator"), ["What is a generator?"])
+        self.assertEqual(search("decorator"), ["What is a generator?"])
+
+
+class CardImportTest(TestCase):
+    def setUp(self):
+        self.user = user_services.create_user("user", "password123")
+
+    def import_text(self, text, author=None, **kwargs):
+        return importing.import_cards(
+            author=author or self.user,
+            lines=importing.read_lines(io.BytesIO(text.encode())),
+            **kwargs,
+        )
+
+    def test_import_deck_export(self):
+        answers = [
+            "<p>answer</p>",
+            '<pre class="language-python"><code>x = 1\n\n\ty = 2</code></pre>',
+        ]
+        cards = [
+            services.create_card(author=self.user, question=f"q{i}", answer=answer)
+            for i, answer in enumerate(answers)
+        ]
+        deck = deck_services.create_deck(author=self.user, title="deck", cards=cards)
+
+        _, _, _, content = deck_services.prepare_deck_for_export(deck)
+        other_user = user_services.create_user("other_user", "password123")
+        result = self.import_text(
+            b"".join(content).decode(),
+            author=other_user,
+            deck_title="copy",
+            workers=2,
+        )
+
+        self.assertEqual(result["created"], 2)
+        self.assertEqual(result["skipped"], 0)
+
+        imported = Card.objects.filter(decks=result["deck_id"])
+        self.assertEqual(
+            sorted(imported.values_list("question", "answer")),
+            [("q0", answers[0]), ("q1", answers[1])],
+        )
+        self.assertIn("highlight", imported.get(question="q1").answer_html)
+
+    def test_import_single_card_export(self):
+        card = services.create_card(author=self.user, question="q", answer="a")
+        _, content = services.generate_card_data_for_export(card)
+
+        result = self.import_text(content + content, deck_title="deck")
+
+        self.assertEqual(result["created"], 0)
+        self.assertEqual(result["duplicated"], 2)
+        deck = deck_services.get_decks().get(pk=result["deck_id"])
+        self.assertEqual(list(deck.cards.all()), [card])
+
+        result = self.import_text(content.replace("\ta", "\tb") * 2)
+        self.assertEqual((result["created"], result["duplicated"]), (1, 1))
+
+    def test_import_anki_tsv(self):
+        result = self.import_text(
+            "#separator:tab\n"
+            "#html:false\n"
+            "#tags column:3\n"
+            "a < b?\tyes\ttag\n"
+            '"multi\tline"\t"first\nsecond"\ttag\n'
+            "\n"
+            "no answer\n"
+            "<script>alert(1)</script>\tx\n"
+        )
+
+        self.assertEqual(result["created"], 3)
+        self.assertEqual(result["skipped"], 1)
+        self.assertEqual(
+            list(Card.objects.order_by("pk").values_list("question", "answer")),
+            [
+                ("a &lt; b?", "yes"),
+                ("multi\tline", "first\nsecond"),
+                ("&lt;script&gt;alert(1)&lt;/script&gt;", "x"),
+            ],
+        )
+
+    def test_import_html_is_cleaned(self):
+        result = self.import_text(
+            "q<script>x</script>\t<p onclick='x'>a</p>\n" + "q" * 256 + "\ta\n"
+        )
+
+        self.assertEqual(result["skipped"], 1)
+        card = Card.objects.get()
+        self.assertEqual((card.question, card.answer), ("qx", "<p>a</p>"))
+
+    def test_import_unknown_separator(self):
+        with self.assertRaises(importing.ImportFormatError):
+            self.import_text("#separator:unknown\nq\ta\n")
+
+    def test_api_import_runs_in_task(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.client.force_login(self.user)
+
+        for text, expected in [
+            ("q1\ta1\nq2\ta2\n", {"status": "done", "created": 2}),
+            ("#separator:unknown\nq\ta\n", {"status": "failed"}),
+            ("q\t" + "a" * (csv.field_size_limit() + 1) + "\n", {"status": "failed"}),
+        ]:
+            with (
+                override_settings(MEDIA_ROOT=media_root.name),
+                mock.patch("cards.services.import_cards_task.apply_async") as task,
+            ):
+                response = self.client.post(
+                    reverse("card-import-cards"),
+                    {"file": SimpleUploadedFile("cards.txt", text.encode())},
+                )
+                self.assertEqual(response.status_code, 202)
+
+                status_url = reverse(
+                    "card-import-status", args=[response.json()["task_id"]]
+                )
+                self.assertEqual(
+                    self.client.get(status_url).json(), {"status": "pending"}
+                )
+
+                tasks.import_cards_task(**task.call_args.kwargs["kwargs"])
+
+            status = self.client.get(status_url).json()
+            self.assertEqual(status | expected, status)
+
+        self.assertEqual(list(Path(media_root.name).rglob("*.txt")), [])
+
+    def test_import_stored_file_records_unexpected_errors(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+
+        with (
+            override_settings(MEDIA_ROOT=media_root.name),
+            mock.patch.object(importing, "import_cards", side_effect=DatabaseError),
+            self.assertLogs(importing.logger, "ERROR"),
+        ):
+            path = default_storage.save("card_imports/x.txt", ContentFile(b"q\ta\n"))
+            importing.import_stored_file(
+                author_id=self.user.pk, import_id="x", path=path
+            )
+
+        self.assertEqual(
+            importing.get_import_status(self.user, "x"),
+            {"status": "failed", "error": importing.IMPORT_ERROR_MESSAGE},
+        )
+        self.assertEqual(list(Path(media_root.name).rglob("*.txt")), [])
+
+
+class SimilarCardsTest(TestCase):
+    def setUp(self):
+        self.user = user_services.create_user("user", "password123")
+
+    def test_question_signature(self):
+        fingerprint, bands = duplicates.get_question_signature(
+            "<p>Что такое <b>декоратор</b>?</p>"
+        )
+
+        self.assertEqual(
+            fingerprint,
+            duplicates.get_question_signature("что такое декоратор")[0],
+        )
+        self.assertEqual(len(bands), duplicates.MINHASH_BANDS)
+
+    def test_get_similar_cards(self):
+        card = services.create_card(
+            author=self.user,
+            question="Что такое декоратор в Python и как он работает?",
+            answer="a",
+        )
+        duplicate = services.create_card(
+            author=self.user,
+            question="что такое декоратор в python, и как он работает",
+            answer="b",
+        )
+        similar = services.create_card(
+            author=self.user,
+            question="Что такое декоратор в языке Python и как он работает?",
+            answer="c",
+        )
+        services.create_card(
+            author=self.user,
+            question="Что такое генератор в Python и как он работает?",
+            answer="d",
+        )
+        services.create_card(author=self.user, question="Как работает GIL?", answer="e")
+
+        cards = services.get_similar_cards(card)
+
+        self.assertEqual(cards, [duplicate, similar])
+        self.assertEqual(cards[0].similarity, 1.0)
+        self.assertGreaterEqual(cards[1].similarity, duplicates.SIMILARITY_THRESHOLD)
+
+        services.update_card(duplicate, question="Как работает GIL?")
+        self.assertEqual(services.get_similar_cards(card), [similar])
+
+    def test_save_updates_question_signature(self):
+        card = services.create_card(
+            author=self.user, question="Как работает GIL?", answer="a"
+        )
+        similar = services.create_card(
+            author=self.user,
+            question="Что такое декоратор в Python и как он работает?",
+            answer="b",
+        )
+
+        card.question = "что такое декоратор в python, и как он работает"
+        card.save()
+
+        card.refresh_from_db()
+        self.assertEqual(
+            card.question_fingerprint,
+            duplicates.get_question_signature(card.question)[0],
+        )
+        self.assertEqual(services.get_similar_cards(similar), [card])
+
+
+class CardExportTest(TestCase):
+    def setUp(self):
+        self.user = user_services.create_user("user", "password123")
+        other_user = user_services.create_user("other_user", "password123")
+
+        self.card = services.create_card(
+            author=self.user, question="q, 1", answer='<p>"a"\n1</p>'
+        )
+        saved_card = services.create_card(author=other_user, question="q2", answer="a")
+        saved_card.saved_by.add(self.user)
+        services.create_card(author=other_user, question="q3", answer="a")
+
+    def export(self, export_format, compression=None):
+        filename, content_type, chunks = services.prepare_collection_for_export(
+            user=self.user, export_format=export_format, compression=compression
+        )
+        return filename, b"".join(chunks)
+
+    def test_export_formats(self):
+        filename, content = self.export("txt")
+        self.assertEqual(filename, "user_cards.txt")
+        cards = importing.parse_cards(io.StringIO(content.decode(), newline=""))
+        self.assertEqual(list(cards), [("q, 1", '<p>"a"\n1</p>'), ("q2", "a")])
+
+        _, content = self.export("csv")
+        rows = list(csv.reader(io.StringIO(content.decode(), newline="")))
+        self.assertEqual(rows[0], exporting.EXPORT_FIELDS)
+        self.assertEqual(
+            [row[1:3] for row in rows[1:]], [["q, 1", '<p>"a"\n1</p>'], ["q2", "a"]]
+        )
+
+        _, content = self.export("jsonl")
+        cards = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(cards[0]["id"], self.card.pk)
+        self.assertEqual(cards[0]["answer"], '<p>"a"\n1</p>')
+        self.assertEqual(len(cards), 2)
+
+    def test_export_compression(self):
+        _, content = self.export("jsonl")
+
+        filename, gzip_content = self.export("jsonl", compression="gzip")
+        self.assertEqual(filename, "user_cards.jsonl.gz")
+        self.assertEqual(gzip.decompress(gzip_content), content)
+
+        filename, zip_content = self.export("jsonl", compression="zip")
+        self.assertEqual(filename, "user_cards.jsonl.zip")
+        with zipfile.ZipFile(io.BytesIO(zip_content)) as archive:
+            self.assertEqual(archive.read("user_cards.jsonl"), content)
+
+    def test_export_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.export("xml")
+        with self.assertRaises(ValueError):
+            self.export("txt", compression="rar")
+
+
+@tag("slow")
+class CardExportMemoryTest(TestCase):
+    """
+    Проверяет, что пиковое потребление памяти при экспорте
+    не зависит от количества карточек.
+    """
+
+    cards_count = 100_000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = user_services.create_user("user", "password123")
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {Card._meta.db_table}
+                    (question, answer, author_id, created_at, updated_at,
+                     question_fingerprint, question_bands, saved_count, deck_count)
+                SELECT 'question ' || i, repeat('<p>answer ' || i || '</p>', 20),
+                       %s, now(), now(), md5('question ' || i), '{{}}', 0, 0
+                FROM generate_series(1, %s) AS i
+                """,
+                [cls.user.pk, cls.cards_count],
+            )
+
+    def measure_peak(self, limit, **kwargs):
+        cards = Card.objects.filter(pk__in=Card.objects.order_by("pk")[:limit])
+        _, _, chunks = exporting.export_cards(cards, filename="cards", **kwargs)
+
+        tracemalloc.start()
+        try:
+            size = sum(len(chunk) for chunk in chunks)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return size, peak
+
+    def test_peak_memory_is_constant(self):
+        for kwargs in [
+            {"export_format": "txt"},
+            {"export_format": "csv", "compression": "gzip"},
+            {"export_format": "jsonl", "compression": "zip"},
+        ]:
+            _, small_peak = self.measure_peak(self.cards_count // 10, **kwargs)
+            size, peak = self.measure_peak(self.cards_count, **kwargs)
+
+            self.assertLess(peak, small_peak * 1.5 + 1024 * 1024, kwargs)
+            if "compression" not in kwargs:
+                self.assertLess(peak, size / 10, kwargs)
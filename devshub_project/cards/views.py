@@ -1,7 +1,8 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import redirect, render
 
+from core.pagination import paginate
+
 from . import services
 from .forms import CardForm
 
@@ -11,16 +12,15 @@ def card_list(request):
 
     query = request.GET.get("query", "")
     sort_by = request.GET.get("sort_by", "")
-    page_number = request.GET.get("page", 1)
 
     cards = services.filter_sort_cards(
-        cards=services.get_cards_with_saved_status(user=user),
+        cards=services.get_cards(),
         query=query,
         sort_by=sort_by,
     )
 
-    paginator = Paginator(cards, 20)
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, cards)
+    services.attach_saved_status(cards=page_obj, user=user)
 
     context = {
         "cards": page_obj,
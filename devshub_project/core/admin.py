@@ -1,3 +1,16 @@
 from django.contrib import admin
 
-# Register your models here.
+from decks import counters
+
+
+class CountersModelAdmin(admin.ModelAdmin):
+    """
+    Админка моделей со счетчиками. Изменения сохраняются без счетчиков,
+    чтобы не перезаписать их значениями, загруженными вместе с формой.
+    """
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            counters.save_without_counters(obj)
+        else:
+            super().save_model(request, obj, form, change)
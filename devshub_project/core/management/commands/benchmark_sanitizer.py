@@ -0,0 +1,122 @@
+import random
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from core import utils
+
+CODE_LINES = [
+    "def fibonacci(n):",
+    '    """Возвращает n-е число Фибоначчи."""',
+    "    a, b = 0, 1",
+    "    for _ in range(n):",
+    "        a, b = b, a + b",
+    "    return a",
+    "",
+    "if __name__ == '__main__' and fibonacci(10) > 5 & 3:",
+    "    print(f'<b>{fibonacci(10)}</b>')",
+]
+
+PARAGRAPH = (
+    "<p>Генераторы в <strong>Python</strong> возвращают значения по одному "
+    'через <code>yield</code>, см. <a href="https://docs.python.org">'
+    "документацию</a>.</p>"
+)
+
+
+def generate_answer(size, seed):
+    """
+    Возвращает HTML ответа размером не меньше size символов:
+    абзацы текста вперемешку с блоками кода, как из TinyMCE.
+    """
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+
+    while length < size:
+        if rng.random() < 0.5:
+            part = PARAGRAPH
+        else:
+            code = "\n".join(rng.choice(CODE_LINES) for _ in range(20))
+            code = code.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            part = f'<pre class="language-python"><code>{code}</code></pre>'
+
+        parts.append(part)
+        length += len(part)
+
+    return "".join(parts)
+
+
+def generate_text(size):
+    """Возвращает текст без разметки размером size символов."""
+    return ("Итераторы и генераторы в Python. " * (size // 33 + 1))[:size]
+
+
+class Command(BaseCommand):
+    help = (
+        "Измеряет пропускную способность очистки HTML: bleach без кэша "
+        "(прежняя реализация), clean_html для нового текста, повторная "
+        "очистка уже чистого HTML, текст без разметки и подсветка кода "
+        "render_html для нового и неизмененного HTML. Результат — медиана по повторам в МБ/с и ответах/с."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000])
+        parser.add_argument("--items", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'size':>8} {'implementation':>22} {'MB/s':>8} {'items/s':>9}"
+        )
+
+        for size in options["sizes"]:
+            answers = [generate_answer(size, seed=i) for i in range(options["items"])]
+            cleaned = [utils.clean_html(answer) for answer in answers]
+            texts = [generate_text(size)] * options["items"]
+            cache_keys = [
+                utils._cache_key(prefix, item)
+                for prefix in ["clean_html", "render_html"]
+                for item in answers + cleaned
+            ]
+
+            def forget():
+                cache.delete_many(cache_keys)
+
+            for name, function, items, before in [
+                ("bleach", utils._bleach_clean, answers, None),
+                ("clean_html, new", utils.clean_html, answers, forget),
+                ("clean_html, unchanged", utils.clean_html, cleaned, None),
+                ("clean_html, plain text", utils.clean_html, texts, None),
+                ("render_html, new", utils.render_html, cleaned, forget),
+                ("render_html, unchanged", utils.render_html, cleaned, None),
+            ]:
+                elapsed = self._measure(function, items, before, options["repeat"])
+                self._report(size, name, items, elapsed)
+
+            forget()
+
+    def _measure(self, function, items, before, repeat):
+        """Возвращает медиану времени обработки всех items."""
+        timings = []
+
+        for _ in range(repeat):
+            if before is not None:
+                before()
+
+            start = time.perf_counter()
+            for item in items:
+                function(item)
+            timings.append(time.perf_counter() - start)
+
+        return statistics.median(timings)
+
+    def _report(self, size, name, items, elapsed):
+        megabytes = sum(len(item.encode()) for item in items) / 1024 / 1024
+
+        self.stdout.write(
+            f"{size:>8} {name:>22} {megabytes / elapsed:>8.2f} "
+            f"{len(items) / elapsed:>9.1f}"
+        )
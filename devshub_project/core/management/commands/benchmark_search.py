@@ -0,0 +1,183 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from decks import services as deck_services
+from decks.models import Deck
+from projects import services as project_services
+from projects.models import Project
+
+User = get_user_model()
+
+WORDS = [
+    "python",
+    "django",
+    "fastapi",
+    "redis",
+    "postgres",
+    "celery",
+    "docker",
+    "циклы",
+    "итераторы",
+    "генераторы",
+    "алгоритмы",
+    "сервис",
+    "ссылок",
+    "основы",
+    "начинающих",
+    "шаблон",
+    "парсер",
+    "бот",
+]
+
+PAGE_SIZE = 20
+
+
+def legacy_filter_sort(queryset, query, sort_by):
+    """Прежняя реализация поиска: icontains по названию."""
+    return queryset.filter(title__icontains=query).order_by("-created_at")
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает время поиска колод и проектов по названию до и после "
+        "добавления триграммных индексов: icontains без индекса, icontains "
+        "с индексом и поиск с учетом опечаток. Время — медиана запроса "
+        "количества и первой страницы. Все данные создаются в транзакции, "
+        "которая откатывается."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--queries",
+            nargs="+",
+            default=["python", "генераторы", "fastap", "djangoo", "сервис ссылок"],
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'model':>8} {'query':>15} {'implementation':>22} "
+            f"{'rows':>7} {'time, ms':>9}"
+        )
+
+        with transaction.atomic():
+            author = User.objects.create(username="benchmark_search", password="!")
+
+            for model in [Deck, Project]:
+                self._seed(model=model, author=author, rows=options["rows"])
+
+            for model, queryset, filter_sort, index in [
+                (
+                    Deck,
+                    deck_services.get_decks(),
+                    deck_services.filter_sort_decks,
+                    "decks_deck_title_trgm",
+                ),
+                (
+                    Project,
+                    project_services.get_projects(),
+                    project_services.filter_sort_projects,
+                    "projects_project_title_trgm",
+                ),
+            ]:
+                for query in options["queries"]:
+                    self._compare(
+                        model=model,
+                        queryset=queryset,
+                        filter_sort=filter_sort,
+                        index=index,
+                        query=query,
+                        repeat=options["repeat"],
+                    )
+
+            transaction.set_rollback(True)
+
+    def _seed(self, model, author, rows):
+        """Создает rows записей с названиями из случайных слов WORDS."""
+        columns = {
+            Deck: "",
+            Project: ", description, repository_url, live_url, cover_image",
+        }[model]
+        values = {
+            Deck: "",
+            Project: ", '<p>' || title || '</p>', '', '', ''",
+        }[model]
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT setseed(0.5)")
+            cursor.execute(
+                f"""
+                INSERT INTO {model._meta.db_table}
+                    (title, author_id, created_at, updated_at{columns})
+                SELECT title, %s, created_at, created_at{values}
+                FROM (
+                    SELECT initcap(
+                               (%s::text[])[1 + floor(random() * %s)] || ' '
+                               || (%s::text[])[1 + floor(random() * %s)] || ' '
+                               || (%s::text[])[1 + floor(random() * %s)]
+                           ) || ' ' || i AS title,
+                           now() - i * interval '1 minute' AS created_at
+                    FROM generate_series(1, %s) AS i
+                ) AS generated
+                """,
+                [author.pk] + [WORDS, len(WORDS)] * 3 + [rows],
+            )
+            cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    def _compare(self, model, queryset, filter_sort, index, query, repeat):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP INDEX {index}")
+
+            self._report(
+                model,
+                query,
+                "icontains, no index",
+                self._measure(legacy_filter_sort, queryset, query, repeat),
+            )
+
+            transaction.set_rollback(True)
+
+        self._report(
+            model,
+            query,
+            "icontains, trgm index",
+            self._measure(legacy_filter_sort, queryset, query, repeat),
+        )
+        self._report(
+            model,
+            query,
+            "trigram search",
+            self._measure(filter_sort, queryset, query, repeat),
+        )
+
+    def _measure(self, filter_sort, queryset, query, repeat):
+        """
+        Возвращает количество найденных записей и медиану времени
+        запроса количества и первой страницы, как при пагинации.
+        """
+        timings = []
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+
+            results = filter_sort(queryset, query, "")
+            count = results.count()
+            list(results[:PAGE_SIZE])
+
+            timings.append(time.perf_counter() - start)
+
+        return count, statistics.median(timings)
+
+    def _report(self, model, query, name, measurement):
+        count, elapsed = measurement
+
+        self.stdout.write(
+            f"{model.__name__:>8} {query:>15} {name:>22} "
+            f"{count:>7} {elapsed * 1000:>9.1f}"
+        )
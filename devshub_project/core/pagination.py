@@ -0,0 +1,282 @@
+"""
+Пагинация по ключу (keyset).
+
+Страница выбирается условием по паре (дата, id) последней показанной
+записи вместо OFFSET, поэтому время запроса не зависит от номера
+страницы и не нужен COUNT(*). Применяется, когда queryset упорядочен
+только по дате создания (по возрастанию или убыванию). При другой
+сортировке, например по релевантности поиска, используется обычная
+постраничная пагинация с оценкой количества записей
+(EstimatedCountPaginator). В API пагинация по ключу включается
+параметром cursor, по умолчанию ответ постраничный с count.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+KEYSET_FIELDS = ["created_at", "date_joined"]
+
+CURSOR_QUERY_PARAM = "cursor"
+
+PAGE_SIZE = 20
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def get_keyset_ordering(queryset):
+    """
+    Возвращает пару (поле, по убыванию) для пагинации по ключу
+    или None, если queryset упорядочен иначе.
+    """
+    ordering = queryset.query.order_by
+
+    if not ordering and queryset.query.default_ordering:
+        ordering = queryset.model._meta.ordering
+
+    if len(ordering) != 1 or not isinstance(ordering[0], str):
+        return None
+
+    field = ordering[0].removeprefix("-")
+
+    if field not in KEYSET_FIELDS:
+        return None
+
+    return field, ordering[0].startswith("-")
+
+
+def encode_cursor(obj, field, reverse):
+    """Возвращает курсор на позицию записи obj."""
+    position = [getattr(obj, field).isoformat(), obj.pk, reverse]
+
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Возвращает тройку (дата, id, назад) из курсора.
+    Вызывает InvalidCursor, если курсор поврежден.
+    """
+    try:
+        value, pk, reverse = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(value), int(pk), bool(reverse)
+    except (binascii.Error, TypeError, ValueError):
+        raise InvalidCursor
+
+
+class KeysetPage:
+    """Страница пагинации по ключу с курсорами на соседние страницы."""
+
+    is_keyset = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def paginate_keyset(queryset, cursor, per_page=PAGE_SIZE):
+    """
+    Возвращает KeysetPage со страницей queryset после (или до) позиции
+    из cursor. Без курсора возвращает первую страницу. Queryset должен
+    быть упорядочен по одному из KEYSET_FIELDS (см. get_keyset_ordering).
+    """
+    field, descending = get_keyset_ordering(queryset)
+    value, pk, reverse = decode_cursor(cursor) if cursor else (None, None, False)
+
+    if descending != reverse:
+        queryset = queryset.order_by(f"-{field}", "-pk")
+        if value is not None:
+            queryset = queryset.filter(
+                Q(**{f"{field}__lte": value}) & ~Q(**{field: value, "pk__gte": pk})
+            )
+    else:
+        queryset = queryset.order_by(field, "pk")
+        if value is not None:
+            queryset = queryset.filter(
+                Q(**{f"{field}__gte": value}) & ~Q(**{field: value, "pk__lte": pk})
+            )
+
+    object_list = list(queryset[: per_page + 1])
+    has_more = len(object_list) > per_page
+    object_list = object_list[:per_page]
+
+    if reverse:
+        object_list.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, cursor is not None
+
+    if not object_list:
+        return KeysetPage(object_list, next_cursor=None, previous_cursor=None)
+
+    return KeysetPage(
+        object_list,
+        next_cursor=(
+            encode_cursor(object_list[-1], field, reverse=False) if has_next else None
+        ),
+        previous_cursor=(
+            encode_cursor(object_list[0], field, reverse=True) if has_previous else None
+        ),
+    )
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator, который не считает точное количество записей больших
+    таблиц без фильтров: если оценка планировщика Postgres (EXPLAIN)
+    не меньше estimate_threshold, используется она. Для запросов
+    с условиями (поиск, фильтры) оценка может сильно отличаться
+    от результата, поэтому считается точное количество. Количество
+    кэшируется на cache_timeout секунд по тексту запроса.
+    """
+
+    estimate_threshold = 10_000
+    cache_timeout = 60
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+
+        if not hasattr(queryset, "query"):
+            return super().count
+
+        if queryset.query.is_empty():
+            return 0
+
+        queryset = queryset.order_by()
+        cache_key = self._count_cache_key(queryset)
+
+        count = cache.get(cache_key)
+
+        if count is None:
+            count = None if queryset.query.where else self._estimate_count(queryset)
+            if count is None or count < self.estimate_threshold:
+                count = queryset.count()
+            cache.set(cache_key, count, self.cache_timeout)
+
+        return count
+
+    def _count_cache_key(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        digest = hashlib.md5(repr((sql, params)).encode()).hexdigest()
+        return f"paginator_count:{digest}"
+
+    def _estimate_count(self, queryset):
+        plan = json.loads(queryset.explain(format="json"))
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def paginate(request, queryset, per_page=PAGE_SIZE):
+    """
+    Возвращает страницу queryset для HTML представлений:
+    по ключу из параметра cursor, если это позволяет сортировка,
+    иначе по номеру из параметра page.
+    """
+    if get_keyset_ordering(queryset) is None:
+        paginator = EstimatedCountPaginator(queryset, per_page)
+        return paginator.get_page(request.GET.get("page", 1))
+
+    try:
+        return paginate_keyset(queryset, request.GET.get(CURSOR_QUERY_PARAM), per_page)
+    except InvalidCursor:
+        return paginate_keyset(queryset, None, per_page)
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Пагинация API. По умолчанию работает как PageNumberPagination
+    с оценкой количества записей (EstimatedCountPaginator). Если передан
+    параметр cursor (для первой страницы — пустой) и сортировка позволяет
+    пагинацию по ключу, страница выбирается по ключу и ответ имеет вид
+    {"next", "previous", "results"} без count.
+    """
+
+    django_paginator_class = EstimatedCountPaginator
+    invalid_cursor_message = "Неверный курсор."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = (
+            CURSOR_QUERY_PARAM in request.query_params
+            and get_keyset_ordering(queryset) is not None
+        )
+
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+
+        try:
+            self.page = paginate_keyset(
+                queryset, request.query_params[CURSOR_QUERY_PARAM] or None, page_size
+            )
+        except InvalidCursor:
+            raise NotFound(self.invalid_cursor_message)
+
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+
+        return self._get_cursor_link(self.page.next_cursor)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+
+        return self._get_cursor_link(self.page.previous_cursor)
+
+    def _get_cursor_link(self, cursor):
+        if cursor is None:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, CURSOR_QUERY_PARAM, cursor)
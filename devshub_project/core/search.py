@@ -0,0 +1,150 @@
+import re
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+    TrigramWordSimilarity,
+)
+from django.db.models import (
+    Case,
+    F,
+    FloatField,
+    Func,
+    GeneratedField,
+    Q,
+    TextField,
+    Value,
+    When,
+)
+from django.db.models.functions import Left, Length, Trim, Upper
+
+SEARCH_CONFIGS = ["russian", "english"]
+
+WORD_RE = re.compile(r"\w+")
+
+
+class StripTags(Func):
+    """Заменяет HTML теги пробелами (regexp_replace)."""
+
+    function = "regexp_replace"
+    output_field = TextField()
+
+    def __init__(self, expression, **extra):
+        super().__init__(expression, Value(r"<[^>]+>"), Value(" "), Value("g"), **extra)
+
+
+class CollapseWhitespace(Func):
+    """Заменяет последовательности пробельных символов одним пробелом."""
+
+    function = "regexp_replace"
+    output_field = TextField()
+
+    def __init__(self, expression, **extra):
+        super().__init__(expression, Value(r"\s+"), Value(" "), Value("g"), **extra)
+
+
+def search_vector_field(weighted_fields):
+    """
+    Возвращает GeneratedField с tsvector по всем конфигурациям
+    SEARCH_CONFIGS. weighted_fields — список пар (выражение, вес).
+    Выражения должны быть неизменяемыми (immutable) для Postgres.
+    """
+    vector = None
+
+    for config in SEARCH_CONFIGS:
+        for expression, weight in weighted_fields:
+            part = SearchVector(expression, config=config, weight=weight)
+            vector = part if vector is None else vector + part
+
+    return GeneratedField(
+        expression=vector,
+        output_field=SearchVectorField(),
+        db_persist=True,
+        editable=False,
+    )
+
+
+def excerpt_field(expression, length):
+    """
+    Возвращает GeneratedField с первыми length символами текста
+    выражения без HTML тегов и лишних пробелов.
+    """
+    return GeneratedField(
+        expression=Left(Trim(CollapseWhitespace(StripTags(expression))), length),
+        output_field=TextField(),
+        db_persist=True,
+        editable=False,
+    )
+
+
+def build_search_query(text):
+    """
+    Возвращает SearchQuery с поиском по префиксам всех слов запроса
+    во всех конфигурациях или None, если в запросе нет слов.
+    """
+    words = WORD_RE.findall(text.lower())
+
+    if not words:
+        return None
+
+    raw_query = " & ".join(f"{word}:*" for word in words)
+
+    query = None
+    for config in SEARCH_CONFIGS:
+        part = SearchQuery(raw_query, search_type="raw", config=config)
+        query = part if query is None else query | part
+
+    return query
+
+
+def search(queryset, text, field="search_vector"):
+    """
+    Фильтрует queryset полнотекстовым поиском по полю field
+    и добавляет аннотацию rank. Если в запросе нет слов,
+    возвращает пустой queryset.
+    """
+    query = build_search_query(text)
+
+    if query is None:
+        return queryset.annotate(rank=Value(0.0, output_field=FloatField())).none()
+
+    return queryset.filter(**{field: query}).annotate(rank=SearchRank(F(field), query))
+
+
+def trigram_index(field, name):
+    """
+    Возвращает GIN индекс с триграммами (pg_trgm) по UPPER(field).
+    Индекс используется и для icontains, и для trigram_word_similar.
+    """
+    return GinIndex(OpClass(Upper(field), name="gin_trgm_ops"), name=name)
+
+
+def trigram_search(queryset, text, field):
+    """
+    Фильтрует queryset по вхождению text в поле field без учета регистра
+    или по похожим словам (с учетом опечаток) и добавляет аннотацию rank.
+    Вхождения идут выше похожих слов: их rank больше 1 и растет с долей
+    запроса в длине поля, у похожих слов rank — похожесть от 0 до 1.
+    Оба условия используют индекс trigram_index.
+    """
+    text = text.strip()
+
+    if not text:
+        return queryset.annotate(rank=Value(0.0, output_field=FloatField()))
+
+    contains = Q(search_field__contains=text.upper())
+
+    return (
+        queryset.alias(search_field=Upper(field))
+        .filter(contains | Q(search_field__trigram_word_similar=text.upper()))
+        .annotate(
+            rank=Case(
+                When(contains, then=1 + Value(float(len(text))) / Length(field)),
+                default=TrigramWordSimilarity(Value(text), field),
+                output_field=FloatField(),
+            )
+        )
+    )
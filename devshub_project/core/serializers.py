@@ -0,0 +1,42 @@
+from rest_framework.serializers import ListSerializer
+
+FIELDS_QUERY_PARAM = "fields"
+
+OMIT_QUERY_PARAM = "omit"
+
+
+def _parse_field_names(value):
+    return {name.strip() for name in (value or "").split(",") if name.strip()}
+
+
+class SparseFieldsetsMixin:
+    """
+    Примесь для сериализаторов чтения, которая оставляет в ответе только
+    поля из параметра запроса fields и убирает поля из параметра omit
+    (имена через запятую). Убранные поля не вычисляются, поэтому вместе
+    с ними не выполняются и их запросы (например, SerializerMethodField).
+    Неизвестные имена игнорируются. Применяется только к сериализатору
+    верхнего уровня, вложенные сериализаторы возвращают все поля.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+
+        if request is None or not self._is_root_serializer():
+            return fields
+
+        only = _parse_field_names(request.query_params.get(FIELDS_QUERY_PARAM))
+        omit = _parse_field_names(request.query_params.get(OMIT_QUERY_PARAM))
+
+        return {
+            name: field
+            for name, field in fields.items()
+            if (not only or name in only) and name not in omit
+        }
+
+    def _is_root_serializer(self):
+        parent = self.parent
+        return parent is None or (
+            isinstance(parent, ListSerializer) and parent.parent is None
+        )
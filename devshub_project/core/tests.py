@@ -1,3 +1,222 @@
-from django.test import TestCase
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from cards import services as card_services
+from cards.models import Card
+from users import services as user_services
+
+from . import utils
+from .pagination import (
+    EstimatedCountPaginator,
+    InvalidCursor,
+    paginate,
+    paginate_keyset,
+)
+from .transactions import batch_on_commit
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = user_services.create_user("user", "password123")
+        cards = Card.objects.bulk_create(
+            Card(author=self.user, question=f"question {i}", answer="answer")
+            for i in range(7)
+        )
+
+        # Несколько карточек с одинаковой датой проверяют сравнение по id.
+        now = timezone.now()
+        for i, card in enumerate(cards):
+            Card.objects.filter(pk=card.pk).update(
+                created_at=now - timezone.timedelta(minutes=i // 3)
+            )
+
+    def collect_pages(self, queryset, per_page):
+        pages = []
+        page = paginate_keyset(queryset, None, per_page)
+        pages.append([card.pk for card in page])
+
+        while page.has_next():
+            page = paginate_keyset(queryset, page.next_cursor, per_page)
+            pages.append([card.pk for card in page])
+
+        return pages, page
+
+    def test_pages_follow_ordering(self):
+        for sort_by, ordering in [
+            ("newest", ["-created_at", "-pk"]),
+            ("oldest", ["created_at", "pk"]),
+        ]:
+            cards = card_services.filter_sort_cards(
+                cards=card_services.get_cards(), query="", sort_by=sort_by
+            )
+            expected = list(
+                Card.objects.order_by(*ordering).values_list("pk", flat=True)
+            )
+
+            pages, _ = self.collect_pages(cards, per_page=3)
+
+            self.assertEqual([len(page) for page in pages], [3, 3, 1])
+            self.assertEqual(sum(pages, []), expected)
+
+    def test_previous_pages(self):
+        cards = card_services.get_cards()
+        pages, page = self.collect_pages(cards, per_page=2)
+
+        for expected in reversed(pages[:-1]):
+            self.assertTrue(page.has_previous())
+            page = paginate_keyset(cards, page.previous_cursor, per_page=2)
+            self.assertEqual([card.pk for card in page], expected)
+            self.assertTrue(page.has_next())
+
+        self.assertFalse(page.has_previous())
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            paginate_keyset(card_services.get_cards(), "invalid", per_page=2)
+
+        request = RequestFactory().get("/", {"cursor": "invalid"})
+        page = paginate(request, card_services.get_cards(), per_page=2)
+        self.assertEqual(len(page), 2)
+
+    def test_ranked_search_uses_page_numbers(self):
+        request = RequestFactory().get("/", {"page": 2})
+        cards = card_services.filter_sort_cards(
+            cards=card_services.get_cards(), query="question", sort_by=""
+        )
+
+        page = paginate(request, cards, per_page=3)
+
+        self.assertEqual(page.number, 2)
+        self.assertEqual(page.paginator.count, 7)
+
+    def test_api_uses_cursor_only_when_requested(self):
+        url = reverse("card-list")
+
+        # Поиск нужен для точного количества (см. EstimatedCountPaginator)
+        response = self.client.get(url, {"query": "question", "sort_by": "newest"})
+        self.assertEqual(response.json()["count"], 7)
+        self.assertEqual(len(response.json()["results"]), 7)
+
+        response = self.client.get(url, {"cursor": ""})
+        self.assertNotIn("count", response.json())
+        self.assertEqual(len(response.json()["results"]), 7)
+
+        response = self.client.get(url, {"cursor": "invalid"})
+        self.assertEqual(response.status_code, 404)
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = user_services.create_user("user", "password123")
+        Card.objects.bulk_create(
+            Card(author=self.user, question=f"question {i}", answer="answer")
+            for i in range(5)
+        )
+
+    def test_filtered_count_is_exact_and_cached(self):
+        cards = card_services.get_cards().filter(author=self.user)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(EstimatedCountPaginator(cards, 2).count, 5)
+
+        Card.objects.create(author=self.user, question="new", answer="answer")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(EstimatedCountPaginator(cards, 2).count, 5)
+
+        paginator = EstimatedCountPaginator(cards.filter(question="new"), 2)
+        paginator.estimate_threshold = 0
+        self.assertEqual(paginator.count, 1)
+
+    def test_large_count_is_estimated(self):
+        paginator = EstimatedCountPaginator(card_services.get_cards(), 2)
+        paginator.estimate_threshold = 0
+
+        with self.assertNumQueries(1):
+            self.assertGreater(paginator.count, 0)
+
+    def test_empty_queryset(self):
+        paginator = EstimatedCountPaginator(Card.objects.none(), 2)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 0)
+
+
+class CleanHtmlTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_clean_html(self):
+        cleaned = utils.clean_html(
+            '<pre class="language-python" onclick="alert(1)"><code>x</code></pre>'
+            '<p class="big">text</p><script>alert(1)</script>'
+        )
+
+        self.assertEqual(
+            cleaned,
+            '<pre class="language-python"><code>x</code></pre><p>text</p>alert(1)',
+        )
+
+    def test_plain_text_is_not_cleaned(self):
+        with mock.patch.object(utils, "_bleach_clean") as bleach_clean:
+            self.assertEqual(utils.clean_html("plain text"), "plain text")
+
+        bleach_clean.assert_not_called()
+
+    def test_large_html_is_memoized(self):
+        user_html = "<p>text</p><script>alert(1)</script>" * 100
+        cleaned = utils.clean_html(user_html)
+
+        with mock.patch.object(utils, "_bleach_clean") as bleach_clean:
+            self.assertEqual(utils.clean_html(user_html), cleaned)
+            self.assertEqual(utils.clean_html(cleaned), cleaned)
+
+        bleach_clean.assert_not_called()
+
+    def test_render_html_highlights_code(self):
+        rendered = utils.render_html(
+            '<p>text</p><pre class="language-python"><code>'
+            "if a &lt; b:\n    pass</code></pre>"
+        )
+
+        self.assertTrue(rendered.startswith('<p>text</p><div class="highlight">'))
+        self.assertIn('<span class="k">if</span>', rendered)
+        self.assertIn("&lt;", rendered)
+        self.assertEqual(utils.render_html("<p>text</p>"), "<p>text</p>")
+
+
+class BatchOnCommitTest(TestCase):
+    def setUp(self):
+        self.holder = SimpleNamespace()
+        self.callback = mock.Mock()
+
+    def schedule(self, ids):
+        batch_on_commit(self.holder, "_pending", self.callback, ids=ids)
+
+    def test_changes_in_transaction_are_batched(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.schedule({1})
+                self.schedule({2})
+
+        self.callback.assert_called_once_with(ids={1, 2})
+
+    def test_rolled_back_changes_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(DatabaseError):
+                with transaction.atomic():
+                    self.schedule({1})
+                    raise DatabaseError
+
+            with transaction.atomic():
+                self.schedule({2})
+
+        self.callback.assert_called_once_with(ids={2})
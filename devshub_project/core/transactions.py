@@ -0,0 +1,43 @@
+from django.db import transaction
+
+
+def batch_on_commit(holder, name, callback, **items):
+    """
+    Накапливает множества items в атрибуте name объекта holder
+    и один раз вызывает callback(**накопленные множества) после
+    фиксации текущей транзакции. Так несколько изменений в одной
+    транзакции обрабатываются одним вызовом.
+
+    В атрибуте хранится пара (функция on_commit, множества). Множества
+    дополняются, только пока эта функция зарегистрирована в текущей
+    транзакции: при откате транзакции или точки сохранения Django
+    удаляет ее, и накопленные множества отбрасываются.
+    """
+    connection = transaction.get_connection()
+    scheduled = getattr(holder, name, None)
+
+    if scheduled is not None and _is_registered(connection, scheduled[0]):
+        _, pending = scheduled
+        is_scheduled = True
+    else:
+        pending = {}
+        is_scheduled = False
+
+    for key, values in items.items():
+        pending.setdefault(key, set()).update(values)
+
+    if is_scheduled:
+        return
+
+    def run():
+        setattr(holder, name, None)
+        callback(**pending)
+
+    setattr(holder, name, (run, pending))
+    transaction.on_commit(run)
+
+
+def _is_registered(connection, func):
+    return connection.in_atomic_block and any(
+        registered is func for _, registered, _ in connection.run_on_commit
+    )
@@ -1,4 +1,26 @@
+"""
+Очистка и предварительная отрисовка пользовательского HTML.
+
+clean_html очищает HTML через bleach. Результат очистки больших текстов
+кэшируется по хэшу содержимого, а хэш результата запоминается как уже
+чистый HTML, поэтому повторное сохранение неизмененного текста не
+запускает bleach. Текст без разметки возвращается без очистки.
+
+render_html подсвечивает блоки кода (плагин codesample TinyMCE) через
+Pygments и так же кэширует результат. Отрисованный HTML хранится
+в отдельных полях моделей, чтобы не отрисовывать его при каждом показе.
+"""
+
+import hashlib
+import html
+import re
+
 import bleach
+from django.core.cache import cache
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import TextLexer, get_lexer_by_name
+from pygments.util import ClassNotFound
 
 ALLOWED_TAGS = [
     "b",
@@ -34,8 +56,101 @@ ALLOWED_TAGS = [
 ]
 
 
+CLEAN_HTML_CACHE_MIN_LENGTH = 1000
+CLEAN_HTML_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Символы, которые bleach может изменить в тексте без разметки.
+UNSAFE_TEXT_RE = re.compile(r"[<>&\r\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+
+CODE_BLOCK_RE = re.compile(
+    r'<pre(?: class="language-([\w+#-]+)")?>\s*<code[^>]*>(.*?)</code>\s*</pre>',
+    re.DOTALL,
+)
+
+TAG_RE = re.compile(r"<[^>]+>")
+
+HTML_FORMATTER = HtmlFormatter(cssclass="highlight")
+
+
+def _allow_language_class(tag, name, value):
+    return name == "class" and re.fullmatch(r"language-[\w+#-]+", value) is not None
+
+
+ALLOWED_ATTRIBUTES = {
+    **bleach.sanitizer.ALLOWED_ATTRIBUTES,
+    "pre": _allow_language_class,
+    "code": _allow_language_class,
+}
+
+
+def _cache_key(prefix, text):
+    return f"{prefix}:{hashlib.sha256(text.encode()).hexdigest()}"
+
+
+def _clean_html_cache_key(text):
+    return _cache_key("clean_html", text)
+
+
 def clean_html(user_html):
     """
     Очищает HTML от опасных тегов, чтобы избежать xss атак.
     """
-    return bleach.clean(user_html, tags=ALLOWED_TAGS, strip=True)
+    if not UNSAFE_TEXT_RE.search(user_html):
+        return user_html
+
+    if len(user_html) < CLEAN_HTML_CACHE_MIN_LENGTH:
+        return _bleach_clean(user_html)
+
+    cache_key = _clean_html_cache_key(user_html)
+    cached = cache.get(cache_key)
+
+    if cached is True:
+        return user_html
+    if cached is not None:
+        return cached
+
+    cleaned = _bleach_clean(user_html)
+
+    cache.set(cache_key, cleaned, CLEAN_HTML_CACHE_TIMEOUT)
+    cache.set(_clean_html_cache_key(cleaned), True, CLEAN_HTML_CACHE_TIMEOUT)
+
+    return cleaned
+
+
+def _bleach_clean(user_html):
+    return bleach.clean(
+        user_html, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, strip=True
+    )
+
+
+def _highlight_code_block(match):
+    language, code = match.groups()
+
+    try:
+        lexer = get_lexer_by_name(language) if language else TextLexer()
+    except ClassNotFound:
+        lexer = TextLexer()
+
+    return highlight(html.unescape(TAG_RE.sub("", code)), lexer, HTML_FORMATTER)
+
+
+def render_html(clean_user_html):
+    """
+    Возвращает HTML для показа: подсвечивает блоки кода <pre><code>.
+    Принимает уже очищенный HTML (см. clean_html).
+    Результат для больших текстов кэшируется по хэшу содержимого.
+    """
+    if "<pre" not in clean_user_html:
+        return clean_user_html
+
+    if len(clean_user_html) < CLEAN_HTML_CACHE_MIN_LENGTH:
+        return CODE_BLOCK_RE.sub(_highlight_code_block, clean_user_html)
+
+    cache_key = _cache_key("render_html", clean_user_html)
+    rendered = cache.get(cache_key)
+
+    if rendered is None:
+        rendered = CODE_BLOCK_RE.sub(_highlight_code_block, clean_user_html)
+        cache.set(cache_key, rendered, CLEAN_HTML_CACHE_TIMEOUT)
+
+    return rendered
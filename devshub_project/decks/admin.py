@@ -1,5 +1,7 @@
 from django.contrib import admin
 
+from core.admin import CountersModelAdmin
+
 from .models import Deck
 
-admin.site.register(Deck)
+admin.site.register(Deck, CountersModelAdmin)
@@ -1,18 +1,22 @@
+from django.urls import reverse
 from rest_framework import serializers
 from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.utils.urls import replace_query_param
 
 from cards.api.v1.serializers import CardShortSerializer
 from cards.models import Card
-from cards.services import get_cards_created_or_saved_by_user
+from cards.services import attach_saved_status, get_cards_created_or_saved_by_user
+from core.pagination import CURSOR_QUERY_PARAM, paginate_keyset
+from core.serializers import SparseFieldsetsMixin
 from decks import services
 from decks.models import Deck
 from users.api.v1.serializers import UserShortSerializer
 
 
-class DeckListSerializer(serializers.ModelSerializer):
+class DeckListSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     author = UserShortSerializer(read_only=True)
     is_saved = serializers.BooleanField(read_only=True)
-    in_study = serializers.SerializerMethodField()
+    in_study = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = Deck
@@ -22,21 +26,15 @@ class DeckListSerializer(serializers.ModelSerializer):
             "author",
             "is_saved",
             "in_study",
+            "card_count",
+            "saved_count",
+            "learner_count",
             "created_at",
             "updated_at",
         ]
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if not self.context.get("studying_ids", False):
-            self.fields.pop("in_study", None)
-
-    def get_in_study(self, deck):
-        studying_ids = self.context.get("studying_ids", set())
-        return deck.id in studying_ids
-
 
-class DeckDetailSerializer(serializers.ModelSerializer):
+class DeckDetailSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     cards = serializers.SerializerMethodField()
     author = UserShortSerializer(read_only=True)
     is_saved = serializers.BooleanField(read_only=True)
@@ -54,11 +52,26 @@ class DeckDetailSerializer(serializers.ModelSerializer):
         ]
 
     def get_cards(self, obj):
+        """
+        Возвращает первую страницу карточек колоды в формате пагинации API.
+        Следующие страницы отдает действие decks/{id}/cards/.
+        """
         request = self.context["request"]
 
         user = request.user if request.user.is_authenticated else None
-        cards = services.get_deck_cards_with_saved_status(deck=obj, user=user)
-        return CardShortSerializer(cards, many=True).data
+        page = paginate_keyset(services.get_deck_cards(deck=obj), cursor=None)
+        attach_saved_status(cards=page.object_list, user=user)
+
+        next_url = None
+        if page.has_next():
+            url = request.build_absolute_uri(reverse("deck-cards", args=[obj.pk]))
+            next_url = replace_query_param(url, CURSOR_QUERY_PARAM, page.next_cursor)
+
+        return {
+            "count": obj.card_count,
+            "next": next_url,
+            "results": CardShortSerializer(page, many=True).data,
+        }
 
 
 class DeckCreateUpdateSerializer(serializers.ModelSerializer):
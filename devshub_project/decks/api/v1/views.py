@@ -1,11 +1,15 @@
+import io
 from urllib.parse import quote
 
-from django.http import StreamingHttpResponse
-from rest_framework import viewsets
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from rest_framework import serializers, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from cards import services as card_services
+from cards.api.v1.serializers import CardShortSerializer
 from core.permissions import IsAuthorOrReadOnly
 from decks import services
 
@@ -21,15 +25,35 @@ class DeckViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user if self.request.user.is_authenticated else None
-        if self.action in ["list", "retrieve", "toggle_save"]:
+        if self.action == "list":
+            return services.filter_sort_decks(
+                decks=services.get_decks(),
+                query=self.request.query_params.get("query", ""),
+                sort_by=self.request.query_params.get("sort_by", ""),
+            )
+        if self.action in ["retrieve", "toggle_save"]:
             return services.get_decks_with_saved_status(user=user)
         return services.get_decks()
 
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+
+        if page is not None and self.action in ["list", "cards"]:
+            user = self.request.user if self.request.user.is_authenticated else None
+            if self.action == "list":
+                services.attach_statuses(decks=page, user=user)
+            else:
+                card_services.attach_saved_status(cards=page, user=user)
+
+        return page
+
     def get_serializer_class(self):
         if self.action == "list":
             return DeckListSerializer
         if self.action in ["create", "update", "partial_update"]:
             return DeckCreateUpdateSerializer
+        if self.action == "cards":
+            return CardShortSerializer
         return DeckDetailSerializer
 
     def perform_create(self, serializer):
@@ -43,6 +67,18 @@ class DeckViewSet(viewsets.ModelViewSet):
         )
         return Response({"is_saved": is_saved, "message": message})
 
+    @action(detail=True, methods=["get"])
+    def cards(self, request, pk):
+        cards = card_services.filter_sort_cards(
+            cards=services.get_deck_cards(deck=self.get_object()),
+            query=request.query_params.get("query", ""),
+            sort_by=request.query_params.get("sort_by", ""),
+        )
+
+        page = self.paginate_queryset(cards)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
     def toggle_study(self, request, pk):
         deck = services.get_deck_created_or_saved_by_user(deck_id=pk, user=request.user)
@@ -56,13 +92,30 @@ class DeckViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
     def export(self, request, pk):
         deck = services.get_deck_created_or_saved_by_user(deck_id=pk, user=request.user)
-        filename, cards_generator = services.prepare_deck_for_export(deck=deck)
 
-        response = StreamingHttpResponse(
-            cards_generator, content_type="text/plain; charset=utf-8"
-        )
-        response["Content-Disposition"] = (
-            "attachment; " f"filename*=UTF-8''{quote(filename)}"
-        )
+        try:
+            filename, content_type, etag, content = services.prepare_deck_for_export(
+                deck=deck, compression=request.query_params.get("compression") or None
+            )
+        except ValueError as error:
+            raise serializers.ValidationError({"detail": str(error)})
+
+        etag = quote_etag(etag)
+        response = get_conditional_response(request, etag=etag)
+
+        if response is None:
+            if isinstance(content, io.IOBase):
+                response = FileResponse(content, content_type=content_type)
+            else:
+                response = StreamingHttpResponse(content, content_type=content_type)
+
+            response["Content-Disposition"] = (
+                "attachment; " f"filename*=UTF-8''{quote(filename)}"
+            )
+        elif isinstance(content, io.IOBase):
+            content.close()
+
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
 
         return response
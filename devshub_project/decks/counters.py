@@ -0,0 +1,138 @@
+"""
+Денормализованные счетчики колод и карточек.
+
+Deck.card_count, Deck.saved_count, Deck.learner_count, Card.saved_count
+и Card.deck_count меняются на величину изменения (F выражения) в той же
+транзакции, что и связи: сигналы m2m_changed для карточек колоды
+и сохранений (см. signals), функции сервисов для записи на изучение
+и удаления колод и карточек. Массовые изменения в обход сервисов
+(bulk_create связей, удаление пользователей) исправляет команда
+repair_counters, которая пересчитывает счетчики запросами с GROUP BY.
+"""
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from cards.models import Card
+from repetitions.models import DeckEnrollment
+
+from .models import Deck
+
+REPAIR_BATCH_SIZE = 10_000
+
+# Счетчик: (модель, поле, таблица связей, столбец ссылки на модель).
+COUNTERS = [
+    (Deck, "card_count", Deck.cards.through, "deck_id"),
+    (Deck, "saved_count", Deck.saved_by.through, "deck_id"),
+    (Deck, "learner_count", DeckEnrollment, "deck_id"),
+    (Card, "saved_count", Card.saved_by.through, "card_id"),
+    (Card, "deck_count", Deck.cards.through, "card_id"),
+]
+
+
+def save_without_counters(instance, update_fields=None):
+    """
+    Сохраняет instance, не перезаписывая его счетчики:
+    значения в памяти могут быть устаревшими, так как счетчики
+    меняются запросами в обход объектов. Если указан update_fields,
+    сохраняются только эти поля и поля с auto_now,
+    иначе — все поля, кроме счетчиков.
+    """
+    counter_fields = {
+        field for model, field, _, _ in COUNTERS if isinstance(instance, model)
+    }
+    concrete_fields = [
+        field
+        for field in instance._meta.concrete_fields
+        if not field.primary_key and not field.generated
+    ]
+
+    if update_fields is None:
+        update_fields = {field.name for field in concrete_fields}
+    else:
+        update_fields = set(update_fields) | {
+            field.name for field in concrete_fields if getattr(field, "auto_now", False)
+        }
+
+    instance.save(
+        update_fields=[
+            field.name
+            for field in concrete_fields
+            if field.name in update_fields and field.name not in counter_fields
+        ]
+    )
+
+
+def change_counter(model, field, pks, delta):
+    """
+    Изменяет счетчик field у записей model с id из pks
+    (список или queryset) на delta.
+    """
+    if delta:
+        model.objects.filter(pk__in=pks).update(**{field: F(field) + delta})
+
+
+def change_counters(model, field, deltas):
+    """
+    Изменяет счетчик field у записей model по словарю {id: изменение},
+    объединяя записи с одинаковым изменением в один запрос.
+    """
+    pks_by_delta = {}
+    for pk, delta in deltas.items():
+        pks_by_delta.setdefault(delta, []).append(pk)
+
+    for delta, pks in pks_by_delta.items():
+        change_counter(model, field, pks, delta)
+
+
+def repair_counters(batch_size=REPAIR_BATCH_SIZE):
+    """
+    Пересчитывает все счетчики по таблицам связей пачками по id
+    и возвращает словарь {"Модель.поле": количество исправленных записей}.
+    """
+    repaired = {}
+
+    for model, field, through, column in COUNTERS:
+        table = model._meta.db_table
+        through_table = through._meta.db_table
+        count = 0
+
+        last_pk = 0
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    WITH batch AS (
+                        SELECT id FROM {table}
+                        WHERE id > %s
+                        ORDER BY id
+                        LIMIT %s
+                    ),
+                    counts AS (
+                        SELECT batch.id, count(link.{column}) AS value
+                        FROM batch
+                        LEFT JOIN {through_table} AS link ON link.{column} = batch.id
+                        GROUP BY batch.id
+                    ),
+                    updated AS (
+                        UPDATE {table} AS target
+                        SET {field} = counts.value
+                        FROM counts
+                        WHERE target.id = counts.id
+                          AND target.{field} <> counts.value
+                        RETURNING 1
+                    )
+                    SELECT (SELECT max(id) FROM batch), (SELECT count(*) FROM updated)
+                    """,
+                    [last_pk, batch_size],
+                )
+                last_pk, updated = cursor.fetchone()
+
+            if last_pk is None:
+                break
+
+            count += updated
+
+        repaired[f"{model.__name__}.{field}"] = count
+
+    return repaired
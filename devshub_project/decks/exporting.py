@@ -0,0 +1,122 @@
+"""
+Готовые файлы экспорта колод.
+
+Экспорт колоды (txt и txt.gz) сохраняется в DECK_EXPORTS_ROOT в файлы,
+названные по ETag. ETag считается одним запросом по дате изменения
+колоды, списку id ее карточек и их датам изменения, поэтому устаревший
+файл никогда не отдается: после изменения колоды или карточек ETag
+другой и файла с таким именем еще нет. Файлы заранее пересобирает
+задача celery (см. signals), но только для колод, которые уже
+скачивали, остальные собираются при первом скачивании.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import zlib
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.db.models import Max, TextField, Value
+from django.db.models.functions import MD5, Cast
+
+from cards.exporting import export_cards
+
+from .models import Deck
+
+# Меняется вместе с форматом файла экспорта, чтобы сбросить старые файлы.
+EXPORT_VERSION = 1
+
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz"}
+
+TEMPORARY_SUFFIX = ".tmp"
+
+
+def get_export_etag(deck):
+    """
+    Возвращает ETag экспорта колоды (без кавычек). Состав карточек
+    учитывается хэшем упорядоченного списка их id.
+    """
+    cards = Deck.cards.through.objects.filter(deck_id=deck.pk).aggregate(
+        ids_hash=MD5(
+            StringAgg(Cast("card_id", TextField()), Value(","), order_by="card_id")
+        ),
+        updated_at=Max("card__updated_at"),
+    )
+    updated_at = cards["updated_at"].isoformat() if cards["updated_at"] else ""
+
+    value = (
+        f"{EXPORT_VERSION}:{deck.pk}:{deck.updated_at.isoformat()}:"
+        f"{cards['ids_hash'] or ''}:{updated_at}"
+    )
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def get_export_dir(deck_id):
+    return Path(settings.DECK_EXPORTS_ROOT) / str(deck_id)
+
+
+def get_export_path(deck_id, etag, compression=None):
+    """Возвращает путь к файлу экспорта колоды с указанным ETag."""
+    return get_export_dir(deck_id) / f"{etag}.txt{COMPRESSION_SUFFIXES[compression]}"
+
+
+def get_exported_deck_ids(deck_ids):
+    """Возвращает id колод из deck_ids, для которых уже есть файлы экспорта."""
+    return {deck_id for deck_id in deck_ids if get_export_dir(deck_id).is_dir()}
+
+
+def build_export(deck):
+    """
+    Собирает файлы экспорта колоды (txt и txt.gz) за один проход по
+    карточкам и удаляет файлы с предыдущими ETag. Файлы записываются
+    во временные и переименовываются, поэтому читатели не видят
+    недописанный файл. Если колода изменилась во время сборки,
+    файлы не сохраняются. Возвращает ETag или None.
+    """
+    etag = get_export_etag(deck)
+    export_dir = get_export_dir(deck.pk)
+    export_dir.mkdir(parents=True, exist_ok=True)
+
+    _, _, chunks = export_cards(deck.cards.all(), filename=deck.title)
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+
+    file = _create_temporary_file(export_dir)
+    gzip_file = _create_temporary_file(export_dir)
+
+    try:
+        with file, gzip_file:
+            for chunk in chunks:
+                file.write(chunk)
+                gzip_file.write(compressor.compress(chunk))
+            gzip_file.write(compressor.flush())
+
+        deck.refresh_from_db(fields=["updated_at"])
+        if get_export_etag(deck) != etag:
+            return None
+
+        os.replace(file.name, get_export_path(deck.pk, etag))
+        os.replace(gzip_file.name, get_export_path(deck.pk, etag, "gzip"))
+    finally:
+        for temporary_file in [file, gzip_file]:
+            Path(temporary_file.name).unlink(missing_ok=True)
+
+    current = {get_export_path(deck.pk, etag, c).name for c in COMPRESSION_SUFFIXES}
+    for path in export_dir.iterdir():
+        if path.name not in current and path.suffix != TEMPORARY_SUFFIX:
+            path.unlink(missing_ok=True)
+
+    return etag
+
+
+def _create_temporary_file(export_dir):
+    return tempfile.NamedTemporaryFile(
+        dir=export_dir, suffix=TEMPORARY_SUFFIX, delete=False
+    )
+
+
+def delete_exports(deck_id):
+    """Удаляет все файлы экспорта колоды."""
+    shutil.rmtree(get_export_dir(deck_id), ignore_errors=True)
@@ -5,15 +5,26 @@ from cards.services import get_cards_created_or_saved_by_user
 from .models import Deck
 
 
+class CardPickerField(forms.ModelMultipleChoiceField):
+    """
+    Поле выбора карточек для виджета поиска (card-picker.js): id выбранных
+    карточек приходят скрытыми полями, варианты не выводятся на страницу,
+    а все отправленные id проверяются одним запросом к queryset.
+    """
+
+    widget = forms.MultipleHiddenInput
+
+
 class DeckForm(forms.ModelForm):
     required_css_class = "required"
 
+    cards = CardPickerField(queryset=None, label="Карточки")
+
     class Meta:
         model = Deck
-        fields = ["title", "cards"]
+        fields = ["title"]
         labels = {
             "title": "Название колоды",
-            "cards": "Карточки",
         }
         widgets = {
             "title": forms.TextInput(
@@ -22,20 +33,33 @@ class DeckForm(forms.ModelForm):
                     "placeholder": "Основные структуры данных в Python",
                 },
             ),
-            "cards": forms.SelectMultiple(
-                attrs={
-                    "class": (
-                        "w-full border-gray-300 rounded-md"
-                        "flex-6 shadow min-h-96 resize-y"
-                    ),
-                }
-            ),
         }
 
     def __init__(self, *args, user=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.user = user
 
-        self.fields["cards"].queryset = get_cards_created_or_saved_by_user(
-            user=self.user
+        self.fields["cards"].queryset = (
+            get_cards_created_or_saved_by_user(user=self.user)
+            .select_related(None)
+            .only("id")
+        )
+
+        if self.instance.pk and "cards" not in self.initial:
+            self.initial["cards"] = list(
+                self.instance.cards.values_list("pk", flat=True)
+            )
+
+    def get_selected_cards(self):
+        """
+        Возвращает выбранные карточки (начальные или отправленные)
+        для вывода в форме.
+        """
+        ids = [pk for pk in self["cards"].value() or [] if str(pk).isdigit()]
+
+        return (
+            get_cards_created_or_saved_by_user(user=self.user)
+            .select_related(None)
+            .filter(pk__in=ids)
+            .only("id", "question")
         )
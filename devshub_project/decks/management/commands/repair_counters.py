@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from decks import counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает счетчики карточек, сохранений и изучающих "
+        "колод и карточек по таблицам связей и исправляет расхождения."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=counters.REPAIR_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        repaired = counters.repair_counters(batch_size=options["batch_size"])
+
+        for counter, count in repaired.items():
+            self.stdout.write(f"{counter}: исправлено записей {count}")
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0006_card_counters'),
+        ('decks', '0002_deck_title_trgm'),
+        ('repetitions', '0004_review_log'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deck',
+            name='card_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='deck',
+            name='learner_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='deck',
+            name='saved_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='deck',
+            index=models.Index(fields=['-saved_count', '-created_at'], name='decks_deck_saved_c_b6a0b1_idx'),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE decks_deck AS deck SET card_count = counts.value
+            FROM (
+                SELECT deck_id, count(*) AS value
+                FROM decks_deck_cards GROUP BY deck_id
+            ) AS counts
+            WHERE deck.id = counts.deck_id;
+
+            UPDATE decks_deck AS deck SET saved_count = counts.value
+            FROM (
+                SELECT deck_id, count(*) AS value
+                FROM decks_deck_saved_by GROUP BY deck_id
+            ) AS counts
+            WHERE deck.id = counts.deck_id;
+
+            UPDATE decks_deck AS deck SET learner_count = counts.value
+            FROM (
+                SELECT deck_id, count(*) AS value
+                FROM repetitions_deckenrollment GROUP BY deck_id
+            ) AS counts
+            WHERE deck.id = counts.deck_id;
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
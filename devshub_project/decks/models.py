@@ -2,6 +2,8 @@ from django.conf import settings
 from django.db import models
 from django.urls import reverse
 
+from core.search import trigram_index
+
 
 class Deck(models.Model):
     title = models.CharField(max_length=255)
@@ -14,12 +16,17 @@ class Deck(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    card_count = models.PositiveIntegerField(default=0, editable=False)
+    saved_count = models.PositiveIntegerField(default=0, editable=False)
+    learner_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["title"]),
             models.Index(fields=["-created_at"]),
+            models.Index(fields=["-saved_count", "-created_at"]),
+            trigram_index("title", name="decks_deck_title_trgm"),
         ]
 
     def __str__(self):
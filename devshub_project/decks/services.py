@@ -1,10 +1,18 @@
 from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Count, Exists, OuterRef, Q
 from django.shortcuts import get_object_or_404
 
+from cards.exporting import export_cards
+from cards.models import Card
+from core.search import trigram_search
 from repetitions import services as repetition_services
 
+from . import counters, exporting
 from .models import Deck
+from .tasks import build_deck_exports_task
+
+EXPORT_BUILD_LOCK_TIMEOUT = 60
 
 
 def get_decks():
@@ -14,7 +22,16 @@ def get_decks():
     return (
         Deck.objects.all()
         .select_related("author")
-        .only("id", "title", "created_at", "updated_at", "author__username")
+        .only(
+            "id",
+            "title",
+            "created_at",
+            "updated_at",
+            "card_count",
+            "saved_count",
+            "learner_count",
+            "author__username",
+        )
     )
 
 
@@ -58,22 +75,39 @@ def get_decks_created_or_saved_by_user(user):
     Возвращает queryset колод,
     которые созданы или сохранены пользователем.
     """
-    decks = get_decks().filter(Q(author=user) | Q(saved_by=user)).distinct()
+    decks = get_decks().filter(
+        Q(author=user)
+        | Exists(Deck.saved_by.through.objects.filter(deck=OuterRef("pk"), user=user))
+    )
     return decks
 
 
-def get_user_decks_with_saved_status(user, current_user):
+def attach_statuses(decks, user=None, learner=None):
     """
-    Возвращает колоды созданные или сохраненные пользователем с флагом,
-    который указывает сохранена ли карточка текущим пользователем.
+    Отмечает уже выбранные колоды (например, страницу списка) флагами
+    is_saved — сохранена пользователем user, и in_study — изучается
+    пользователем learner. Каждый флаг — один запрос по id колод
+    вместо подзапроса на каждую строку. Возвращает decks.
     """
-    user_decks = get_decks_created_or_saved_by_user(user=user)
+    deck_ids = [deck.pk for deck in decks]
+
+    if user is not None:
+        saved_ids = set(
+            Deck.saved_by.through.objects.filter(
+                user=user, deck_id__in=deck_ids
+            ).values_list("deck_id", flat=True)
+        )
+        for deck in decks:
+            deck.is_saved = deck.pk in saved_ids
 
-    if current_user is not None:
-        return user_decks.annotate(
-            is_saved=Exists(current_user.saved_decks.filter(pk=OuterRef("pk")))
+    if learner is not None:
+        studying_ids = set(
+            repetition_services.get_studying_decks_ids(user=learner, deck_ids=deck_ids)
         )
-    return user_decks
+        for deck in decks:
+            deck.in_study = deck.pk in studying_ids
+
+    return decks
 
 
 def get_deck_created_or_saved_by_user(deck_id, user):
@@ -81,32 +115,11 @@ def get_deck_created_or_saved_by_user(deck_id, user):
     Возвращает колоду если она создана или сохранена пользоватем.
     Иначе вернет 404.
     """
-    deck = get_object_or_404(
-        get_decks().filter(Q(author=user) | Q(saved_by=user)).distinct(), pk=deck_id
-    )
+    deck = get_object_or_404(get_decks_created_or_saved_by_user(user=user), pk=deck_id)
 
     return deck
 
 
-def get_deck_cards_with_saved_status(deck, user=None):
-    """
-    Возвращает карточки из колоды с флагом,
-    который указывает сохранена ли карточка пользователем.
-    """
-    cards = (
-        deck.cards.all()
-        .select_related("author")
-        .only("id", "question", "answer", "author__username")
-    )
-
-    if user is not None:
-        return cards.annotate(
-            is_saved=Exists(user.saved_cards.filter(pk=OuterRef("pk")))
-        )
-
-    return cards
-
-
 def get_deck_cards(deck):
     """
     Возвращает все карточки из колоды.
@@ -114,7 +127,7 @@ def get_deck_cards(deck):
     cards = (
         deck.cards.all()
         .select_related("author")
-        .only("id", "question", "answer", "author__username")
+        .only("id", "question", "answer_excerpt", "created_at", "author__username")
     )
 
     return cards
@@ -122,15 +135,21 @@ def get_deck_cards(deck):
 
 def filter_sort_decks(decks, query, sort_by):
     """
-    Фильтрует, сортирует, пагинирует колоды. Возвращает page_obj.
+    Фильтрует и сортирует колоды.
+    Поиск по названию находит вхождения и похожие слова (с опечатками),
+    без явной сортировки результаты упорядочены по похожести.
     """
     if query:
-        decks = decks.filter(title__icontains=query)
+        decks = trigram_search(decks, query, "title")
 
     if sort_by == "newest":
         decks = decks.order_by("-created_at")
     elif sort_by == "oldest":
         decks = decks.order_by("created_at")
+    elif sort_by == "popular":
+        decks = decks.order_by("-saved_count", "-created_at")
+    elif query:
+        decks = decks.order_by("-rank", "-created_at")
 
     return decks
 
@@ -162,7 +181,7 @@ def update_deck(deck, **kwargs):
 
     for key, value in kwargs.items():
         setattr(deck, key, value)
-    deck.save()
+    counters.save_without_counters(deck, update_fields=kwargs)
 
     deck.cards.set(cards)
 
@@ -170,9 +189,12 @@ def update_deck(deck, **kwargs):
 
 
 def delete_deck(deck):
-    """Удаляет колоду."""
+    """Удаляет колоду и уменьшает счетчики колод ее карточек."""
     author = deck.author
-    deck.delete()
+
+    with transaction.atomic():
+        counters.change_counter(Card, "deck_count", deck.cards.values("pk"), -1)
+        deck.delete()
     cache.delete(f"decks_stats:user:{author.pk}")
     cache.delete(f"cards_stats:user:{author.pk}")
 
@@ -199,45 +221,51 @@ def toggle_deck_save_by_user(deck, user):
 
 def toggle_deck_study_by_user(deck, user):
     """Переключает состояние изучения колоды пользователем."""
-    deck_progress = repetition_services.get_user_deck_progress(deck, user)
-
-    if deck_progress.exists():
-        deck_progress.delete()
+    if repetition_services.is_deck_studied_by_user(deck, user):
+        repetition_services.unenroll_user_from_deck(deck, user)
         cache.delete(f"decks_stats:user:{user.pk}")
         cache.delete(f"cards_stats:user:{user.pk}")
         return False, f"Сброшен весь прогресс по колоде {deck.title}"
     else:
-        repetition_services.create_deck_progress_for_user(deck, user)
+        repetition_services.enroll_user_in_deck(deck, user)
         cache.delete(f"decks_stats:user:{user.pk}")
         cache.delete(f"cards_stats:user:{user.pk}")
         return True, f"Вы изучаете колоду {deck.title}"
 
 
-def _generate_cards_data_for_export(cards):
+def prepare_deck_for_export(deck, compression=None):
     """
-    Возвращает генератор, который
-    формирует данные карточки для экспорта в txt формат.
+    Подготавливает колоду к экспорту.
+    Возвращает кортеж (filename, content_type, etag, content): content —
+    открытый бинарный файл готового экспорта или, если его еще нет,
+    генератор, который читает карточки из базы данных (тогда файл
+    собирает задача celery). Ни то, ни другое не читается до отправки
+    ответа, файл закрывает вызывающий код. Файл открывается без
+    предварительной проверки, так как его может удалить или заменить
+    параллельная сборка. Вызывает ValueError, если сжатие не поддерживается.
     """
-    for card in cards.iterator(chunk_size=1000):
-        yield (
-            f"#author_id: {card.author_id}\n"
-            f"#card_id: {card.id}\n"
-            f"{card.question}\t{card.answer}\n"
-            "\n"
-        )
+    if compression not in exporting.COMPRESSION_SUFFIXES:
+        raise ValueError(f"Неизвестное сжатие: {compression}")
 
+    etag = exporting.get_export_etag(deck)
+    path = exporting.get_export_path(deck.pk, etag, compression)
 
-def prepare_deck_for_export(deck):
-    """
-    Подготовливает колоду к экспорту.
-    Возвращает кортеж (filename, cards_generator).
-    """
-    cards = get_deck_cards(deck)
+    filename, content_type, chunks = export_cards(
+        deck.cards.all(), filename=deck.title, compression=compression
+    )
+
+    if compression is not None:
+        etag = f"{etag}-{compression}"
+
+    try:
+        return filename, content_type, etag, path.open("rb")
+    except OSError:
+        pass
 
-    filename = f"{deck.title}.txt"
-    cards_generator = _generate_cards_data_for_export(cards=cards)
+    if cache.add(f"deck_export_build:deck:{deck.pk}", 1, EXPORT_BUILD_LOCK_TIMEOUT):
+        build_deck_exports_task.delay(deck_ids=[deck.pk])
 
-    return filename, cards_generator
+    return filename, content_type, etag, chunks
 
 
 def get_decks_stats(user):
@@ -251,9 +279,7 @@ def get_decks_stats(user):
             total=Count("id", distinct=True),
             created=Count("id", filter=Q(author=user), distinct=True),
             saved=Count("id", filter=Q(saved_by=user), distinct=True),
-            in_study=Count(
-                "id", filter=Q(card_progresses__learner=user), distinct=True
-            ),
+            in_study=Count("id", filter=Q(enrollments__learner=user), distinct=True),
         )
         cache.set(cache_key, stats, 60 * 5)
 
@@ -0,0 +1,131 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from cards.models import Card
+from core.transactions import batch_on_commit
+
+from . import counters, exporting
+from .models import Deck
+from .tasks import build_deck_exports_task
+
+# Связь: (модель, поле связи, счетчик модели, счетчик связанной модели).
+LINKS = {
+    Deck.cards.through: (Deck, "cards", "card_count", "deck_count"),
+    Deck.saved_by.through: (Deck, "saved_by", "saved_count", None),
+    Card.saved_by.through: (Card, "saved_by", "saved_count", None),
+}
+
+
+def _get_links(sender, field, instance, reverse, pk_set=None):
+    """
+    Возвращает существующие пары (id модели, id связанной модели)
+    для instance, ограниченные pk_set, если он указан.
+    """
+    source, target = field.m2m_column_name(), field.m2m_reverse_name()
+    instance_column, other_column = (target, source) if reverse else (source, target)
+
+    links = sender.objects.filter(**{instance_column: instance.pk})
+    if pk_set is not None:
+        links = links.filter(**{f"{other_column}__in": pk_set})
+
+    return list(links.values_list(source, target))
+
+
+def _change_counters(sender, links, sign):
+    model, field_name, counter, related_counter = LINKS[sender]
+    field = model._meta.get_field(field_name)
+
+    sources = Counter(source for source, _ in links)
+    counters.change_counters(
+        model, counter, {pk: sign * count for pk, count in sources.items()}
+    )
+
+    if related_counter is not None:
+        targets = Counter(target for _, target in links)
+        counters.change_counters(
+            field.related_model,
+            related_counter,
+            {pk: sign * count for pk, count in targets.items()},
+        )
+
+
+@receiver(m2m_changed, sender=Deck.cards.through)
+@receiver(m2m_changed, sender=Deck.saved_by.through)
+@receiver(m2m_changed, sender=Card.saved_by.through)
+def change_counters_on_links_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """
+    Изменяет счетчики при добавлении и удалении связей.
+    Для удаления пары, которые действительно существуют,
+    запоминаются до удаления.
+    """
+    model, field_name, _, _ = LINKS[sender]
+    field = model._meta.get_field(field_name)
+
+    if action == "post_add" and pk_set:
+        links = [(pk, instance.pk) if reverse else (instance.pk, pk) for pk in pk_set]
+        _change_counters(sender, links, 1)
+    elif action in ("pre_remove", "pre_clear"):
+        instance._removed_links = _get_links(
+            sender, field, instance, reverse, pk_set if action == "pre_remove" else None
+        )
+    elif action in ("post_remove", "post_clear"):
+        _change_counters(sender, instance.__dict__.pop("_removed_links", []), -1)
+
+
+def _schedule_exports_build(deck_ids):
+    """
+    Накапливает id измененных колод, которые уже экспортировали,
+    и после фиксации транзакции ставит одну задачу пересборки экспорта.
+    """
+    deck_ids = exporting.get_exported_deck_ids(deck_ids)
+    if not deck_ids:
+        return
+
+    batch_on_commit(
+        transaction.get_connection(),
+        "_pending_exports_build",
+        _build_exports,
+        deck_ids=deck_ids,
+    )
+
+
+def _build_exports(deck_ids):
+    build_deck_exports_task.delay(deck_ids=sorted(deck_ids))
+
+
+@receiver(post_save, sender=Deck)
+def build_exports_on_deck_change(sender, instance, created, **kwargs):
+    """Пересобирает экспорт колоды после ее изменения."""
+    if not created:
+        _schedule_exports_build([instance.pk])
+
+
+@receiver(post_save, sender=Card)
+def build_exports_on_card_change(sender, instance, created, **kwargs):
+    """Пересобирает экспорт колод с карточкой после ее изменения."""
+    if not created:
+        _schedule_exports_build(instance.decks.values_list("pk", flat=True))
+
+
+@receiver(m2m_changed, sender=Deck.cards.through)
+def build_exports_on_cards_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Пересобирает экспорт колод после изменения их карточек."""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        _schedule_exports_build([instance.pk])
+    elif pk_set:
+        _schedule_exports_build(pk_set)
+
+
+@receiver(post_delete, sender=Deck)
+def delete_exports_on_deck_delete(sender, instance, **kwargs):
+    """Удаляет файлы экспорта колоды после ее удаления."""
+    deck_id = instance.pk
+    transaction.on_commit(lambda: exporting.delete_exports(deck_id))
@@ -0,0 +1,148 @@
+const cardPicker = document.querySelector("[data-js-card-picker]");
+
+if (cardPicker) {
+  const choicesUrl = cardPicker.dataset.choicesUrl;
+  const fieldName = cardPicker.dataset.fieldName;
+
+  const input = cardPicker.querySelector("[data-js-card-picker-input]");
+  const results = cardPicker.querySelector("[data-js-card-picker-results]");
+  const moreButton = cardPicker.querySelector("[data-js-card-picker-more]");
+  const selected = cardPicker.querySelector("[data-js-card-picker-selected]");
+
+  const SEARCH_DELAY = 300;
+
+  let searchTimeout = null;
+  let nextUrl = null;
+  let controller = null;
+
+  input.addEventListener("input", () => {
+    clearTimeout(searchTimeout);
+    searchTimeout = setTimeout(() => {
+      loadChoices(getChoicesUrl(input.value.trim()), { append: false });
+    }, SEARCH_DELAY);
+  });
+
+  // Без запроса показывает последние карточки пользователя
+  input.addEventListener("focus", () => {
+    if (!results.children.length && !input.value.trim()) {
+      loadChoices(getChoicesUrl(""), { append: false });
+    }
+  });
+
+  // Enter в поле поиска не отправляет форму
+  input.addEventListener("keydown", (e) => {
+    if (e.key === "Enter") {
+      e.preventDefault();
+    }
+  });
+
+  moreButton.addEventListener("click", () => {
+    if (nextUrl) {
+      loadChoices(nextUrl, { append: true });
+    }
+  });
+
+  results.addEventListener("click", (e) => {
+    const item = e.target.closest("[data-card-id]");
+    if (!item || isSelected(item.dataset.cardId)) {
+      return;
+    }
+
+    selected.appendChild(createSelectedItem(item.dataset.cardId, item.textContent));
+    item.classList.add("text-gray-400");
+  });
+
+  selected.addEventListener("click", (e) => {
+    const button = e.target.closest("[data-js-card-picker-remove]");
+    if (!button) {
+      return;
+    }
+
+    const cardId = button.closest("[data-card-id]").dataset.cardId;
+    button.closest("[data-card-id]").remove();
+    results
+      .querySelector(`[data-card-id="${cardId}"]`)
+      ?.classList.remove("text-gray-400");
+  });
+
+  async function loadChoices(url, { append }) {
+    controller?.abort();
+    controller = new AbortController();
+
+    try {
+      const response = await fetch(url, { signal: controller.signal });
+
+      if (!response.ok) {
+        throw new Error(`Ошибка сервера: ${response.status}`);
+      }
+
+      const data = await response.json();
+
+      if (!append) {
+        results.replaceChildren();
+      }
+      for (const card of data.results) {
+        results.appendChild(createResultItem(card));
+      }
+
+      results.hidden = !results.children.length;
+      nextUrl = data.next;
+      moreButton.hidden = !nextUrl;
+    } catch (error) {
+      if (error.name === "AbortError") {
+        return;
+      }
+      console.error(error);
+      showNotification("Не удалось загрузить карточки. Попробуйте снова.");
+    }
+  }
+
+  // Пустой cursor включает пагинацию по ключу, если список без поиска
+  // упорядочен по дате: страницы "Показать еще" не используют OFFSET и COUNT
+  function getChoicesUrl(query) {
+    const url = new URL(choicesUrl, window.location.origin);
+    if (query) {
+      url.searchParams.set("query", query);
+    }
+    url.searchParams.set("cursor", "");
+    return url;
+  }
+
+  function isSelected(cardId) {
+    return Boolean(selected.querySelector(`[data-card-id="${cardId}"]`));
+  }
+
+  function createResultItem(card) {
+    const item = document.createElement("li");
+    item.dataset.cardId = card.id;
+    item.className =
+      "py-1 px-2 hover:bg-gray-100 hover:text-blue-600 active:text-blue-600 font-medium cursor-pointer";
+    item.classList.toggle("text-gray-400", isSelected(card.id));
+    item.textContent = card.label;
+    return item;
+  }
+
+  function createSelectedItem(cardId, label) {
+    const item = document.createElement("li");
+    item.dataset.cardId = cardId;
+    item.className = "flex justify-between items-center gap-2 py-1 px-2 font-medium";
+
+    const hiddenInput = document.createElement("input");
+    hiddenInput.type = "hidden";
+    hiddenInput.name = fieldName;
+    hiddenInput.value = cardId;
+
+    const text = document.createElement("span");
+    text.textContent = label;
+
+    const removeButton = document.createElement("button");
+    removeButton.type = "button";
+    removeButton.dataset.jsCardPickerRemove = "";
+    removeButton.className = "text-red-800 cursor-pointer";
+    removeButton.setAttribute("aria-label", "Убрать карточку");
+    removeButton.innerHTML = "&times;";
+
+    item.append(hiddenInput, text, removeButton);
+    return item;
+  }
+}
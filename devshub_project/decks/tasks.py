@@ -0,0 +1,17 @@
+from celery import shared_task
+
+from . import exporting
+from .models import Deck
+
+
+@shared_task
+def build_deck_exports_task(deck_ids):
+    """
+    Асинхронная задача, которая пересобирает
+    файлы экспорта колод после их изменения.
+    """
+    for deck in Deck.objects.filter(pk__in=deck_ids).only("id", "title", "updated_at"):
+        try:
+            exporting.build_export(deck)
+        except Deck.DoesNotExist:
+            exporting.delete_exports(deck.pk)
@@ -4,10 +4,8 @@ register = template.Library()
 
 
 @register.inclusion_tag("components/deck_card.html")
-def render_deck(deck, user, is_owner=False, studying_decks_ids=None):
+def render_deck(deck, user, is_owner=False):
     is_author = deck.author == user
-    if studying_decks_ids:
-        deck.is_studying = deck.id in set(studying_decks_ids)
     return {
         "deck": deck,
         "is_author": is_author,
@@ -16,10 +14,8 @@ def render_deck(deck, user, is_owner=False, studying_decks_ids=None):
 
 
 @register.inclusion_tag("components/deck_table.html")
-def render_deck_as_table(deck, user, is_owner=False, studying_decks_ids=None):
+def render_deck_as_table(deck, user, is_owner=False):
     is_author = deck.author == user
-    if studying_decks_ids:
-        deck.is_studying = deck.id in set(studying_decks_ids)
     return {
         "deck": deck,
         "is_author": is_author,
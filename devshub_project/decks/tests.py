@@ -1,10 +1,22 @@
+import gzip
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib import admin
+from django.core.cache import cache
 from django.http import Http404
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
+from cards import services as card_services
 from cards.models import Card
+from core.admin import CountersModelAdmin
 from users import services as user_services
 
-from . import services
+from . import counters, exporting, services
+from .forms import DeckForm
+from .models import Deck
 
 
 class DeckTest(TestCase):
@@ -96,6 +108,28 @@ class DeckTest(TestCase):
         self.assertEqual(is_study, False)
         self.assertEqual(message, f"Сброшен весь прогресс по колоде {deck.title}")
 
+    def test_attach_statuses(self):
+        test_user = user_services.create_user("test_user", "password123")
+        saved, studied = [
+            services.create_deck(author=test_user, title=title, cards=self.cards)
+            for title in ["saved", "studied"]
+        ]
+        services.toggle_deck_save_by_user(
+            deck=services.get_deck_with_saved_status(deck_id=saved.pk, user=self.user),
+            user=self.user,
+        )
+        services.toggle_deck_study_by_user(deck=studied, user=test_user)
+
+        decks = list(services.get_decks())
+
+        with self.assertNumQueries(2):
+            services.attach_statuses(decks=decks, user=self.user, learner=test_user)
+
+        self.assertEqual(
+            {deck.title: (deck.is_saved, deck.in_study) for deck in decks},
+            {"saved": (True, False), "studied": (False, True)},
+        )
+
     def test_toggle_study_unsaved_deck(self):
         test_user = user_services.create_user("test_user", "password123")
 
@@ -107,3 +141,389 @@ class DeckTest(TestCase):
 
         with self.assertRaises(Http404):
             services.get_deck_created_or_saved_by_user(deck_id=1, user=self.user)
+
+    def test_search_decks(self):
+        for title in ["Циклы в Python", "Python для начинающих", "Основы Django"]:
+            services.create_deck(author=self.user, title=title, cards=self.cards)
+
+        def search(query):
+            decks = services.filter_sort_decks(
+                decks=services.get_decks(), query=query, sort_by=""
+            )
+            return [deck.title for deck in decks]
+
+        self.assertEqual(
+            set(search("python")), {"Циклы в Python", "Python для начинающих"}
+        )
+        self.assertEqual(search("циклы"), ["Циклы в Python"])
+        self.assertEqual(search("djnago основы"), ["Основы Django"])
+        self.assertEqual(search("начинающих python")[0], "Python для начинающих")
+
+
+class DeckCountersTest(TestCase):
+    def setUp(self):
+        self.user = user_services.create_user("user", "password123")
+        self.other_user = user_services.create_user("other_user", "password123")
+        self.cards = Card.objects.bulk_create(
+            Card(author=self.user, question=f"question {i}", answer="answer")
+            for i in range(3)
+        )
+
+    def assertCounts(self, deck, card_count, saved_count, learner_count):
+        deck.refresh_from_db()
+        self.assertEqual(
+            (deck.card_count, deck.saved_count, deck.learner_count),
+            (card_count, saved_count, learner_count),
+        )
+
+    def assertCardCounts(self, saved_counts, deck_counts):
+        cards = Card.objects.order_by("pk")
+        self.assertEqual([card.saved_count for card in cards], saved_counts)
+        self.assertEqual([card.deck_count for card in cards], deck_counts)
+
+    def test_cards_counters(self):
+        deck = services.create_deck(author=self.user, title="deck", cards=self.cards)
+        other_deck = services.create_deck(
+            author=self.user, title="other deck", cards=self.cards[:1]
+        )
+        self.assertCounts(deck, 3, 0, 0)
+        self.assertCardCounts([0, 0, 0], [2, 1, 1])
+
+        services.update_deck(deck, title="deck", cards=self.cards[1:] + self.cards[1:])
+        self.assertCounts(deck, 2, 0, 0)
+        self.assertCardCounts([0, 0, 0], [1, 1, 1])
+
+        self.cards[1].decks.remove(deck, other_deck)
+        self.assertCounts(deck, 1, 0, 0)
+        self.assertCardCounts([0, 0, 0], [1, 0, 1])
+
+        deck.cards.clear()
+        self.assertCounts(deck, 0, 0, 0)
+        self.assertCardCounts([0, 0, 0], [1, 0, 0])
+
+        card_services.delete_card(self.cards[0])
+        self.assertCounts(other_deck, 0, 0, 0)
+
+        deck.cards.add(self.cards[2])
+        services.delete_deck(deck)
+        self.assertCardCounts([0, 0], [0, 0])
+
+    def test_updates_keep_counters(self):
+        deck = services.create_deck(author=self.user, title="deck", cards=self.cards)
+        card = card_services.get_card_with_saved_status(self.cards[0].pk)
+        self.other_user.saved_cards.add(card)
+
+        services.update_deck(deck, title="new title", cards=self.cards[1:])
+        card_services.update_card(card, question="new question")
+
+        self.assertCounts(deck, 2, 0, 0)
+        self.assertEqual(deck.title, "new title")
+        self.assertCardCounts([1, 0, 0], [0, 1, 1])
+
+        # Ответ отложен, как в API, и не загружается при сохранении:
+        # UPDATE и выбор колод карточки для пересборки экспорта.
+        card = card_services.get_cards().get(pk=card.pk)
+        with self.assertNumQueries(2):
+            card_services.update_card(card, question="other question")
+
+        for model, obj in [(Deck, deck), (Card, card)]:
+            model_admin = CountersModelAdmin(model, admin.site)
+            model_admin.save_model(request=None, obj=obj, form=None, change=True)
+
+        self.assertCounts(deck, 2, 0, 0)
+        self.assertCardCounts([1, 0, 0], [0, 1, 1])
+
+    def test_saved_and_learner_counters(self):
+        deck = services.create_deck(author=self.user, title="deck", cards=self.cards)
+
+        deck = services.get_deck_with_saved_status(deck.pk, user=self.other_user)
+        services.toggle_deck_save_by_user(deck=deck, user=self.other_user)
+        services.toggle_deck_study_by_user(deck=deck, user=self.other_user)
+        services.toggle_deck_study_by_user(deck=deck, user=self.user)
+        self.assertCounts(deck, 3, 1, 2)
+
+        card = card_services.get_card_with_saved_status(
+            self.cards[0].pk, user=self.other_user
+        )
+        card_services.toggle_card_save_by_user(card=card, user=self.other_user)
+        self.assertCardCounts([1, 0, 0], [1, 1, 1])
+
+        deck = services.get_deck_with_saved_status(deck.pk, user=self.other_user)
+        services.toggle_deck_save_by_user(deck=deck, user=self.other_user)
+        services.toggle_deck_study_by_user(deck=deck, user=self.other_user)
+        self.other_user.saved_cards.clear()
+        self.assertCounts(deck, 3, 0, 1)
+        self.assertCardCounts([0, 0, 0], [1, 1, 1])
+
+    def test_popular_sort(self):
+        decks = [
+            services.create_deck(author=self.user, title=f"deck {i}", cards=self.cards)
+            for i in range(3)
+        ]
+        self.other_user.saved_decks.add(decks[1])
+        self.other_user.saved_cards.add(self.cards[2])
+
+        decks = services.filter_sort_decks(services.get_decks(), "", "popular")
+        self.assertEqual([deck.title for deck in decks], ["deck 1", "deck 2", "deck 0"])
+
+        cards = card_services.filter_sort_cards(
+            card_services.get_cards(), "", "popular"
+        )
+        self.assertEqual(cards[0], self.cards[2])
+
+    def test_repair_counters(self):
+        deck = services.create_deck(author=self.user, title="deck", cards=self.cards)
+        self.other_user.saved_decks.add(deck)
+        Deck.objects.update(card_count=10, saved_count=0)
+        Card.objects.update(deck_count=0)
+
+        repaired = counters.repair_counters(batch_size=2)
+
+        self.assertEqual(repaired["Deck.card_count"], 1)
+        self.assertEqual(repaired["Deck.saved_count"], 1)
+        self.assertEqual(repaired["Card.deck_count"], 3)
+        self.assertEqual(repaired["Card.saved_count"], 0)
+        self.assertCounts(deck, 3, 1, 0)
+        self.assertCardCounts([0, 0, 0], [1, 1, 1])
+
+
+class DeckCardsApiTest(TestCase):
+    def setUp(self):
+        self.user = user_services.create_user("user", "password123")
+        cards = Card.objects.bulk_create(
+            Card(author=self.user, question=f"question {i}", answer="answer")
+            for i in range(25)
+        )
+        self.deck = services.create_deck(author=self.user, title="deck", cards=cards)
+        self.user.saved_cards.add(cards[0])
+        self.client.force_login(self.user)
+
+    def test_detail_returns_first_page_of_cards(self):
+        response = self.client.get(reverse("deck-detail", args=[self.deck.pk]))
+
+        cards = response.json()["cards"]
+        self.assertEqual(cards["count"], 25)
+        self.assertEqual(len(cards["results"]), 20)
+        self.assertIsNotNone(cards["next"])
+
+        response = self.client.get(cards["next"])
+
+        results = response.json()["results"]
+        self.assertEqual(len(results), 5)
+        self.assertIsNone(response.json()["next"])
+        self.assertEqual(results[-1]["question"], "question 0")
+        self.assertTrue(results[-1]["is_saved"])
+
+    def test_sparse_fieldsets(self):
+        url = reverse("deck-detail", args=[self.deck.pk])
+
+        # Пользователь сессии и колода, карточки не запрашиваются.
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {"fields": "id,title"})
+        self.assertEqual(response.json(), {"id": self.deck.pk, "title": "deck"})
+
+        response = self.client.get(url, {"omit": "cards,author"})
+        self.assertNotIn("cards", response.json())
+        self.assertIn("is_saved", response.json())
+
+        response = self.client.get(
+            reverse("deck-cards", args=[self.deck.pk]), {"fields": "id,is_saved"}
+        )
+        self.assertEqual(set(response.json()["results"][0]), {"id", "is_saved"})
+
+
+class DeckFormCardPickerTest(TestCase):
+    def setUp(self):
+        self.user = user_services.create_user("user", "password123")
+        self.other_user = user_services.create_user("other_user", "password123")
+        self.cards = Card.objects.bulk_create(
+            Card(author=self.user, question=f"<p>question {i}</p>", answer="answer")
+            for i in range(30)
+        )
+        self.other_card = Card.objects.create(
+            author=self.other_user, question="other question", answer="answer"
+        )
+        self.client.force_login(self.user)
+
+    def test_form_validates_submitted_cards(self):
+        self.user.saved_cards.add(self.other_card)
+        data = {"title": "deck", "cards": [self.cards[0].pk, self.other_card.pk]}
+
+        form = DeckForm(data, user=self.user)
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid())
+        self.assertEqual(
+            set(form.cleaned_data["cards"]), {self.cards[0], self.other_card}
+        )
+
+        self.user.saved_cards.clear()
+        form = DeckForm(data, user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertIn("cards", form.errors)
+
+    def test_edit_page_renders_only_selected_cards(self):
+        deck = services.create_deck(
+            author=self.user, title="deck", cards=self.cards[:2]
+        )
+
+        response = self.client.get(reverse("deck_update", args=[deck.pk]))
+
+        self.assertContains(response, 'type="hidden" name="cards"', count=2)
+        self.assertContains(response, "question 1")
+        self.assertNotContains(response, "question 2")
+
+        response = self.client.post(
+            reverse("deck_update", args=[deck.pk]),
+            {"title": "deck", "cards": [self.cards[2].pk]},
+        )
+
+        self.assertRedirects(response, deck.get_absolute_url())
+        self.assertEqual(list(deck.cards.all()), [self.cards[2]])
+
+    def test_card_choices(self):
+        url = reverse("card-choices")
+
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()["results"]), 20)
+        self.assertIsNotNone(response.json()["next"])
+
+        response = self.client.get(url, {"query": "quest"})
+        results = response.json()["results"]
+        self.assertEqual(len(results), 20)
+        self.assertTrue(results[0]["label"].startswith("question"))
+
+        response = self.client.get(url, {"query": "other"})
+        self.assertEqual(response.json()["results"], [])
+
+        # Так запрашивает страницы выбор карточек в форме колоды
+        response = self.client.get(url, {"cursor": ""})
+        self.assertNotIn("count", response.json())
+        card_ids = [card["id"] for card in response.json()["results"]]
+
+        # Пользователь сессии и страница карточек, без COUNT
+        with self.assertNumQueries(2):
+            response = self.client.get(response.json()["next"])
+        card_ids += [card["id"] for card in response.json()["results"]]
+        self.assertEqual(len(card_ids), len(set(card_ids)))
+
+        response = self.client.get(url, {"query": "quest", "cursor": ""})
+        self.assertEqual(len(response.json()["results"]), 20)
+
+
+class DeckExportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        exports_root = tempfile.TemporaryDirectory()
+        self.addCleanup(exports_root.cleanup)
+        settings_override = override_settings(DECK_EXPORTS_ROOT=exports_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = user_services.create_user("user", "password123")
+        self.cards = [
+            card_services.create_card(
+                author=self.user, question=f"question {i}", answer=f"answer {i}"
+            )
+            for i in range(3)
+        ]
+        self.deck = services.create_deck(
+            author=self.user, title="deck", cards=self.cards[:2]
+        )
+        self.url = reverse("deck-export", args=[self.deck.pk])
+        self.client.force_login(self.user)
+
+    def test_export_is_built_and_served_from_file(self):
+        with mock.patch("decks.services.build_deck_exports_task.delay") as delay:
+            response = self.client.get(self.url)
+            self.client.get(self.url)
+
+        delay.assert_called_once_with(deck_ids=[self.deck.pk])
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("question 1\tanswer 1", content)
+
+        etag = exporting.build_export(self.deck)
+        self.assertEqual(response["ETag"], f'"{etag}"')
+
+        response = self.client.get(self.url)
+        self.assertEqual(b"".join(response.streaming_content).decode(), content)
+        self.assertEqual(response["Content-Length"], str(len(content.encode())))
+
+        response = self.client.get(self.url, {"compression": "gzip"})
+        self.assertEqual(response["ETag"], f'"{etag}-gzip"')
+        self.assertEqual(
+            gzip.decompress(b"".join(response.streaming_content)).decode(), content
+        )
+
+    def test_export_falls_back_to_streaming_when_file_is_gone(self):
+        exporting.build_export(self.deck)
+
+        with (
+            mock.patch.object(Path, "open", side_effect=FileNotFoundError),
+            mock.patch("decks.services.build_deck_exports_task.delay") as delay,
+        ):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("question 1\tanswer 1", content)
+        delay.assert_called_once_with(deck_ids=[self.deck.pk])
+
+    def test_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        card_services.update_card(self.cards[0], answer="new answer")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_depends_on_card_ids(self):
+        card = card_services.create_card(
+            author=self.user, question="question 3", answer="answer 3"
+        )
+        cards = self.cards + [card]
+        Card.objects.filter(pk__in=[card.pk for card in cards]).update(
+            updated_at=self.deck.updated_at
+        )
+
+        # Одинаковые количество, сумма id и даты изменения карточек
+        self.deck.cards.set([cards[0], cards[3]])
+        etag = exporting.get_export_etag(self.deck)
+        self.deck.cards.set([cards[1], cards[2]])
+
+        self.assertNotEqual(exporting.get_export_etag(self.deck), etag)
+
+    def test_changes_rebuild_exported_decks(self):
+        other_deck = services.create_deck(
+            author=self.user, title="other deck", cards=self.cards[2:]
+        )
+        etag = exporting.build_export(self.deck)
+
+        with (
+            mock.patch("decks.signals.build_deck_exports_task.delay") as delay,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            services.update_deck(self.deck, title="deck", cards=self.cards[1:])
+            card_services.update_card(self.cards[2], answer="new answer")
+            other_deck.cards.add(self.cards[0])
+
+        delay.assert_called_once_with(deck_ids=[self.deck.pk])
+
+        new_etag = exporting.build_export(self.deck)
+        self.assertNotEqual(new_etag, etag)
+        export_dir = exporting.get_export_dir(self.deck.pk)
+        self.assertEqual(
+            sorted(path.name for path in export_dir.iterdir()),
+            [f"{new_etag}.txt", f"{new_etag}.txt.gz"],
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            services.delete_deck(self.deck)
+        self.assertFalse(export_dir.exists())
+
+    def test_unknown_compression(self):
+        response = self.client.get(self.url, {"compression": "rar"})
+        self.assertEqual(response.status_code, 400)
@@ -1,8 +1,8 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import redirect, render
 
 from cards import services as card_services
+from core.pagination import paginate
 
 from . import services
 from .forms import DeckForm
@@ -13,16 +13,15 @@ def deck_list(request):
 
     query = request.GET.get("query", "")
     sort_by = request.GET.get("sort_by", "")
-    page_number = request.GET.get("page", 1)
 
     decks = services.filter_sort_decks(
-        decks=services.get_decks_with_saved_status(user=user),
+        decks=services.get_decks(),
         query=query,
         sort_by=sort_by,
     )
 
-    paginator = Paginator(decks, 20)
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, decks)
+    services.attach_statuses(decks=page_obj, user=user)
 
     context = {
         "decks": page_obj,
@@ -38,18 +37,17 @@ def deck_detail(request, pk):
 
     query = request.GET.get("query", "")
     sort_by = request.GET.get("sort_by", "")
-    page_number = request.GET.get("page", 1)
 
     deck = services.get_deck_with_saved_status(deck_id=pk, user=user)
 
     cards = card_services.filter_sort_cards(
-        cards=services.get_deck_cards_with_saved_status(deck=deck, user=user),
+        cards=services.get_deck_cards(deck=deck),
         query=query,
         sort_by=sort_by,
     )
 
-    paginator = Paginator(cards, 20)
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, cards)
+    card_services.attach_saved_status(cards=page_obj, user=user)
 
     context = {
         "deck": deck,
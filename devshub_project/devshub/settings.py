@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "debug_toolbar",
     "rest_framework",
     "rest_framework_simplejwt",
@@ -147,6 +148,10 @@ STATIC_ROOT = "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Deck exports
+
+DECK_EXPORTS_ROOT = BASE_DIR / "exports"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -191,6 +196,14 @@ CELERY_BEAT_SCHEDULE = {
         "task": "users.tasks.update_codewars_profiles_task",
         "schedule": crontab(hour=3, minute=0),
     },
+    "create_review_log_partitions": {
+        "task": "repetitions.tasks.create_review_log_partitions_task",
+        "schedule": crontab(hour=2, minute=0),
+    },
+    "rollup_review_stats": {
+        "task": "repetitions.tasks.rollup_review_stats_task",
+        "schedule": crontab(minute="*/10"),
+    },
 }
 
 # Cache
@@ -201,6 +214,12 @@ CACHES = {
     }
 }
 
+# Review queue
+REVIEW_QUEUE_ENABLED = config("REVIEW_QUEUE_ENABLED", default=False, cast=bool)
+REVIEW_QUEUE_REDIS_URL = config(
+    "REVIEW_QUEUE_REDIS_URL", default=config("REDIS_LOCATION")
+)
+
 # Session
 SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
 SESSION_CACHE_ALIAS = "default"
@@ -219,7 +238,7 @@ TINYMCE_DEFAULT_CONFIG = {
 
 # Django rest framework
 REST_FRAMEWORK = {
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from core.serializers import SparseFieldsetsMixin
 from projects import services
 from projects.models import Project, ProjectImage
 from users.api.v1.serializers import UserShortSerializer
@@ -11,7 +12,7 @@ class ProjectImageSerializer(serializers.ModelSerializer):
         fields = ["id", "file"]
 
 
-class ProjectListSerializer(serializers.ModelSerializer):
+class ProjectListSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     author = UserShortSerializer(read_only=True)
 
     class Meta:
@@ -28,7 +29,7 @@ class ProjectListSerializer(serializers.ModelSerializer):
         ]
 
 
-class ProjectDetailSerializer(serializers.ModelSerializer):
+class ProjectDetailSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     author = UserShortSerializer(read_only=True)
     images = ProjectImageSerializer(many=True, read_only=True)
 
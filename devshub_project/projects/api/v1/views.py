@@ -11,9 +11,18 @@ from .serializers import (
 
 
 class ProjectViewSet(viewsets.ModelViewSet):
-    queryset = services.get_projects()
     permission_classes = [IsAuthorOrReadOnly]
 
+    def get_queryset(self):
+        if self.action == "list":
+            return services.filter_sort_projects(
+                projects=services.get_projects(),
+                query=self.request.query_params.get("query", ""),
+                sort_by=self.request.query_params.get("sort_by", ""),
+                in_description=bool(self.request.query_params.get("in_description")),
+            )
+        return services.get_projects()
+
     def get_serializer_class(self):
         if self.action == "list":
             return ProjectListSerializer
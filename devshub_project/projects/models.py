@@ -1,12 +1,16 @@
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.urls import reverse
 from tinymce.models import HTMLField
 
+from core.search import StripTags, search_vector_field, trigram_index
+
 
 class Project(models.Model):
     title = models.CharField(max_length=255)
     description = HTMLField()
+    description_html = models.TextField(null=True, editable=False)
     repository_url = models.URLField(max_length=255, blank=True)
     live_url = models.URLField(max_length=255, blank=True)
     author = models.ForeignKey(
@@ -17,12 +21,17 @@ class Project(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_vector = search_vector_field(
+        [("title", "A"), (StripTags("description"), "B")]
+    )
 
     class Meta:
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["title"]),
             models.Index(fields=["-created_at"]),
+            trigram_index("title", name="projects_project_title_trgm"),
+            GinIndex(fields=["search_vector"]),
         ]
 
     def __str__(self):
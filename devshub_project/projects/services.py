@@ -2,30 +2,29 @@ from django.core.cache import cache
 from django.db.models import Count
 from django.shortcuts import get_object_or_404
 
+from core.search import search, trigram_search
 from core.utils import clean_html
 
 from .models import Project, ProjectImage
 
+PROJECT_LIST_FIELDS = [
+    "id",
+    "title",
+    "description",
+    "repository_url",
+    "live_url",
+    "cover_image",
+    "created_at",
+    "updated_at",
+    "author__username",
+]
+
 
 def get_projects():
     """
     Возвращает queryset всех проектов.
     """
-    return (
-        Project.objects.all()
-        .select_related("author")
-        .only(
-            "id",
-            "title",
-            "description",
-            "repository_url",
-            "live_url",
-            "cover_image",
-            "created_at",
-            "updated_at",
-            "author__username",
-        )
-    )
+    return Project.objects.all().select_related("author").only(*PROJECT_LIST_FIELDS)
 
 
 def get_project(project_id):
@@ -38,7 +37,10 @@ def get_project(project_id):
 
     if project is None:
         project = get_object_or_404(
-            get_projects().prefetch_related("images"), pk=project_id
+            get_projects()
+            .only(*PROJECT_LIST_FIELDS, "description_html")
+            .prefetch_related("images"),
+            pk=project_id,
         )
         cache.set(cache_key, project, 60 * 5)
 
@@ -58,15 +60,24 @@ def get_project_created_by_user(project_id, user):
     return get_object_or_404(Project.objects.filter(author=user), pk=project_id)
 
 
-def filter_sort_projects(projects, query, sort_by):
-    """Фильтрует, сортирует, пагинирует проекты. Возвращает page_obj."""
-    if query:
-        projects = projects.filter(title__icontains=query)
+def filter_sort_projects(projects, query, sort_by, in_description=False):
+    """
+    Фильтрует и сортирует проекты.
+    По умолчанию поиск выполняется по названию с учетом опечаток,
+    с in_description — полнотекстово по названию и описанию.
+    Без явной сортировки результаты упорядочены по релевантности.
+    """
+    if query and in_description:
+        projects = search(projects, query)
+    elif query:
+        projects = trigram_search(projects, query, "title")
 
     if sort_by == "newest":
         projects = projects.order_by("-created_at")
     elif sort_by == "oldest":
         projects = projects.order_by("created_at")
+    elif query:
+        projects = projects.order_by("-rank", "-created_at")
 
     return projects
 
@@ -100,9 +111,11 @@ def create_project(author, **kwargs):
     description = kwargs.pop("description")
     images = kwargs.pop("images", None)
 
+    description = clean_html(description)
+
     project = Project.objects.create(
         author=author,
-        description=clean_html(description),
+        description=description,
         **kwargs,
     )
 
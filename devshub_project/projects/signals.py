@@ -0,0 +1,16 @@
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from core.utils import render_html
+
+from .models import Project
+
+
+@receiver(pre_save, sender=Project)
+def render_description_html(sender, instance, update_fields, **kwargs):
+    """
+    Отрисовывает HTML описания для показа при каждом сохранении
+    описания, в том числе из админки.
+    """
+    if update_fields is None or "description" in update_fields:
+        instance.description_html = render_html(instance.description)
@@ -26,6 +26,19 @@ class ProjectTest(TestCase):
         db_project = services.get_projects().first()
         self.assertEqual(project.id, db_project.id)
 
+    def test_description_html_follows_description(self):
+        project = services.create_project(
+            author=self.user,
+            title="test project title",
+            description="<pre><code>x = 1</code></pre>",
+        )
+        self.assertIn('<div class="highlight">', project.description_html)
+
+        project.description = "<p>description</p>"
+        project.save()
+        project.refresh_from_db()
+        self.assertEqual(project.description_html, "<p>description</p>")
+
     def test_create_project_without_author(self):
         with self.assertRaises((IntegrityError)):
             services.create_project(
@@ -33,3 +46,31 @@ class ProjectTest(TestCase):
                 title="test project title",
                 description="test project description",
             )
+
+    def test_search_projects(self):
+        services.create_project(
+            author=self.user,
+            title="Сокращатель ссылок",
+            description="<p>Сервис на <b>FastAPI</b> и Redis</p>",
+        )
+        services.create_project(
+            author=self.user, title="FastAPI шаблон", description="Шаблон проекта"
+        )
+
+        def search(query, in_description=False):
+            projects = services.filter_sort_projects(
+                projects=services.get_projects(),
+                query=query,
+                sort_by="",
+                in_description=in_description,
+            )
+            return [project.title for project in projects]
+
+        self.assertEqual(search("fastapi"), ["FastAPI шаблон"])
+        self.assertEqual(search("fastap шаблн"), ["FastAPI шаблон"])
+        self.assertEqual(search("redis"), [])
+        self.assertEqual(search("redis", in_description=True), ["Сокращатель ссылок"])
+        self.assertEqual(
+            search("fastapi", in_description=True),
+            ["FastAPI шаблон", "Сокращатель ссылок"],
+        )
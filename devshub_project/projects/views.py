@@ -1,7 +1,8 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import redirect, render
 
+from core.pagination import paginate
+
 from . import services
 from .forms import ProjectForm
 
@@ -9,21 +10,22 @@ from .forms import ProjectForm
 def project_list(request):
     query = request.GET.get("query", "")
     sort_by = request.GET.get("sort_by", "")
-    page_number = request.GET.get("page", 1)
+    in_description = bool(request.GET.get("in_description"))
 
     projects = services.filter_sort_projects(
         projects=services.get_projects(),
         query=query,
         sort_by=sort_by,
+        in_description=in_description,
     )
 
-    paginator = Paginator(projects, 20)
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, projects)
 
     context = {
         "projects": page_obj,
         "query": query,
         "sort_by": sort_by,
+        "in_description": in_description,
     }
 
     return render(request, "projects/project_list.html", context)
@@ -1,5 +1,8 @@
 from django.contrib import admin
 
-from .models import DeckProgress
+from .models import DeckEnrollment, DeckProgress, ReviewDailyStats, ReviewLog
 
+admin.site.register(DeckEnrollment)
 admin.site.register(DeckProgress)
+admin.site.register(ReviewLog)
+admin.site.register(ReviewDailyStats)
@@ -0,0 +1,42 @@
+from rest_framework import serializers
+
+from repetitions.models import DeckProgress
+
+
+class GradeSerializer(serializers.Serializer):
+    deck_id = serializers.IntegerField(min_value=1)
+    card_id = serializers.IntegerField(min_value=1)
+    quality = serializers.IntegerField(min_value=0, max_value=5)
+
+
+class SubmitSerializer(serializers.Serializer):
+    quality = serializers.IntegerField(min_value=0, max_value=5, default=0)
+
+
+class SubmitBatchSerializer(serializers.Serializer):
+    grades = GradeSerializer(many=True, allow_empty=False, max_length=200)
+
+
+class ReviewResultSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DeckProgress
+        fields = [
+            "deck_id",
+            "card_id",
+            "next_review_date",
+            "interval",
+            "efactor",
+            "repetitions",
+        ]
+
+
+class ReviewDailyStatsSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    reviews = serializers.IntegerField()
+    correct_reviews = serializers.IntegerField()
+
+
+class DueForecastDaySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    total = serializers.IntegerField()
+    decks = serializers.DictField(child=serializers.IntegerField())
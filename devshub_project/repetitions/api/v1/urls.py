@@ -4,6 +4,17 @@ from . import views
 
 urlpatterns = [
     path("repetitions/review/next_card/", views.NextCard.as_view(), name="next-card"),
+    path("repetitions/review/queue/", views.ReviewQueue.as_view(), name="review-queue"),
+    path(
+        "repetitions/review/forecast/",
+        views.DueForecast.as_view(),
+        name="due-forecast",
+    ),
+    path(
+        "repetitions/review/submit/",
+        views.SubmitBatch.as_view(),
+        name="submit-batch",
+    ),
     path(
         "repetitions/review/<int:deck_id>/<int:card_id>/submit/",
         views.Submit.as_view(),
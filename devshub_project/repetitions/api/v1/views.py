@@ -1,11 +1,19 @@
-import json
-
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from repetitions import services
 
+from .serializers import (
+    DueForecastDaySerializer,
+    ReviewResultSerializer,
+    SubmitBatchSerializer,
+    SubmitSerializer,
+)
+
+REVIEW_QUEUE_DEFAULT_LIMIT = 20
+REVIEW_QUEUE_MAX_LIMIT = 100
+
 
 class NextCard(APIView):
     permission_classes = [IsAuthenticated]
@@ -19,15 +27,47 @@ class NextCard(APIView):
             return Response({"done": True})
 
 
+class ReviewQueue(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", REVIEW_QUEUE_DEFAULT_LIMIT))
+        except ValueError:
+            limit = REVIEW_QUEUE_DEFAULT_LIMIT
+
+        limit = min(max(limit, 1), REVIEW_QUEUE_MAX_LIMIT)
+
+        cards = services.get_cards_for_review(user=request.user, limit=limit)
+
+        return Response({"cards": cards, "done": not cards})
+
+
+class DueForecast(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get("days", services.DUE_FORECAST_DAYS))
+        except ValueError:
+            days = services.DUE_FORECAST_DAYS
+
+        forecast = services.get_due_forecast(user=request.user, days=days)
+
+        return Response(
+            {"forecast": DueForecastDaySerializer(forecast, many=True).data}
+        )
+
+
 class Submit(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, deck_id, card_id):
-        data = request.data
-
-        quality = int(data.get("quality", 0))
+        serializer = SubmitSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quality = serializer.validated_data["quality"]
 
-        card_progress = services.get_deck_card_progress_for_user(
+        card_progress = services.get_or_create_deck_card_progress_for_user(
             deck_id=deck_id,
             card_id=card_id,
             user=request.user,
@@ -45,3 +85,18 @@ class Submit(APIView):
                 "repetitions": progress.repetitions,
             }
         )
+
+
+class SubmitBatch(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = SubmitBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        progresses = services.apply_sm2_batch(
+            user=request.user,
+            grades=serializer.validated_data["grades"],
+        )
+
+        return Response({"results": ReviewResultSerializer(progresses, many=True).data})
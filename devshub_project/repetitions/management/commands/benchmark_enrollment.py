@@ -0,0 +1,126 @@
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from cards.models import Card
+from decks import services as deck_services
+from decks.models import Deck
+from repetitions import services
+from repetitions.models import DeckProgress
+
+User = get_user_model()
+
+ANSWER_SIZE = 2000
+
+
+def legacy_create_deck_progress_for_user(deck, user):
+    """Прежняя реализация: загружает карточки колоды и вызывает bulk_create."""
+    deck_cards = deck_services.get_deck_cards(deck)
+
+    progress = [DeckProgress(learner=user, card=card, deck=deck) for card in deck_cards]
+
+    DeckProgress.objects.bulk_create(progress, ignore_conflicts=True)
+
+
+def insert_select_create_deck_progress_for_user(deck, user):
+    """Прежняя реализация: создает прогресс одним INSERT ... SELECT."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {DeckProgress._meta.db_table}
+                (learner_id, deck_id, card_id, repetitions, efactor, interval,
+                 next_review_date, created_at, updated_at)
+            SELECT %s, deck_id, card_id, 0, 2.5, 0, now(), now(), now()
+            FROM {Deck.cards.through._meta.db_table}
+            WHERE deck_id = %s
+            ON CONFLICT DO NOTHING
+            """,
+            [user.pk, deck.pk],
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает время и пиковое потребление памяти при записи "
+        "пользователя на изучение колоды для текущей и прежних реализаций. "
+        "Все данные создаются в транзакции, которая откатывается."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[1_000, 10_000, 100_000],
+            help="Количество карточек в колоде.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'cards':>8} {'implementation':>15} {'time, s':>10} {'peak, MiB':>10}"
+        )
+
+        for size in options["sizes"]:
+            with transaction.atomic():
+                deck = self._seed_deck(size)
+
+                for name, func in [
+                    ("legacy", legacy_create_deck_progress_for_user),
+                    ("insert-select", insert_select_create_deck_progress_for_user),
+                    ("lazy", services.enroll_user_in_deck),
+                ]:
+                    learner = User.objects.create(
+                        username=f"benchmark_learner_{name}_{size}", password="!"
+                    )
+
+                    elapsed, peak = self._measure(func, deck=deck, user=learner)
+
+                    self.stdout.write(
+                        f"{size:>8} {name:>15} {elapsed:>10.3f} "
+                        f"{peak / 2**20:>10.2f}"
+                    )
+
+                transaction.set_rollback(True)
+
+    def _seed_deck(self, size):
+        author = User.objects.create(username=f"benchmark_author_{size}", password="!")
+        deck = Deck.objects.create(author=author, title=f"benchmark deck {size}")
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {Card._meta.db_table}
+                    (question, answer, author_id, created_at, updated_at)
+                SELECT 'question ' || i, repeat('x', %s), %s, now(), now()
+                FROM generate_series(1, %s) AS i
+                """,
+                [ANSWER_SIZE, author.pk, size],
+            )
+            cursor.execute(
+                f"""
+                INSERT INTO {Deck.cards.through._meta.db_table} (deck_id, card_id)
+                SELECT %s, id FROM {Card._meta.db_table} WHERE author_id = %s
+                """,
+                [deck.pk, author.pk],
+            )
+
+        return deck
+
+    def _measure(self, func, **kwargs):
+        """
+        Возвращает время выполнения и пиковый объем памяти,
+        выделенной Python (tracemalloc).
+        """
+        tracemalloc.start()
+        start = time.perf_counter()
+
+        func(**kwargs)
+
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return elapsed, peak
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from repetitions import review_queue
+from repetitions.models import DeckProgress
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Сверяет очереди карточек для повторения в Redis с базой данных."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            dest="username",
+            help="Проверить очередь только для указанного пользователя.",
+        )
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Перестроить очереди, в которых найдены расхождения.",
+        )
+
+    def handle(self, *args, **options):
+        if not review_queue.is_enabled():
+            raise CommandError("Очередь повторения отключена (REVIEW_QUEUE_ENABLED).")
+
+        if options["username"]:
+            user_ids = User.objects.filter(username=options["username"]).values_list(
+                "pk", flat=True
+            )
+        else:
+            user_ids = (
+                DeckProgress.objects.values_list("learner_id", flat=True)
+                .order_by("learner_id")
+                .distinct()
+            )
+
+        inconsistent = 0
+        for user_id in user_ids.iterator():
+            result = review_queue.check(user_id=user_id)
+
+            if result is None or not any(result.values()):
+                continue
+
+            inconsistent += 1
+            self.stdout.write(
+                f"user {user_id}: "
+                f"missing={len(result['missing'])} "
+                f"extra={len(result['extra'])} "
+                f"stale={len(result['stale'])}"
+            )
+
+            if options["fix"]:
+                review_queue.rebuild(user_id=user_id)
+
+        if inconsistent:
+            self.stdout.write(
+                self.style.WARNING(f"Очередей с расхождениями: {inconsistent}")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("Расхождений не найдено"))
@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from repetitions import review_queue
+from repetitions.models import DeckProgress
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Строит очереди карточек для повторения в Redis из базы данных."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            dest="username",
+            help="Построить очередь только для указанного пользователя.",
+        )
+
+    def handle(self, *args, **options):
+        if not review_queue.is_enabled():
+            raise CommandError("Очередь повторения отключена (REVIEW_QUEUE_ENABLED).")
+
+        if options["username"]:
+            user_ids = User.objects.filter(username=options["username"]).values_list(
+                "pk", flat=True
+            )
+        else:
+            user_ids = (
+                DeckProgress.objects.values_list("learner_id", flat=True)
+                .order_by("learner_id")
+                .distinct()
+            )
+
+        count = 0
+        for user_id in user_ids.iterator():
+            review_queue.rebuild(user_id=user_id)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Построено очередей: {count}"))
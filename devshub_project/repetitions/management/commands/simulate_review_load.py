@@ -0,0 +1,339 @@
+import json
+import random
+import threading
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from cards.models import Card
+from decks.models import Deck
+from repetitions.models import DeckEnrollment, DeckProgress, ReviewLog
+
+User = get_user_model()
+
+
+def percentile(values, percent):
+    """Возвращает перцентиль отсортированного списка методом ближайшего ранга."""
+    if not values:
+        return None
+
+    index = max(0, round(percent / 100 * len(values)) - 1)
+    return values[min(index, len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Создает синтетических пользователей, колоды и прогресс, "
+        "нагружает API повторения параллельными пользователями "
+        "и выводит пропускную способность, задержки p50/p95/p99 "
+        "и количество запросов к базе данных на запрос в формате JSON. "
+        "После завершения созданные данные удаляются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--learners", type=int, default=50)
+        parser.add_argument("--decks", type=int, default=10)
+        parser.add_argument("--cards-per-deck", type=int, default=200)
+        parser.add_argument(
+            "--reviewed-fraction",
+            type=float,
+            default=0.5,
+            help="Доля карточек изучаемых колод, по которым уже есть прогресс.",
+        )
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--reviews-per-learner",
+            type=int,
+            default=20,
+            help="Количество оценок, которое отправляет каждый пользователь.",
+        )
+        parser.add_argument(
+            "--mode",
+            choices=["single", "batch"],
+            default="single",
+            help=(
+                "single: next_card и submit по одной карточке; "
+                "batch: очередь карточек и пакетная отправка оценок."
+            ),
+        )
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument(
+            "--keep", action="store_true", help="Не удалять созданные данные."
+        )
+        parser.add_argument("--output", help="Файл для записи результата.")
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        prefix = f"loadsim_{uuid.uuid4().hex[:8]}_"
+
+        setup_test_environment()
+        try:
+            started = time.perf_counter()
+            learner_ids, progress_rows = self._seed(prefix=prefix, **options)
+            seed_seconds = time.perf_counter() - started
+
+            results = self._run(learner_ids=learner_ids, **options)
+        finally:
+            teardown_test_environment()
+
+            if not options["keep"]:
+                self._cleanup(prefix)
+
+        report = {
+            "config": {
+                key: options[key]
+                for key in [
+                    "learners",
+                    "decks",
+                    "cards_per_deck",
+                    "reviewed_fraction",
+                    "concurrency",
+                    "reviews_per_learner",
+                    "mode",
+                    "batch_size",
+                ]
+            },
+            "seed_seconds": round(seed_seconds, 3),
+            "progress_rows": progress_rows,
+            **results,
+        }
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output)
+
+        self.stdout.write(output)
+
+    def _seed(self, prefix, learners, decks, cards_per_deck, reviewed_fraction, **_):
+        """
+        Создает автора, колоды с карточками, пользователей, записывает
+        их на все колоды и создает прогресс для доли карточек со
+        случайными датами повторения. Возвращает id пользователей
+        и количество созданных строк прогресса.
+        """
+        with transaction.atomic():
+            author = User.objects.create(username=f"{prefix}author", password="!")
+            deck_objects = Deck.objects.bulk_create(
+                Deck(author=author, title=f"{prefix}deck_{i}") for i in range(decks)
+            )
+            learner_objects = User.objects.bulk_create(
+                User(username=f"{prefix}learner_{i}", password="!")
+                for i in range(learners)
+            )
+            learner_ids = [learner.pk for learner in learner_objects]
+
+            DeckEnrollment.objects.bulk_create(
+                DeckEnrollment(learner_id=learner_id, deck=deck)
+                for learner_id in learner_ids
+                for deck in deck_objects
+            )
+
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    INSERT INTO {Card._meta.db_table}
+                        (question, answer, author_id, created_at, updated_at)
+                    SELECT 'question ' || i, 'answer ' || i, %s, now(), now()
+                    FROM generate_series(1, %s) AS i
+                    """,
+                    [author.pk, decks * cards_per_deck],
+                )
+                cursor.execute(
+                    f"""
+                    INSERT INTO {Deck.cards.through._meta.db_table} (deck_id, card_id)
+                    SELECT (%s::bigint[])[1 + (row_number() OVER (ORDER BY id) - 1)
+                                          / %s],
+                           id
+                    FROM {Card._meta.db_table}
+                    WHERE author_id = %s
+                    """,
+                    [[deck.pk for deck in deck_objects], cards_per_deck, author.pk],
+                )
+                cursor.execute("SELECT setseed(%s)", [self.random.random()])
+                cursor.execute(
+                    f"""
+                    INSERT INTO {DeckProgress._meta.db_table}
+                        (learner_id, deck_id, card_id, repetitions, efactor,
+                         interval, next_review_date, last_review_date,
+                         created_at, updated_at)
+                    SELECT learner_id, deck_card.deck_id, deck_card.card_id,
+                           1 + floor(random() * 5), 1.3 + random() * 1.5,
+                           1 + floor(random() * 30),
+                           now() + (random() * 40 - 10) * interval '1 day',
+                           current_date, now(), now()
+                    FROM unnest(%s::bigint[]) AS learner_id
+                    CROSS JOIN {Deck.cards.through._meta.db_table} AS deck_card
+                    WHERE deck_card.deck_id = ANY(%s) AND random() < %s
+                    """,
+                    [
+                        learner_ids,
+                        [deck.pk for deck in deck_objects],
+                        reviewed_fraction,
+                    ],
+                )
+                progress_rows = cursor.rowcount
+                cursor.execute(f"ANALYZE {DeckProgress._meta.db_table}")
+
+        return learner_ids, progress_rows
+
+    def _run(self, learner_ids, concurrency, **options):
+        """
+        Запускает concurrency потоков со своими клиентами, которые по очереди
+        проходят повторение за пользователей. Возвращает метрики.
+        """
+        pending = list(learner_ids)
+        lock = threading.Lock()
+        samples = {}
+        errors = []
+
+        def worker():
+            client = Client()
+
+            try:
+                while True:
+                    with lock:
+                        if not pending:
+                            return
+                        learner_id = pending.pop()
+
+                    client.force_login(User.objects.get(pk=learner_id))
+                    self._simulate_learner(
+                        client=client, samples=samples, errors=errors, **options
+                    )
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+
+        total_requests = sum(len(endpoint) for endpoint in samples.values())
+
+        return {
+            "duration_seconds": round(duration, 3),
+            "requests": total_requests,
+            "throughput_rps": round(total_requests / duration, 1),
+            "errors": len(errors),
+            "error_samples": errors[:5],
+            "endpoints": {
+                name: self._summarize(endpoint_samples)
+                for name, endpoint_samples in samples.items()
+            },
+        }
+
+    def _simulate_learner(
+        self, client, samples, errors, mode, reviews_per_learner, batch_size, **_
+    ):
+        remaining = reviews_per_learner
+
+        while remaining > 0:
+            if mode == "single":
+                response = self._request(
+                    client, samples, errors, "next_card", "get", reverse("next-card")
+                )
+                if response is None or response.json().get("done"):
+                    return
+
+                card = response.json()
+                self._request(
+                    client,
+                    samples,
+                    errors,
+                    "submit",
+                    "post",
+                    reverse("submit", args=[card["deck_id"], card["card_id"]]),
+                    data={"quality": self.random.randint(0, 5)},
+                )
+                remaining -= 1
+            else:
+                limit = min(batch_size, remaining)
+                response = self._request(
+                    client,
+                    samples,
+                    errors,
+                    "review_queue",
+                    "get",
+                    f"{reverse('review-queue')}?limit={limit}",
+                )
+                if response is None or response.json()["done"]:
+                    return
+
+                grades = [
+                    {
+                        "deck_id": card["deck_id"],
+                        "card_id": card["card_id"],
+                        "quality": self.random.randint(0, 5),
+                    }
+                    for card in response.json()["cards"]
+                ]
+                self._request(
+                    client,
+                    samples,
+                    errors,
+                    "submit_batch",
+                    "post",
+                    reverse("submit-batch"),
+                    data={"grades": grades},
+                )
+                remaining -= len(grades)
+
+    def _request(self, client, samples, errors, name, method, url, data=None):
+        """
+        Выполняет запрос и сохраняет его длительность и количество
+        запросов к базе данных. Возвращает ответ или None при ошибке.
+        """
+        kwargs = {"content_type": "application/json"} if data is not None else {}
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data=data, **kwargs)
+            elapsed = time.perf_counter() - started
+
+        samples.setdefault(name, []).append((elapsed, len(queries)))
+
+        if response.status_code >= 400:
+            errors.append({"endpoint": name, "status": response.status_code})
+            return None
+
+        return response
+
+    def _summarize(self, endpoint_samples):
+        latencies = sorted(elapsed * 1000 for elapsed, _ in endpoint_samples)
+        queries = [count for _, count in endpoint_samples]
+
+        return {
+            "requests": len(endpoint_samples),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "max_ms": round(latencies[-1], 2),
+            "queries_per_request": round(sum(queries) / len(queries), 2),
+        }
+
+    def _cleanup(self, prefix):
+        """Удаляет все данные, созданные симуляцией."""
+        users = User.objects.filter(username__startswith=prefix)
+
+        with transaction.atomic():
+            ReviewLog.objects.filter(learner__in=users).delete()
+            DeckProgress.objects.filter(learner__in=users).delete()
+            DeckEnrollment.objects.filter(learner__in=users).delete()
+            Card.objects.filter(author__in=users).delete()
+            users.delete()
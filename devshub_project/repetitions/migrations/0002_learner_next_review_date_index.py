@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:47
+
+from django.conf import settings
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    RemoveIndexConcurrently,
+)
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('cards', '0001_initial'),
+        ('decks', '0001_initial'),
+        ('repetitions', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='deckprogress',
+            index=models.Index(fields=['learner', 'next_review_date'], name='repetitions_learner_fa4b4e_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='deckprogress',
+            name='repetitions_learner_84be6e_idx',
+        ),
+    ]
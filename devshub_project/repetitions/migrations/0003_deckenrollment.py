@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decks', '0001_initial'),
+        ('repetitions', '0002_learner_next_review_date_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeckEnrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('deck', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='decks.deck')),
+                ('learner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deck_enrollments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'unique_together': {('learner', 'deck')},
+            },
+        ),
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO repetitions_deckenrollment (learner_id, deck_id, created_at)
+                SELECT learner_id, deck_id, min(created_at)
+                FROM repetitions_deckprogress
+                GROUP BY learner_id, deck_id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql="DELETE FROM repetitions_deckprogress WHERE last_review_date IS NULL",
+            reverse_sql="""
+                INSERT INTO repetitions_deckprogress (
+                    learner_id, deck_id, card_id, repetitions, efactor, interval,
+                    next_review_date, last_review_date, created_at, updated_at
+                )
+                SELECT
+                    enrollment.learner_id, enrollment.deck_id, deck_card.card_id,
+                    0, 2.5, 0, now(), NULL, enrollment.created_at, now()
+                FROM repetitions_deckenrollment AS enrollment
+                JOIN decks_deck_cards AS deck_card
+                    ON deck_card.deck_id = enrollment.deck_id
+                WHERE NOT EXISTS (
+                    SELECT 1
+                    FROM repetitions_deckprogress AS progress
+                    WHERE progress.learner_id = enrollment.learner_id
+                        AND progress.deck_id = enrollment.deck_id
+                        AND progress.card_id = deck_card.card_id
+                )
+            """,
+        ),
+    ]
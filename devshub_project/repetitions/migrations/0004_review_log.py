@@ -0,0 +1,98 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:00
+
+from datetime import timedelta
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def create_partitions(apps, schema_editor):
+    """
+    Создает секции журнала повторений на текущий и следующий месяц.
+    Границы задаются по UTC, как в review_log.create_partitions.
+    """
+    month = timezone.now().date().replace(day=1)
+
+    for _ in range(2):
+        next_month = (month + timedelta(days=31)).replace(day=1)
+        schema_editor.execute(
+            f"CREATE TABLE repetitions_reviewlog_p{month:%Y_%m} "
+            f"PARTITION OF repetitions_reviewlog "
+            f"FOR VALUES FROM ('{month} 00:00+00') TO ('{next_month} 00:00+00')"
+        )
+        month = next_month
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0001_initial'),
+        ('decks', '0001_initial'),
+        ('repetitions', '0003_deckenrollment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('reviews', models.PositiveIntegerField(default=0)),
+                ('correct_reviews', models.PositiveIntegerField(default=0)),
+                ('learner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('learner', 'date')},
+            },
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ReviewLog',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('quality', models.PositiveSmallIntegerField()),
+                        ('interval', models.PositiveIntegerField()),
+                        ('reviewed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                        ('card', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='cards.card')),
+                        ('deck', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='decks.deck')),
+                        ('learner', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='review_logs', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'ordering': ['reviewed_at'],
+                        'indexes': [models.Index(fields=['learner', 'reviewed_at'], name='repetitions_learner_eda9b2_idx')],
+                    },
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    sql='''
+                        CREATE TABLE repetitions_reviewlog (
+                            id bigserial NOT NULL,
+                            quality smallint NOT NULL CHECK (quality >= 0),
+                            interval integer NOT NULL CHECK (interval >= 0),
+                            reviewed_at timestamp with time zone NOT NULL,
+                            card_id bigint NOT NULL,
+                            deck_id bigint NOT NULL,
+                            learner_id bigint NOT NULL
+                                REFERENCES users_user (id) DEFERRABLE INITIALLY DEFERRED,
+                            PRIMARY KEY (id, reviewed_at)
+                        ) PARTITION BY RANGE (reviewed_at);
+
+                        CREATE TABLE repetitions_reviewlog_default
+                            PARTITION OF repetitions_reviewlog DEFAULT;
+
+                        CREATE INDEX repetitions_learner_eda9b2_idx
+                            ON repetitions_reviewlog (learner_id, reviewed_at);
+                    ''',
+                    reverse_sql='DROP TABLE repetitions_reviewlog',
+                ),
+                migrations.RunPython(create_partitions, migrations.RunPython.noop),
+            ],
+        ),
+    ]
@@ -3,6 +3,25 @@ from django.db import models
 from django.utils import timezone
 
 
+class DeckEnrollment(models.Model):
+    learner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="deck_enrollments",
+        on_delete=models.CASCADE,
+    )
+    deck = models.ForeignKey(
+        "decks.Deck", related_name="enrollments", on_delete=models.CASCADE
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ["learner", "deck"]
+        ordering = ["created_at"]
+
+    def __str__(self):
+        return f"{self.learner} – {self.deck}"
+
+
 class DeckProgress(models.Model):
     learner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -27,9 +46,69 @@ class DeckProgress(models.Model):
         unique_together = ["learner", "deck", "card"]
         ordering = ["next_review_date"]
         indexes = [
-            models.Index(fields=["learner"]),
+            models.Index(fields=["learner", "next_review_date"]),
             models.Index(fields=["next_review_date"]),
         ]
 
     def __str__(self):
         return f"{self.learner} – {self.card}: {self.next_review_date}"
+
+
+class ReviewLog(models.Model):
+    """
+    Журнал повторений карточек, записи только добавляются.
+    В базе данных таблица секционирована по месяцам по полю reviewed_at,
+    первичный ключ — (id, reviewed_at). Колоды и карточки не связаны
+    внешними ключами, чтобы история сохранялась после их удаления.
+    """
+
+    learner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="review_logs",
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    deck = models.ForeignKey(
+        "decks.Deck",
+        related_name="+",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+    )
+    card = models.ForeignKey(
+        "cards.Card",
+        related_name="+",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+    )
+    quality = models.PositiveSmallIntegerField()
+    interval = models.PositiveIntegerField()
+    reviewed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["reviewed_at"]
+        indexes = [
+            models.Index(fields=["learner", "reviewed_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.learner} – {self.card}: {self.quality}"
+
+
+class ReviewDailyStats(models.Model):
+    learner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="review_daily_stats",
+        on_delete=models.CASCADE,
+    )
+    date = models.DateField()
+    reviews = models.PositiveIntegerField(default=0)
+    correct_reviews = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ["learner", "date"]
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"{self.learner} – {self.date}: {self.reviews}"
@@ -0,0 +1,157 @@
+"""
+Журнал повторений и дневная статистика.
+
+Таблица ReviewLog секционирована по месяцам по полю reviewed_at.
+Секции создаются заранее периодической задачей, записи вне созданных
+секций попадают в секцию по умолчанию. Границы секций считаются
+по UTC, как и в миграции, которая создает первые секции. Дневная
+статистика пересчитывается из журнала за день целиком, поэтому
+пересчет можно запускать повторно.
+"""
+
+from datetime import datetime, time, timedelta
+from datetime import timezone as datetime_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ReviewDailyStats, ReviewLog
+
+CORRECT_QUALITY = 3
+
+
+def make_entry(progress, quality, reviewed_at):
+    """
+    Возвращает несохраненную запись журнала для прогресса,
+    к которому уже применена оценка quality.
+    """
+    return ReviewLog(
+        learner_id=progress.learner_id,
+        deck_id=progress.deck_id,
+        card_id=progress.card_id,
+        quality=quality,
+        interval=progress.interval,
+        reviewed_at=reviewed_at,
+    )
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month_start(day):
+    return (_month_start(day) + timedelta(days=31)).replace(day=1)
+
+
+def _partition_name(month):
+    return f"{ReviewLog._meta.db_table}_p{month:%Y_%m}"
+
+
+def create_partitions(months_ahead=2):
+    """
+    Создает секции журнала на текущий месяц и months_ahead следующих.
+    Если в секции по умолчанию уже есть записи за месяц, они
+    переносятся в новую секцию. Возвращает имена созданных секций.
+    """
+    table = ReviewLog._meta.db_table
+    default_partition = f"{table}_default"
+    month = _month_start(timezone.now().date())
+    created = []
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [table],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+
+        for _ in range(months_ahead + 1):
+            next_month = _next_month_start(month)
+            name = _partition_name(month)
+
+            if name not in existing:
+                with transaction.atomic():
+                    _create_partition(
+                        cursor=cursor,
+                        table=table,
+                        default_partition=default_partition,
+                        name=name,
+                        start=month,
+                        end=next_month,
+                    )
+                created.append(name)
+
+            month = next_month
+
+    return created
+
+
+def _create_partition(cursor, table, default_partition, name, start, end):
+    bounds = [_partition_bound(start), _partition_bound(end)]
+
+    cursor.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {default_partition} "
+        f"WHERE reviewed_at >= %s AND reviewed_at < %s)",
+        bounds,
+    )
+    (has_default_rows,) = cursor.fetchone()
+
+    if not has_default_rows:
+        cursor.execute(
+            f"CREATE TABLE {name} PARTITION OF {table} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            bounds,
+        )
+        return
+
+    cursor.execute(
+        f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {default_partition} "
+        f"WHERE reviewed_at >= %s AND reviewed_at < %s RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved",
+        bounds,
+    )
+    cursor.execute(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+        bounds,
+    )
+
+
+def _partition_bound(day):
+    return datetime.combine(day, time.min, tzinfo=datetime_timezone.utc)
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rollup_daily_stats(day):
+    """
+    Пересчитывает дневную статистику всех пользователей за день
+    одним запросом INSERT ... SELECT ... ON CONFLICT DO UPDATE.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {ReviewDailyStats._meta.db_table}
+                (learner_id, date, reviews, correct_reviews)
+            SELECT learner_id, %s, count(*),
+                   count(*) FILTER (WHERE quality >= %s)
+            FROM {ReviewLog._meta.db_table}
+            WHERE reviewed_at >= %s AND reviewed_at < %s
+            GROUP BY learner_id
+            ON CONFLICT (learner_id, date) DO UPDATE
+            SET reviews = EXCLUDED.reviews,
+                correct_reviews = EXCLUDED.correct_reviews
+            """,
+            [
+                day,
+                CORRECT_QUALITY,
+                _start_of_day(day),
+                _start_of_day(day + timedelta(days=1)),
+            ],
+        )
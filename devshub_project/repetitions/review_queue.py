@@ -0,0 +1,230 @@
+"""
+Очередь карточек для повторения в Redis.
+
+Для каждого пользователя хранится sorted set, где элементы — пары
+"deck_id:card_id", а score — timestamp next_review_date. Отдельный ключ
+отмечает, что очередь построена ("теплая"). Пока очередь холодная,
+карточки выбираются из базы данных, а очередь строится задачей celery.
+"""
+
+import redis
+from django.conf import settings
+
+from .models import DeckProgress
+
+REBUILD_CHUNK_SIZE = 5000
+
+_client = None
+
+
+def is_enabled():
+    """Возвращает True, если очередь повторения в Redis включена."""
+    return settings.REVIEW_QUEUE_ENABLED
+
+
+def _get_client():
+    global _client
+
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REVIEW_QUEUE_REDIS_URL)
+
+    return _client
+
+
+def _queue_key(user_id):
+    return f"review_queue:user:{user_id}"
+
+
+def _ready_key(user_id):
+    return f"review_queue:user:{user_id}:ready"
+
+
+def _member(deck_id, card_id):
+    return f"{deck_id}:{card_id}"
+
+
+def _parse_member(member):
+    deck_id, card_id = member.decode().split(":")
+    return int(deck_id), int(card_id)
+
+
+def get_due_cards(user_id, deadline, limit):
+    """
+    Возвращает список пар (deck_id, card_id) с датой повторения раньше deadline.
+    Возвращает None, если очередь холодная или Redis недоступен.
+    """
+    if not is_enabled():
+        return None
+
+    client = _get_client()
+
+    try:
+        with client.pipeline(transaction=False) as pipe:
+            pipe.exists(_ready_key(user_id))
+            pipe.zrangebyscore(
+                _queue_key(user_id),
+                "-inf",
+                f"({deadline.timestamp()}",
+                start=0,
+                num=limit,
+            )
+            is_ready, members = pipe.execute()
+    except redis.RedisError:
+        return None
+
+    if not is_ready:
+        return None
+
+    return [_parse_member(member) for member in members]
+
+
+def add_cards(user_id, entries):
+    """
+    Добавляет или обновляет карточки в очереди пользователя.
+    entries — итерируемый объект кортежей (deck_id, card_id, next_review_date).
+    Холодная очередь тоже обновляется, чтобы построение очереди,
+    которое идет в это время, не вернуло в нее старые даты.
+    """
+    if not is_enabled():
+        return
+
+    mapping = {
+        _member(deck_id, card_id): next_review_date.timestamp()
+        for deck_id, card_id, next_review_date in entries
+    }
+
+    if not mapping:
+        return
+
+    try:
+        _get_client().zadd(_queue_key(user_id), mapping)
+    except redis.RedisError:
+        invalidate([user_id])
+
+
+def remove_cards(user_id, pairs):
+    """
+    Удаляет карточки из очереди пользователя.
+    pairs — итерируемый объект кортежей (deck_id, card_id).
+    """
+    if not is_enabled():
+        return
+
+    members = [_member(deck_id, card_id) for deck_id, card_id in pairs]
+
+    if not members:
+        return
+
+    try:
+        _get_client().zrem(_queue_key(user_id), *members)
+    except redis.RedisError:
+        invalidate([user_id])
+
+
+def remove_deck(user_id, deck_id):
+    """Удаляет из очереди пользователя все карточки колоды."""
+    if not is_enabled():
+        return
+
+    client = _get_client()
+    queue_key = _queue_key(user_id)
+
+    try:
+        members = [
+            member
+            for member, _ in client.zscan_iter(queue_key, match=_member(deck_id, "*"))
+        ]
+
+        for i in range(0, len(members), REBUILD_CHUNK_SIZE):
+            client.zrem(queue_key, *members[i : i + REBUILD_CHUNK_SIZE])
+    except redis.RedisError:
+        invalidate([user_id])
+
+
+def invalidate(user_ids):
+    """
+    Сбрасывает очереди пользователей. Следующий запрос карточек
+    будет выполнен через базу данных и построит очередь заново.
+    """
+    if not is_enabled():
+        return
+
+    keys = []
+    for user_id in user_ids:
+        keys += [_ready_key(user_id), _queue_key(user_id)]
+
+    if not keys:
+        return
+
+    try:
+        _get_client().delete(*keys)
+    except redis.RedisError:
+        pass
+
+
+def _iter_progress_entries(user_id):
+    return (
+        DeckProgress.objects.filter(learner_id=user_id)
+        .values_list("deck_id", "card_id", "next_review_date")
+        .iterator(chunk_size=REBUILD_CHUNK_SIZE)
+    )
+
+
+def rebuild(user_id):
+    """
+    Строит очередь пользователя из базы данных и помечает ее теплой.
+    Записи добавляются в текущую очередь без замены уже записанных:
+    даты, которые add_cards записал во время построения, новее
+    прочитанных из базы данных.
+    """
+    if not is_enabled():
+        return
+
+    client = _get_client()
+    queue_key = _queue_key(user_id)
+
+    try:
+        mapping = {}
+        for deck_id, card_id, next_review_date in _iter_progress_entries(user_id):
+            mapping[_member(deck_id, card_id)] = next_review_date.timestamp()
+
+            if len(mapping) >= REBUILD_CHUNK_SIZE:
+                client.zadd(queue_key, mapping, nx=True)
+                mapping = {}
+
+        if mapping:
+            client.zadd(queue_key, mapping, nx=True)
+
+        client.set(_ready_key(user_id), 1)
+    except redis.RedisError:
+        invalidate([user_id])
+
+
+def check(user_id):
+    """
+    Сверяет очередь пользователя с базой данных.
+    Возвращает словарь со списками missing (нет в очереди),
+    extra (нет в базе данных) и stale (отличается дата повторения)
+    или None, если очередь холодная.
+    """
+    client = _get_client()
+
+    if not client.exists(_ready_key(user_id)):
+        return None
+
+    queued = {
+        _parse_member(member): score
+        for member, score in client.zscan_iter(_queue_key(user_id))
+    }
+
+    missing = []
+    stale = []
+    for deck_id, card_id, next_review_date in _iter_progress_entries(user_id):
+        score = queued.pop((deck_id, card_id), None)
+
+        if score is None:
+            missing.append((deck_id, card_id))
+        elif score != next_review_date.timestamp():
+            stale.append((deck_id, card_id))
+
+    return {"missing": missing, "extra": list(queued), "stale": stale}
@@ -0,0 +1,39 @@
+import numpy as np
+
+
+def calculate_sm2_batch(efactor, interval, repetitions, quality):
+    """
+    Векторизованно рассчитывает новые параметры SM-2 для массива карточек.
+    Результат совпадает побитно с последовательным применением apply_sm2.
+    Принимает массивы (или скаляр для quality) одинаковой длины.
+    Возвращает кортеж массивов (efactor, interval, repetitions).
+    """
+    efactor = np.asarray(efactor, dtype=np.float64)
+    interval = np.asarray(interval, dtype=np.int64)
+    repetitions = np.asarray(repetitions, dtype=np.int64)
+    quality = np.broadcast_to(np.asarray(quality, dtype=np.int64), efactor.shape)
+
+    passed = quality >= 3
+    penalty = 5 - quality
+
+    new_efactor = np.maximum(
+        efactor + (0.1 - penalty * (0.08 + penalty * 0.02)),
+        1.3,
+    )
+    new_repetitions = repetitions + 1
+
+    new_interval = np.where(
+        new_repetitions == 1,
+        1,
+        np.where(
+            new_repetitions == 2,
+            6,
+            np.rint(interval * new_efactor).astype(np.int64),
+        ),
+    )
+
+    return (
+        np.where(passed, new_efactor, efactor),
+        np.where(passed, new_interval, 0),
+        np.where(passed, new_repetitions, 0),
+    )
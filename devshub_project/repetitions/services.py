@@ -1,11 +1,44 @@
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, TextField, Value
+from django.db.models.functions import Coalesce, Greatest, TruncDate
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
-from decks import services as deck_services
+from decks import counters
+from decks.models import Deck
 
-from .models import DeckProgress
+from . import review_log, review_queue
+from .models import DeckEnrollment, DeckProgress, ReviewDailyStats, ReviewLog
+from .scheduling import calculate_sm2_batch
+from .tasks import rebuild_review_queue_task
+
+PROGRESS_SYNC_ROWS_PER_STATEMENT = 50_000
+
+REVIEW_QUEUE_REBUILD_LOCK_TIMEOUT = 60
+
+REVIEW_STATS_MAX_DAYS = 365
+
+# Ответ карточки с подсветкой кода, если он уже отрисован
+# (для запросов по прогрессу и карточкам колод).
+RENDERED_ANSWER = Coalesce(
+    "card__answer_html", "card__answer", output_field=TextField()
+)
+
+DUE_FORECAST_DAYS = 30
+DUE_FORECAST_CACHE_TIMEOUT = 60 * 60
+
+SM2_FIELDS = [
+    "repetitions",
+    "efactor",
+    "interval",
+    "next_review_date",
+    "last_review_date",
+    "updated_at",
+]
 
 
 def get_user_deck_progress(deck, user):
@@ -23,59 +56,335 @@ def get_deck_card_progress_for_user(deck_id, card_id, user):
     )
 
 
-def get_studying_decks_ids(user):
-    """Возращает id изучаемых пользователем наборов карточек."""
-    return (
-        DeckProgress.objects.filter(learner=user)
-        .values_list("deck_id", flat=True)
-        .distinct()
+def _get_enrolled_deck_cards(user, pairs):
+    """
+    Возвращает множество пар (deck_id, card_id) из pairs,
+    карточки которых входят в изучаемые пользователем колоды.
+    """
+    pairs = set(pairs)
+
+    if not pairs:
+        return pairs
+
+    enrolled_pairs = Deck.cards.through.objects.filter(
+        deck__enrollments__learner=user,
+        deck_id__in={deck_id for deck_id, _ in pairs},
+        card_id__in={card_id for _, card_id in pairs},
+    ).values_list("deck_id", "card_id")
+
+    return pairs & set(enrolled_pairs)
+
+
+def get_or_create_deck_card_progress_for_user(deck_id, card_id, user):
+    """
+    Возвращает прогресс пользователя по карточке в колоде.
+    Для карточки, которую пользователь еще не повторял,
+    создает прогресс, если колода изучается пользователем
+    и содержит карточку. Иначе вернет 404.
+    """
+    progress = DeckProgress.objects.filter(
+        learner=user, deck_id=deck_id, card_id=card_id
+    ).first()
+
+    if progress is not None:
+        return progress
+
+    if not _get_enrolled_deck_cards(user=user, pairs=[(deck_id, card_id)]):
+        raise Http404
+
+    progress, _ = DeckProgress.objects.get_or_create(
+        learner=user, deck_id=deck_id, card_id=card_id
     )
 
+    return progress
 
-def get_next_card_for_review(user):
-    """Возвращает следующую карточку для повторения."""
-    today = timezone.localdate()
 
-    progress = (
+def is_deck_studied_by_user(deck, user):
+    """Возвращает True, если пользователь изучает колоду."""
+    return DeckEnrollment.objects.filter(learner=user, deck=deck).exists()
+
+
+def get_studying_decks_ids(user, deck_ids=None):
+    """
+    Возращает id изучаемых пользователем наборов карточек.
+    Если передан deck_ids, проверяет только эти наборы.
+    """
+    enrollments = DeckEnrollment.objects.filter(learner=user)
+
+    if deck_ids is not None:
+        enrollments = enrollments.filter(deck_id__in=deck_ids)
+
+    return enrollments.values_list("deck_id", flat=True)
+
+
+def get_review_deadline():
+    """
+    Возвращает начало следующего дня в текущем часовом поясе.
+    Карточки с датой повторения раньше этого момента считаются
+    подлежащими повторению сегодня.
+    """
+    tomorrow = timezone.localdate() + timedelta(days=1)
+    return timezone.make_aware(datetime.combine(tomorrow, time.min))
+
+
+def _get_cards_for_review_from_queue(user, deadline, limit):
+    """
+    Возвращает карточки для повторения из очереди в Redis
+    или None, если очередь холодная. Пары, карточки которых
+    уже не входят в изучаемые пользователем колоды, удаляются
+    из очереди.
+    """
+    pairs = review_queue.get_due_cards(user_id=user.pk, deadline=deadline, limit=limit)
+
+    if pairs is None:
+        return None
+
+    if not pairs:
+        return []
+
+    deck_cards = {
+        (deck_card["deck_id"], deck_card["card_id"]): deck_card
+        for deck_card in Deck.cards.through.objects.filter(
+            deck__enrollments__learner=user,
+            deck_id__in={deck_id for deck_id, _ in pairs},
+            card_id__in={card_id for _, card_id in pairs},
+        ).values(
+            "deck_id",
+            "card_id",
+            "card__question",
+            rendered_answer=RENDERED_ANSWER,
+        )
+    }
+
+    removed = [pair for pair in pairs if pair not in deck_cards]
+    review_queue.remove_cards(user_id=user.pk, pairs=removed)
+
+    return [
+        {
+            "deck_id": deck_id,
+            "card_id": card_id,
+            "question": deck_cards[deck_id, card_id]["card__question"],
+            "answer": deck_cards[deck_id, card_id]["rendered_answer"],
+        }
+        for deck_id, card_id in pairs
+        if (deck_id, card_id) in deck_cards
+    ]
+
+
+def _review_queue_rebuild_lock_key(user_id):
+    return f"review_queue_rebuild:user:{user_id}"
+
+
+def schedule_review_queue_rebuild(user_id):
+    """
+    Передает построение очереди пользователя в celery,
+    если оно еще не запущено.
+    """
+    lock_key = _review_queue_rebuild_lock_key(user_id)
+
+    if cache.add(lock_key, 1, REVIEW_QUEUE_REBUILD_LOCK_TIMEOUT):
+        rebuild_review_queue_task.delay(user_id=user_id)
+
+
+def rebuild_review_queue(user_id):
+    """Строит очередь пользователя и снимает блокировку построения."""
+    review_queue.rebuild(user_id=user_id)
+    cache.delete(_review_queue_rebuild_lock_key(user_id))
+
+
+def _get_new_cards_for_review(user, limit):
+    """
+    Возвращает карточки изучаемых колод, которые пользователь
+    еще ни разу не повторял (для них нет прогресса).
+    """
+    deck_cards = (
+        Deck.cards.through.objects.filter(
+            deck_id__in=DeckEnrollment.objects.filter(learner=user).values("deck_id")
+        )
+        .exclude(
+            Exists(
+                DeckProgress.objects.filter(
+                    learner=user,
+                    deck_id=OuterRef("deck_id"),
+                    card_id=OuterRef("card_id"),
+                )
+            )
+        )
+        .order_by("pk")
+        .values(
+            "deck_id",
+            "card_id",
+            "card__question",
+            rendered_answer=RENDERED_ANSWER,
+        )[:limit]
+    )
+
+    return [
+        {
+            "deck_id": deck_card["deck_id"],
+            "card_id": deck_card["card_id"],
+            "question": deck_card["card__question"],
+            "answer": deck_card["rendered_answer"],
+        }
+        for deck_card in deck_cards
+    ]
+
+
+def _get_due_cards_for_review(user, deadline, limit):
+    """
+    Возвращает карточки с прогрессом, дата повторения которых наступила.
+    Если включена очередь в Redis, карточки берутся из нее,
+    а база данных используется, пока очередь холодная
+    и строится в фоне.
+    """
+    if review_queue.is_enabled():
+        cards = _get_cards_for_review_from_queue(
+            user=user, deadline=deadline, limit=limit
+        )
+
+        if cards is not None:
+            return cards
+
+        schedule_review_queue_rebuild(user_id=user.pk)
+
+    progresses = (
         DeckProgress.objects.filter(
             learner=user,
-            next_review_date__date__lte=today,
+            next_review_date__lt=deadline,
         )
-        .select_related("card")
         .order_by("next_review_date")
-        .first()
+        .values(
+            "deck_id",
+            "card_id",
+            "card__question",
+            rendered_answer=RENDERED_ANSWER,
+        )[:limit]
+    )
+
+    return [
+        {
+            "deck_id": progress["deck_id"],
+            "card_id": progress["card_id"],
+            "question": progress["card__question"],
+            "answer": progress["rendered_answer"],
+        }
+        for progress in progresses
+    ]
+
+
+def get_cards_for_review(user, limit):
+    """
+    Возвращает очередь из limit карточек для повторения.
+    Сначала идут карточки, дата повторения которых наступила,
+    затем новые карточки изучаемых колод.
+    """
+    cards = _get_due_cards_for_review(
+        user=user, deadline=get_review_deadline(), limit=limit
     )
 
-    if not progress:
+    if len(cards) < limit:
+        cards += _get_new_cards_for_review(user=user, limit=limit - len(cards))
+
+    return cards
+
+
+def get_next_card_for_review(user):
+    """Возвращает следующую карточку для повторения."""
+    cards = get_cards_for_review(user=user, limit=1)
+
+    if not cards:
         return None
 
-    card_data = {
-        "deck_id": progress.deck_id,
-        "card_id": progress.card_id,
-        "question": progress.card.question,
-        "answer": progress.card.answer,
-    }
+    return cards[0]
 
-    return card_data
 
+def enroll_user_in_deck(deck, user):
+    """
+    Записывает пользователя на изучение колоды.
+    Прогресс по карточке создается при ее первом повторении.
+    """
+    with transaction.atomic():
+        _, created = DeckEnrollment.objects.get_or_create(learner=user, deck=deck)
+        counters.change_counter(Deck, "learner_count", [deck.pk], int(created))
+
+    invalidate_due_forecasts([user.pk])
 
-def create_deck_progress_for_user(deck, user):
+
+def unenroll_user_from_deck(deck, user):
     """
-    Инизиализиует прогресс изучения карточек в колоде для пользователя.
+    Отменяет изучение колоды и удаляет прогресс пользователя по ней.
+    Карточки колоды удаляются из очереди повторения в signals.
     """
-    deck_cards = deck_services.get_deck_cards(deck)
+    deck_progress = get_user_deck_progress(deck=deck, user=user)
 
-    progress = [DeckProgress(learner=user, card=card, deck=deck) for card in deck_cards]
+    with transaction.atomic():
+        deck_progress.delete()
+        deleted, _ = DeckEnrollment.objects.filter(learner=user, deck=deck).delete()
+        counters.change_counter(Deck, "learner_count", [deck.pk], -deleted)
 
-    DeckProgress.objects.bulk_create(progress, ignore_conflicts=True)
+    invalidate_due_forecasts([user.pk])
 
 
-def apply_sm2(progress, quality):
+def get_deck_learners_ids(deck_id):
+    """Возвращает id пользователей, которые изучают колоду."""
+    return list(
+        DeckEnrollment.objects.filter(deck_id=deck_id)
+        .order_by("learner_id")
+        .values_list("learner_id", flat=True)
+    )
+
+
+def sync_deck_progress(deck_id, added_card_ids=(), removed_card_ids=()):
     """
-    Применяет алгоритм интервального повторения на основе SM-2 к прогрессу карточки.
+    Применяет изменение состава карточек колоды к прогрессу всех
+    изучающих ее пользователей: удаляет прогресс по удаленным карточкам.
+    Прогресс по добавленным карточкам создается при первом повторении.
+    Если карточка была и удалена, и добавлена, она считается оставшейся
+    в колоде. Пользователи обрабатываются частями, чтобы каждый запрос
+    затрагивал ограниченное количество строк.
     """
-    now = timezone.now()
+    removed_card_ids = sorted(set(removed_card_ids) - set(added_card_ids))
+
+    if not removed_card_ids:
+        return
 
+    learner_ids = get_deck_learners_ids(deck_id=deck_id)
+    chunk_size = max(1, PROGRESS_SYNC_ROWS_PER_STATEMENT // len(removed_card_ids))
+
+    for i in range(0, len(learner_ids), chunk_size):
+        chunk = learner_ids[i : i + chunk_size]
+
+        DeckProgress.objects.filter(
+            deck_id=deck_id,
+            learner_id__in=chunk,
+            card_id__in=removed_card_ids,
+        ).delete()
+
+        review_queue.invalidate(chunk)
+        invalidate_due_forecasts(chunk)
+
+
+def _sync_review_caches(progresses):
+    """
+    Обновляет даты повторения карточек в очередях пользователей
+    и сбрасывает их прогнозы повторений.
+    """
+    entries = {}
+    for progress in progresses:
+        entries.setdefault(progress.learner_id, []).append(
+            (progress.deck_id, progress.card_id, progress.next_review_date)
+        )
+
+    for user_id, user_entries in entries.items():
+        review_queue.add_cards(user_id=user_id, entries=user_entries)
+
+    invalidate_due_forecasts(entries)
+
+
+def _calculate_sm2(progress, quality, now):
+    """
+    Пересчитывает поля прогресса карточки по алгоритму SM-2 без сохранения.
+    """
     if quality < 3:
         progress.repetitions = 0
         progress.interval = 0
@@ -96,6 +405,253 @@ def apply_sm2(progress, quality):
         progress.next_review_date = now + timedelta(days=progress.interval)
 
     progress.last_review_date = now.date()
-    progress.save()
 
     return progress
+
+
+def apply_sm2(progress, quality):
+    """
+    Применяет алгоритм интервального повторения на основе SM-2 к прогрессу карточки.
+    """
+    now = timezone.now()
+    _calculate_sm2(progress=progress, quality=quality, now=now)
+
+    with transaction.atomic():
+        progress.save()
+        review_log.make_entry(
+            progress=progress, quality=quality, reviewed_at=now
+        ).save()
+
+    _sync_review_caches([progress])
+
+    return progress
+
+
+def apply_sm2_batch(user, grades):
+    """
+    Применяет алгоритм SM-2 к списку оценок пользователя
+    (словари с deck_id, card_id и quality) в одной транзакции.
+    Для карточек изучаемых колод, которые повторяются впервые,
+    прогресс создается. Остальные оценки пропускаются.
+    Каждая оценка записывается в журнал повторений.
+    Возвращает список обновленных прогрессов.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        progresses = {
+            (progress.deck_id, progress.card_id): progress
+            for progress in DeckProgress.objects.select_for_update().filter(
+                learner=user,
+                deck_id__in={grade["deck_id"] for grade in grades},
+                card_id__in={grade["card_id"] for grade in grades},
+            )
+        }
+
+        new_pairs = _get_enrolled_deck_cards(
+            user=user,
+            pairs=[
+                (grade["deck_id"], grade["card_id"])
+                for grade in grades
+                if (grade["deck_id"], grade["card_id"]) not in progresses
+            ],
+        )
+        new_progresses = {
+            (deck_id, card_id): DeckProgress(
+                learner=user, deck_id=deck_id, card_id=card_id
+            )
+            for deck_id, card_id in new_pairs
+        }
+        progresses.update(new_progresses)
+
+        updated = {}
+        log_entries = []
+        for grade in grades:
+            key = (grade["deck_id"], grade["card_id"])
+            progress = progresses.get(key)
+
+            if progress is None:
+                continue
+
+            _calculate_sm2(progress=progress, quality=grade["quality"], now=now)
+            progress.updated_at = now
+            updated[key] = progress
+            log_entries.append(
+                review_log.make_entry(
+                    progress=progress, quality=grade["quality"], reviewed_at=now
+                )
+            )
+
+        # Прогресс, созданный параллельным запросом, получает результат
+        # этой оценки, как и записанная в журнал оценка.
+        DeckProgress.objects.bulk_create(
+            new_progresses.values(),
+            update_conflicts=True,
+            unique_fields=["learner", "deck", "card"],
+            update_fields=SM2_FIELDS,
+        )
+        DeckProgress.objects.bulk_update(
+            [
+                progress
+                for key, progress in updated.items()
+                if key not in new_progresses
+            ],
+            fields=SM2_FIELDS,
+        )
+        ReviewLog.objects.bulk_create(log_entries)
+
+    _sync_review_caches(updated.values())
+
+    return list(updated.values())
+
+
+def apply_sm2_bulk(progresses, qualities, batch_size=1000):
+    """
+    Применяет алгоритм SM-2 к списку прогрессов с оценками qualities
+    (последовательность той же длины или одна оценка для всех)
+    и сохраняет их через bulk_update.
+    Возвращает список обновленных прогрессов.
+    """
+    progresses = list(progresses)
+
+    if not progresses:
+        return progresses
+
+    efactors, intervals, repetitions = calculate_sm2_batch(
+        efactor=[progress.efactor for progress in progresses],
+        interval=[progress.interval for progress in progresses],
+        repetitions=[progress.repetitions for progress in progresses],
+        quality=qualities,
+    )
+
+    now = timezone.now()
+
+    for progress, efactor, interval, repetition in zip(
+        progresses, efactors.tolist(), intervals.tolist(), repetitions.tolist()
+    ):
+        progress.efactor = efactor
+        progress.interval = interval
+        progress.repetitions = repetition
+        progress.next_review_date = now + timedelta(days=interval)
+        progress.last_review_date = now.date()
+        progress.updated_at = now
+
+    DeckProgress.objects.bulk_update(
+        progresses, fields=SM2_FIELDS, batch_size=batch_size
+    )
+
+    _sync_review_caches(progresses)
+
+    return progresses
+
+
+def reschedule_progresses(progresses, quality, chunk_size=1000):
+    """
+    Применяет одну оценку SM-2 ко всем прогрессам из queryset,
+    обрабатывая их частями по chunk_size строк.
+    Возвращает количество обновленных прогрессов.
+    """
+    progresses = progresses.only(
+        "id", "learner_id", "deck_id", "card_id", *SM2_FIELDS
+    ).order_by("pk")
+
+    last_pk = 0
+    total = 0
+
+    while True:
+        with transaction.atomic():
+            chunk = list(
+                progresses.select_for_update().filter(pk__gt=last_pk)[:chunk_size]
+            )
+
+            if not chunk:
+                return total
+
+            apply_sm2_bulk(progresses=chunk, qualities=quality, batch_size=chunk_size)
+
+        last_pk = chunk[-1].pk
+        total += len(chunk)
+
+
+def get_review_stats(user, days=30):
+    """
+    Возвращает статистику повторений пользователя по дням за последние
+    days дней (включая сегодня) из дневных агрегатов журнала.
+    Дни без повторений заполняются нулями.
+    """
+    days = min(max(days, 1), REVIEW_STATS_MAX_DAYS)
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+
+    daily_stats = {
+        stats["date"]: stats
+        for stats in ReviewDailyStats.objects.filter(
+            learner=user, date__gte=start
+        ).values("date", "reviews", "correct_reviews")
+    }
+
+    return [
+        daily_stats.get(day, {"date": day, "reviews": 0, "correct_reviews": 0})
+        for day in (start + timedelta(days=i) for i in range(days))
+    ]
+
+
+def _due_forecast_cache_key(user_id):
+    return f"due_forecast:user:{user_id}"
+
+
+def invalidate_due_forecasts(user_ids):
+    """Сбрасывает закешированные прогнозы повторений пользователей."""
+    cache.delete_many([_due_forecast_cache_key(user_id) for user_id in user_ids])
+
+
+def _calculate_due_forecast(user, today):
+    """
+    Считает количество карточек к повторению по дням и колодам
+    одним запросом с группировкой по дате. Просроченные карточки
+    относятся к сегодняшнему дню.
+    """
+    start = timezone.make_aware(datetime.combine(today, time.min))
+    end = start + timedelta(days=DUE_FORECAST_DAYS)
+
+    rows = (
+        DeckProgress.objects.filter(learner=user, next_review_date__lt=end)
+        .annotate(day=TruncDate(Greatest("next_review_date", Value(start))))
+        .values("day", "deck_id")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+
+    forecast = {
+        today + timedelta(days=i): {"total": 0, "decks": {}}
+        for i in range(DUE_FORECAST_DAYS)
+    }
+    for row in rows:
+        day = forecast[row["day"]]
+        day["total"] += row["count"]
+        day["decks"][row["deck_id"]] = row["count"]
+
+    return [{"date": date, **day} for date, day in forecast.items()]
+
+
+def get_due_forecast(user, days=DUE_FORECAST_DAYS):
+    """
+    Возвращает прогноз количества карточек к повторению на days дней,
+    начиная с сегодня: общее количество и количество по колодам за день.
+    Новые карточки изучаемых колод в прогноз не входят.
+    Прогноз кешируется для пользователя до конца дня или до изменения
+    его прогресса.
+    """
+    days = min(max(days, 1), DUE_FORECAST_DAYS)
+    today = timezone.localdate()
+    cache_key = _due_forecast_cache_key(user.pk)
+
+    cached = cache.get(cache_key)
+    if cached is None or cached["date"] != today:
+        cached = {
+            "date": today,
+            "forecast": _calculate_due_forecast(user=user, today=today),
+        }
+        cache.set(cache_key, cached, timeout=DUE_FORECAST_CACHE_TIMEOUT)
+
+    return cached["forecast"][:days]
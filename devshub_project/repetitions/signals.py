@@ -0,0 +1,107 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+
+from core.transactions import batch_on_commit
+from decks.models import Deck
+
+from . import review_queue, services
+from .models import DeckEnrollment
+from .tasks import sync_deck_progress_task
+
+SYNC_INLINE_MAX_LEARNERS = 100
+
+
+def _run_deck_progress_sync(deck_id, added_card_ids, removed_card_ids):
+    """
+    Синхронизирует прогресс сразу для колод с небольшим количеством
+    изучающих, иначе передает синхронизацию в celery.
+    Добавление карточек прогресс не меняет: он создается
+    при первом повторении карточки.
+    """
+    if not set(removed_card_ids) - set(added_card_ids):
+        return
+
+    learners = DeckEnrollment.objects.filter(deck_id=deck_id)
+
+    if learners[: SYNC_INLINE_MAX_LEARNERS + 1].count() > SYNC_INLINE_MAX_LEARNERS:
+        sync_deck_progress_task.delay(
+            deck_id=deck_id,
+            added_card_ids=list(added_card_ids),
+            removed_card_ids=list(removed_card_ids),
+        )
+    else:
+        services.sync_deck_progress(
+            deck_id=deck_id,
+            added_card_ids=added_card_ids,
+            removed_card_ids=removed_card_ids,
+        )
+
+
+def _schedule_deck_progress_sync(deck, added_card_ids=(), removed_card_ids=()):
+    """
+    Накапливает изменения состава карточек колоды и синхронизирует
+    прогресс один раз после фиксации транзакции. Так deck.cards.set(),
+    который удаляет и добавляет карточки отдельными шагами,
+    обрабатывается одной синхронизацией.
+    """
+    batch_on_commit(
+        deck,
+        "_pending_progress_sync",
+        partial(_run_deck_progress_sync, deck_id=deck.pk),
+        added_card_ids=added_card_ids,
+        removed_card_ids=removed_card_ids,
+    )
+
+
+@receiver(m2m_changed, sender=Deck.cards.through)
+def sync_deck_progress_on_cards_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Синхронизирует прогресс при изменении состава карточек колоды."""
+    if action == "pre_clear":
+        if reverse:
+            instance._cleared_deck_ids = set(
+                instance.decks.values_list("pk", flat=True)
+            )
+        else:
+            instance._cleared_card_ids = set(
+                instance.cards.values_list("pk", flat=True)
+            )
+        return
+
+    if action == "post_clear":
+        if reverse:
+            for deck in Deck.objects.filter(pk__in=instance._cleared_deck_ids):
+                _schedule_deck_progress_sync(deck, removed_card_ids=[instance.pk])
+        else:
+            _schedule_deck_progress_sync(
+                instance, removed_card_ids=instance._cleared_card_ids
+            )
+        return
+
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
+
+    key = "added_card_ids" if action == "post_add" else "removed_card_ids"
+
+    if reverse:
+        for deck in Deck.objects.filter(pk__in=pk_set):
+            _schedule_deck_progress_sync(deck, **{key: [instance.pk]})
+    else:
+        _schedule_deck_progress_sync(instance, **{key: pk_set})
+
+
+@receiver(post_delete, sender=DeckEnrollment)
+def remove_deck_from_review_queue(sender, instance, **kwargs):
+    """
+    Удаляет карточки колоды из очереди повторения пользователя
+    после отмены изучения или удаления колоды.
+    """
+    transaction.on_commit(
+        lambda: review_queue.remove_deck(
+            user_id=instance.learner_id, deck_id=instance.deck_id
+        )
+    )
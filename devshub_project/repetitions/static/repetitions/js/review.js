@@ -1,8 +1,8 @@
 const reviewContainer = document.querySelector("[data-js-review-container]");
 
 if (reviewContainer) {
-  const nextCardUrl = reviewContainer.dataset.nextCardUrl;
-  const submitUrlTemplate = reviewContainer.dataset.submitUrl;
+  const queueUrl = reviewContainer.dataset.queueUrl;
+  const submitUrl = reviewContainer.dataset.submitUrl;
 
   const front = document.querySelector("[data-js-card-front]");
   const back = document.querySelector("[data-js-card-back]");
@@ -14,8 +14,9 @@ if (reviewContainer) {
   const flipButton = document.querySelector("[data-js-flip-card-button]");
   const qualityButtons = document.querySelector("[data-js-quality-buttons]");
 
-  let currentCardId = null;
-  let currentDeckId = null;
+  let queue = [];
+  let grades = [];
+  let currentCard = null;
 
   back.style.display = "none";
 
@@ -26,58 +27,81 @@ if (reviewContainer) {
 
   qualityButtons.addEventListener("click", async (e) => {
     const button = e.target.closest("button");
-    if (!button || !currentCardId || !currentDeckId) {
+    if (!button || !currentCard) {
       return;
     }
 
-    const submitUrl = submitUrlTemplate.replace(
-      /0\/0/,
-      `${currentDeckId}/${currentCardId}`,
-    );
-    const csrftoken = Cookies.get("csrftoken");
-    const quality = button.dataset.quality;
+    grades.push({
+      deck_id: currentCard.deck_id,
+      card_id: currentCard.card_id,
+      quality: Number(button.dataset.quality),
+    });
+    currentCard = null;
+
+    await loadNextCard();
+  });
+
+  // Отправляет накопленные оценки, если пользователь уходит со страницы
+  window.addEventListener("pagehide", () => {
+    submitGrades({ keepalive: true });
+  });
+
+  async function submitGrades({ keepalive = false } = {}) {
+    if (!grades.length) {
+      return;
+    }
+
+    const batch = grades;
+    grades = [];
 
     try {
       const response = await fetch(submitUrl, {
         method: "POST",
+        keepalive,
         headers: {
           "Content-Type": "application/json",
-          "X-CSRFToken": csrftoken,
+          "X-CSRFToken": Cookies.get("csrftoken"),
         },
-        body: JSON.stringify({ quality }),
+        body: JSON.stringify({ grades: batch }),
       });
 
       if (!response.ok) {
         throw new Error(`HTTP error: ${response.status}`);
       }
-
-      await loadNextCard();
     } catch (error) {
-      console.error("Ошибка отправки ответа", error);
+      grades = batch.concat(grades);
+      console.error("Ошибка отправки ответов", error);
     }
-  });
+  }
+
+  async function loadQueue() {
+    const response = await fetch(queueUrl);
+
+    if (!response.ok) {
+      throw new Error(`Ошибка сервера: ${response.status}`);
+    }
+
+    const data = await response.json();
+    queue = data.cards;
+  }
 
   async function loadNextCard() {
     try {
-      const response = await fetch(nextCardUrl);
-
-      if (!response.ok) {
-        throw new Error(`Ошибка сервера: ${response.status}`);
+      if (!queue.length) {
+        await submitGrades();
+        await loadQueue();
       }
 
-      const data = await response.json();
-
-      if (data.done) {
+      if (!queue.length) {
         front.style.display = "none";
         back.style.display = "none";
         empty.style.display = "block";
         return;
       }
 
-      currentCardId = data.card_id;
-      currentDeckId = data.deck_id;
-      questionElement.innerHTML = data.question;
-      answerElement.innerHTML = data.answer;
+      currentCard = queue.shift();
+      questionElement.innerHTML = currentCard.question;
+      answerElement.innerHTML = currentCard.answer;
 
       flipButton.style.display = "block";
       front.style.display = "block";
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+from . import review_log, services
+
+
+@shared_task
+def sync_deck_progress_task(deck_id, added_card_ids, removed_card_ids):
+    """
+    Асинхронная задача, которая применяет изменение состава карточек
+    колоды к прогрессу всех изучающих ее пользователей.
+    """
+    services.sync_deck_progress(
+        deck_id=deck_id,
+        added_card_ids=added_card_ids,
+        removed_card_ids=removed_card_ids,
+    )
+
+
+@shared_task
+def rebuild_review_queue_task(user_id):
+    """
+    Асинхронная задача, которая строит очередь
+    повторения пользователя из базы данных.
+    """
+    services.rebuild_review_queue(user_id=user_id)
+
+
+@shared_task
+def create_review_log_partitions_task():
+    """
+    Периодическая задача, которая заранее создает
+    секции журнала повторений на ближайшие месяцы.
+    """
+    review_log.create_partitions()
+
+
+@shared_task
+def rollup_review_stats_task():
+    """
+    Периодическая задача, которая пересчитывает дневную статистику
+    повторений за сегодня и вчера из журнала повторений.
+    """
+    today = timezone.localdate()
+
+    for day in [today - timedelta(days=1), today]:
+        review_log.rollup_daily_stats(day)
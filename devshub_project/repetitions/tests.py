@@ -1,3 +1,505 @@
-from django.test import TestCase
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404
+from django.test import SimpleTestCase, TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from hypothesis import given
+from hypothesis import strategies as st
+
+from cards.models import Card
+from decks import services as deck_services
+from users import services as user_services
+
+from . import review_log, review_queue, services
+from .models import DeckEnrollment, DeckProgress, ReviewLog
+from .scheduling import calculate_sm2_batch
+
+User = get_user_model()
+
+
+class RepetitionTest(TestCase):
+    def setUp(self):
+        self.user = user_services.create_user("user", "password123")
+
+        cards = [
+            Card(author=self.user, question=f"question {i}", answer=f"answer {i}")
+            for i in range(3)
+        ]
+        self.cards = Card.objects.bulk_create(cards)
+
+        self.deck = deck_services.create_deck(
+            author=self.user,
+            title="test deck title",
+            cards=self.cards,
+        )
+        services.enroll_user_in_deck(deck=self.deck, user=self.user)
+
+    def _create_progresses(self, user):
+        return [
+            services.get_or_create_deck_card_progress_for_user(
+                deck_id=self.deck.id, card_id=card.id, user=user
+            )
+            for card in self.cards
+        ]
+
+    def test_get_cards_for_review(self):
+        cards = services.get_cards_for_review(user=self.user, limit=2)
+
+        self.assertEqual(len(cards), 2)
+        self.assertEqual(cards[0]["deck_id"], self.deck.id)
+        self.assertIn(cards[0]["card_id"], {card.id for card in self.cards})
+        self.assertTrue(cards[0]["question"].startswith("question"))
+        self.assertTrue(cards[0]["answer"].startswith("answer"))
+
+    def test_due_cards_go_before_new_cards(self):
+        services.apply_sm2_batch(
+            user=self.user,
+            grades=[
+                {"deck_id": self.deck.id, "card_id": self.cards[2].id, "quality": 1}
+            ],
+        )
+
+        cards = services.get_cards_for_review(user=self.user, limit=10)
+
+        self.assertEqual(cards[0]["card_id"], self.cards[2].id)
+        self.assertEqual(
+            {card["card_id"] for card in cards[1:]},
+            {self.cards[0].id, self.cards[1].id},
+        )
+
+    def test_enrollment_does_not_create_progress(self):
+        self.assertTrue(services.is_deck_studied_by_user(self.deck, self.user))
+        self.assertFalse(
+            services.get_user_deck_progress(deck=self.deck, user=self.user).exists()
+        )
+
+        other_user = user_services.create_user("other", "password123")
+        with self.assertRaises(Http404):
+            services.get_or_create_deck_card_progress_for_user(
+                deck_id=self.deck.id, card_id=self.cards[0].id, user=other_user
+            )
+
+        self._create_progresses(self.user)
+        services.unenroll_user_from_deck(deck=self.deck, user=self.user)
+
+        self.assertFalse(services.is_deck_studied_by_user(self.deck, self.user))
+        self.assertFalse(
+            services.get_user_deck_progress(deck=self.deck, user=self.user).exists()
+        )
+
+    def test_apply_sm2_batch(self):
+        grades = [
+            {"deck_id": self.deck.id, "card_id": self.cards[0].id, "quality": 5},
+            {"deck_id": self.deck.id, "card_id": self.cards[1].id, "quality": 1},
+            {"deck_id": self.deck.id, "card_id": 0, "quality": 5},
+        ]
+
+        with self.assertNumQueries(6):
+            progresses = services.apply_sm2_batch(user=self.user, grades=grades)
+
+        self.assertEqual(len(progresses), 2)
+
+        with self.assertNumQueries(5):
+            progresses = services.apply_sm2_batch(user=self.user, grades=grades[:1])
+
+        self.assertEqual(progresses[0].repetitions, 2)
+
+        progress = services.get_deck_card_progress_for_user(
+            deck_id=self.deck.id, card_id=self.cards[0].id, user=self.user
+        )
+        self.assertEqual(progress.repetitions, 2)
+        self.assertEqual(progress.interval, 6)
+
+        progress = services.get_deck_card_progress_for_user(
+            deck_id=self.deck.id, card_id=self.cards[1].id, user=self.user
+        )
+        self.assertEqual(progress.repetitions, 0)
+        self.assertEqual(progress.interval, 0)
+
+        cards = services.get_cards_for_review(user=self.user, limit=10)
+        self.assertNotIn(self.cards[0].id, {card["card_id"] for card in cards})
+
+    def test_apply_sm2_batch_to_concurrently_created_progress(self):
+        get_enrolled_deck_cards = services._get_enrolled_deck_cards
+
+        def create_progress_concurrently(user, pairs):
+            # Прогресс создает параллельный запрос после выборки прогресса
+            DeckProgress.objects.create(
+                learner=user, deck=self.deck, card=self.cards[0]
+            )
+            return get_enrolled_deck_cards(user=user, pairs=pairs)
+
+        grades = [{"deck_id": self.deck.id, "card_id": self.cards[0].id, "quality": 5}]
+        with mock.patch.object(
+            services, "_get_enrolled_deck_cards", create_progress_concurrently
+        ):
+            services.apply_sm2_batch(user=self.user, grades=grades)
+
+        progress = services.get_deck_card_progress_for_user(
+            deck_id=self.deck.id, card_id=self.cards[0].id, user=self.user
+        )
+        self.assertEqual(progress.repetitions, 1)
+        self.assertEqual(progress.interval, 1)
+
+    def test_submit_rejects_invalid_quality(self):
+        self.client.force_login(self.user)
+        url = reverse("submit", args=[self.deck.id, self.cards[0].id])
+
+        for quality in [-1, 6, "bad"]:
+            response = self.client.post(url, {"quality": quality})
+            self.assertEqual(response.status_code, 400)
+
+        self.assertFalse(DeckProgress.objects.filter(learner=self.user).exists())
+        self.assertFalse(ReviewLog.objects.filter(learner=self.user).exists())
+
+        response = self.client.post(url, {"quality": 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["repetitions"], 1)
+
+    def test_deck_cards_change_syncs_progress(self):
+        learner = user_services.create_user("learner", "password123")
+        services.enroll_user_in_deck(deck=self.deck, user=learner)
+        self._create_progresses(self.user)
+        self._create_progresses(learner)
+
+        new_card = Card.objects.create(
+            author=self.user, question="new question", answer="new answer"
+        )
+
+        deck = deck_services.get_deck_created_by_user(
+            deck_id=self.deck.id, user=self.user
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            deck_services.update_deck(
+                deck=deck, title=self.deck.title, cards=[*self.cards[1:], new_card]
+            )
+
+        for user in [self.user, learner]:
+            card_ids = set(
+                services.get_user_deck_progress(deck=self.deck, user=user).values_list(
+                    "card_id", flat=True
+                )
+            )
+            self.assertEqual(card_ids, {self.cards[1].id, self.cards[2].id})
+
+        cards = services.get_cards_for_review(user=learner, limit=10)
+        self.assertIn(new_card.id, {card["card_id"] for card in cards})
+
+    def test_review_log_rollup(self):
+        grades = [
+            {"deck_id": self.deck.id, "card_id": self.cards[0].id, "quality": 5},
+            {"deck_id": self.deck.id, "card_id": self.cards[1].id, "quality": 1},
+            {"deck_id": self.deck.id, "card_id": self.cards[1].id, "quality": 4},
+        ]
+        services.apply_sm2_batch(user=self.user, grades=grades)
+
+        self.assertEqual(ReviewLog.objects.filter(learner=self.user).count(), 3)
+
+        today = timezone.localdate()
+        review_log.rollup_daily_stats(today)
+        review_log.rollup_daily_stats(today)
+
+        stats = services.get_review_stats(user=self.user, days=7)
+
+        self.assertEqual(len(stats), 7)
+        self.assertEqual(stats[-1], {"date": today, "reviews": 3, "correct_reviews": 2})
+        self.assertEqual(sum(day["reviews"] for day in stats[:-1]), 0)
+
+    def test_due_forecast(self):
+        services.invalidate_due_forecasts([self.user.pk])
+        grades = [
+            {"deck_id": self.deck.id, "card_id": self.cards[0].id, "quality": 5},
+            {"deck_id": self.deck.id, "card_id": self.cards[1].id, "quality": 1},
+        ]
+        services.apply_sm2_batch(user=self.user, grades=grades)
+
+        with self.assertNumQueries(1):
+            forecast = services.get_due_forecast(user=self.user)
+
+        self.assertEqual(len(forecast), services.DUE_FORECAST_DAYS)
+        self.assertEqual(forecast[0]["date"], timezone.localdate())
+        self.assertEqual(forecast[0]["total"], 1)
+        self.assertEqual(forecast[1]["decks"], {self.deck.id: 1})
+        self.assertEqual(sum(day["total"] for day in forecast), 2)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                services.get_due_forecast(user=self.user, days=2), forecast[:2]
+            )
+
+        progress = services.get_deck_card_progress_for_user(
+            deck_id=self.deck.id, card_id=self.cards[1].id, user=self.user
+        )
+        services.apply_sm2(progress=progress, quality=5)
+
+        forecast = services.get_due_forecast(user=self.user)
+        self.assertEqual(forecast[0]["total"], 0)
+        self.assertEqual(forecast[1]["total"], 2)
+
+    def test_create_review_log_partitions_moves_default_rows(self):
+        reviewed_at = timezone.now() + timedelta(days=31 * 5)
+        ReviewLog.objects.create(
+            learner=self.user,
+            deck=self.deck,
+            card=self.cards[0],
+            quality=5,
+            interval=1,
+            reviewed_at=reviewed_at,
+        )
+
+        created = review_log.create_partitions(months_ahead=6)
+
+        partition = f"repetitions_reviewlog_p{reviewed_at:%Y_%m}"
+        self.assertIn(partition, created)
+        self.assertEqual(review_log.create_partitions(months_ahead=6), [])
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {partition}")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    @override_settings(TIME_ZONE="Asia/Tokyo")
+    def test_create_review_log_partitions_in_non_utc_time_zone(self):
+        created = review_log.create_partitions(months_ahead=3)
+
+        month = timezone.now().date().replace(day=1) + timedelta(days=31 * 3)
+        self.assertIn(f"repetitions_reviewlog_p{month:%Y_%m}", created)
+
+    def test_reschedule_progresses(self):
+        self._create_progresses(self.user)
+        progresses = services.get_user_deck_progress(deck=self.deck, user=self.user)
+
+        updated = services.reschedule_progresses(
+            progresses=progresses, quality=4, chunk_size=2
+        )
+
+        self.assertEqual(updated, 3)
+        self.assertEqual(progresses.filter(repetitions=1, interval=1).count(), 3)
+        self.assertEqual(services.get_cards_for_review(user=self.user, limit=10), [])
+
+
+@override_settings(REVIEW_QUEUE_ENABLED=True)
+class ReviewQueueTest(TestCase):
+    def setUp(self):
+        self.user = user_services.create_user("user", "password123")
+        review_queue.invalidate([self.user.pk])
+        cache.delete(services._review_queue_rebuild_lock_key(self.user.pk))
+
+        cards = [
+            Card(author=self.user, question=f"question {i}", answer=f"answer {i}")
+            for i in range(3)
+        ]
+        self.cards = Card.objects.bulk_create(cards)
+
+        self.deck = deck_services.create_deck(
+            author=self.user,
+            title="test deck title",
+            cards=self.cards,
+        )
+        services.enroll_user_in_deck(deck=self.deck, user=self.user)
+
+    def tearDown(self):
+        review_queue.invalidate([self.user.pk])
+
+    def test_cold_queue_falls_back_to_database(self):
+        deadline = services.get_review_deadline()
+        self.assertIsNone(
+            review_queue.get_due_cards(user_id=self.user.pk, deadline=deadline, limit=1)
+        )
+
+        with mock.patch(
+            "repetitions.services.rebuild_review_queue_task.delay"
+        ) as delay:
+            cards = services.get_cards_for_review(user=self.user, limit=10)
+            services.get_cards_for_review(user=self.user, limit=10)
+
+        self.assertEqual(len(cards), 3)
+        delay.assert_called_once_with(user_id=self.user.pk)
+
+        services.rebuild_review_queue(user_id=self.user.pk)
+
+        self.assertEqual(review_queue.check(user_id=self.user.pk)["missing"], [])
+
+    def test_warm_queue_serves_cards_and_stays_in_sync(self):
+        review_queue.rebuild(user_id=self.user.pk)
+
+        with self.assertNumQueries(1):
+            card = services.get_next_card_for_review(user=self.user)
+
+        progress = services.get_or_create_deck_card_progress_for_user(
+            deck_id=card["deck_id"], card_id=card["card_id"], user=self.user
+        )
+        services.apply_sm2(progress=progress, quality=5)
+
+        cards = services.get_cards_for_review(user=self.user, limit=10)
+        self.assertEqual(len(cards), 2)
+        self.assertNotIn(card["card_id"], {card["card_id"] for card in cards})
+        self.assertFalse(any(review_queue.check(user_id=self.user.pk).values()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            services.unenroll_user_from_deck(deck=self.deck, user=self.user)
+
+        self.assertFalse(any(review_queue.check(user_id=self.user.pk).values()))
+        self.assertEqual(services.get_cards_for_review(user=self.user, limit=10), [])
+
+    def test_deleted_card_is_removed_from_queue(self):
+        for card in self.cards:
+            services.get_or_create_deck_card_progress_for_user(
+                deck_id=self.deck.id, card_id=card.id, user=self.user
+            )
+        review_queue.rebuild(user_id=self.user.pk)
+        self.cards[0].delete()
+
+        cards = services.get_cards_for_review(user=self.user, limit=10)
+
+        self.assertEqual(len(cards), 2)
+        self.assertFalse(any(review_queue.check(user_id=self.user.pk).values()))
+
+    def test_deleted_deck_is_removed_from_queue(self):
+        self._create_progresses()
+        review_queue.rebuild(user_id=self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            deck_services.delete_deck(self.deck)
+
+        self.assertFalse(any(review_queue.check(user_id=self.user.pk).values()))
+
+    def test_pairs_of_unenrolled_decks_are_not_served(self):
+        self._create_progresses()
+        review_queue.rebuild(user_id=self.user.pk)
+
+        # Обработчики on_commit в TestCase не выполняются,
+        # поэтому пары колоды остаются в очереди
+        DeckEnrollment.objects.filter(learner=self.user).delete()
+
+        self.assertEqual(services.get_cards_for_review(user=self.user, limit=10), [])
+        self.assertEqual(review_queue.check(user_id=self.user.pk)["extra"], [])
+
+    def test_rebuild_keeps_dates_written_during_rebuild(self):
+        self._create_progresses()
+        next_review_date = timezone.now() + timedelta(days=10)
+        review_queue.add_cards(
+            user_id=self.user.pk,
+            entries=[(self.deck.id, self.cards[0].id, next_review_date)],
+        )
+
+        review_queue.rebuild(user_id=self.user.pk)
+
+        self.assertEqual(
+            review_queue.check(user_id=self.user.pk)["stale"],
+            [(self.deck.id, self.cards[0].id)],
+        )
+
+    def _create_progresses(self):
+        for card in self.cards:
+            services.get_or_create_deck_card_progress_for_user(
+                deck_id=self.deck.id, card_id=card.id, user=self.user
+            )
+
+
+progress_states = st.lists(
+    st.tuples(
+        st.floats(min_value=1.3, max_value=5.0, allow_nan=False),
+        st.integers(min_value=0, max_value=10_000),
+        st.integers(min_value=0, max_value=100),
+        st.integers(min_value=0, max_value=5),
+    ),
+    min_size=1,
+    max_size=200,
+)
+
+
+class SM2BatchTest(SimpleTestCase):
+    @given(progress_states)
+    def test_batch_matches_scalar(self, states):
+        efactors, intervals, repetitions, qualities = zip(*states)
+
+        batch = calculate_sm2_batch(
+            efactor=efactors,
+            interval=intervals,
+            repetitions=repetitions,
+            quality=qualities,
+        )
+
+        now = timezone.now()
+        for i, (efactor, interval, repetition, quality) in enumerate(states):
+            progress = SimpleNamespace(
+                efactor=efactor, interval=interval, repetitions=repetition
+            )
+            services._calculate_sm2(progress=progress, quality=quality, now=now)
+
+            self.assertEqual(batch[0][i].item().hex(), progress.efactor.hex())
+            self.assertEqual(batch[1][i].item(), progress.interval)
+            self.assertEqual(batch[2][i].item(), progress.repetitions)
+
+
+@tag("slow")
+class ReviewQueryPlanTest(TestCase):
+    """
+    Проверяет, что выборка карточек для повторения использует
+    составной индекс (learner, next_review_date) на большой таблице прогресса.
+    """
+
+    learners_count = 1000
+    cards_count = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        author = user_services.create_user("author", "password123")
+
+        users = User.objects.bulk_create(
+            User(username=f"learner_{i}", password="!")
+            for i in range(cls.learners_count)
+        )
+        cards = Card.objects.bulk_create(
+            Card(author=author, question=f"question {i}", answer=f"answer {i}")
+            for i in range(cls.cards_count)
+        )
+        deck = deck_services.create_deck(author=author, title="deck", cards=cards[:1])
+
+        cls.user = users[0]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {DeckProgress._meta.db_table}
+                    (learner_id, deck_id, card_id, repetitions, efactor, interval,
+                     next_review_date, created_at, updated_at)
+                SELECT u.id, %s, c.id, 0, 2.5, 0,
+                       now() + (random() * interval '60 days') - interval '30 days',
+                       now(), now()
+                FROM {User._meta.db_table} u
+                CROSS JOIN {Card._meta.db_table} c
+                WHERE u.id BETWEEN %s AND %s AND c.id BETWEEN %s AND %s
+                """,
+                [deck.id, users[0].id, users[-1].id, cards[0].id, cards[-1].id],
+            )
+            cursor.execute(f"ANALYZE {DeckProgress._meta.db_table}")
+
+    def test_due_cards_lookup_uses_composite_index(self):
+        index_name = next(
+            index.name
+            for index in DeckProgress._meta.indexes
+            if index.fields == ["learner", "next_review_date"]
+        )
+
+        self.assertEqual(
+            DeckProgress.objects.count(), self.learners_count * self.cards_count
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            services.get_cards_for_review(user=self.user, limit=20)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {context.captured_queries[0]['sql']}")
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+
+        self.assertIn(index_name, plan)
+        self.assertNotIn(f"Seq Scan on {DeckProgress._meta.db_table}", plan)
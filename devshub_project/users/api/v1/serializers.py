@@ -4,6 +4,7 @@ from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
 from cards import services as card_services
+from core.serializers import SparseFieldsetsMixin
 from decks import services as deck_services
 from projects import services as project_services
 from users import services
@@ -18,7 +19,7 @@ class CodewarsProfileSerializer(serializers.ModelSerializer):
         fields = ["honor", "leaderboard_position", "total_completed_katas", "languages"]
 
 
-class UserListSerializer(serializers.ModelSerializer):
+class UserListSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [
@@ -31,7 +32,7 @@ class UserListSerializer(serializers.ModelSerializer):
         ]
 
 
-class UserDetailSerializer(serializers.ModelSerializer):
+class UserDetailSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     codewars_profile = CodewarsProfileSerializer(read_only=True)
     cards_stats = serializers.SerializerMethodField()
     decks_stats = serializers.SerializerMethodField()
@@ -17,6 +17,7 @@ from decks.api.v1.serializers import DeckListSerializer
 from projects import services as project_services
 from projects.api.v1.serializers import ProjectListSerializer
 from repetitions import services as repetition_services
+from repetitions.api.v1.serializers import ReviewDailyStatsSerializer
 from users import services
 
 from .serializers import (
@@ -27,6 +28,8 @@ from .serializers import (
     UserUpdateSerializer,
 )
 
+REVIEW_STATS_DEFAULT_DAYS = 30
+
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
@@ -52,6 +55,12 @@ class UserViewSet(viewsets.ModelViewSet):
     lookup_field = "username"
 
     def get_queryset(self):
+        if self.action == "list":
+            return services.filter_sort_users(
+                users=services.get_users(),
+                query=self.request.query_params.get("query", ""),
+                sort_by=self.request.query_params.get("sort_by", ""),
+            )
         return services.get_users()
 
     def get_permissions(self):
@@ -76,26 +85,28 @@ class UserViewSet(viewsets.ModelViewSet):
     def cards(self, request, username):
         user = self.get_object()
         current_user = request.user if request.user.is_authenticated else None
-        user_cards = card_services.get_user_cards_with_saved_status(
-            user=user, current_user=current_user
+        user_cards = card_services.attach_saved_status(
+            cards=list(card_services.get_cards_created_or_saved_by_user(user=user)),
+            user=current_user,
         )
 
-        serializer = CardListSerializer(user_cards, many=True)
+        serializer = CardListSerializer(
+            user_cards, many=True, context=self.get_serializer_context()
+        )
         return Response(serializer.data)
 
     @action(detail=True)
     def decks(self, request, username):
         user = self.get_object()
         current_user = request.user if request.user.is_authenticated else None
-        studying_ids = repetition_services.get_studying_decks_ids(user=user)
-
-        user_decks = deck_services.get_user_decks_with_saved_status(
-            user=user,
-            current_user=current_user,
+        user_decks = deck_services.attach_statuses(
+            decks=list(deck_services.get_decks_created_or_saved_by_user(user=user)),
+            user=current_user,
+            learner=user,
         )
 
         serializer = DeckListSerializer(
-            user_decks, many=True, context={"studying_ids": studying_ids}
+            user_decks, many=True, context=self.get_serializer_context()
         )
         return Response(serializer.data)
 
@@ -104,5 +115,21 @@ class UserViewSet(viewsets.ModelViewSet):
         user = self.get_object()
         user_projects = project_services.get_projects_created_by_user(user=user)
 
-        serializer = ProjectListSerializer(user_projects, many=True)
+        serializer = ProjectListSerializer(
+            user_projects, many=True, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+    @action(detail=True, url_path="review-stats")
+    def review_stats(self, request, username):
+        user = self.get_object()
+
+        try:
+            days = int(request.query_params.get("days", REVIEW_STATS_DEFAULT_DAYS))
+        except ValueError:
+            days = REVIEW_STATS_DEFAULT_DAYS
+
+        review_stats = repetition_services.get_review_stats(user=user, days=days)
+
+        serializer = ReviewDailyStatsSerializer(review_stats, many=True)
         return Response(serializer.data)
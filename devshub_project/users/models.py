@@ -1,6 +1,8 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from django.db.models.functions import Concat, Lower
 from django.urls import reverse
 
 
@@ -9,11 +11,31 @@ class User(AbstractUser):
     skills = models.CharField(max_length=100, blank=True)
     codewars_username = models.CharField(max_length=50, blank=True)
     avatar = models.ImageField(upload_to="avatars/", max_length=255, blank=True)
+    search_text = models.GeneratedField(
+        expression=Lower(
+            Concat(
+                "username",
+                models.Value(" "),
+                "specialization",
+                models.Value(" "),
+                "skills",
+                output_field=models.TextField(),
+            )
+        ),
+        output_field=models.TextField(),
+        db_persist=True,
+        editable=False,
+    )
 
     class Meta:
         ordering = ["-date_joined"]
         indexes = [
             models.Index(fields=["-date_joined"]),
+            GinIndex(
+                fields=["search_text"],
+                name="users_user_search_text_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
         ]
 
     def get_absolute_url(self):
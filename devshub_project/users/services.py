@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import TrigramWordSimilarity
 from django.core.cache import cache
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
@@ -58,18 +59,25 @@ def get_user_with_codewars_profile(username):
 
 
 def filter_sort_users(users, query, sort_by):
-    """Фильтрует, сортирует, пагинирует пользователей. Возвращает page_obj."""
+    """
+    Фильтрует и сортирует пользователей.
+    Поиск выполняется по имени, специализации и навыкам с учетом опечаток
+    (триграммы pg_trgm), без явной сортировки результаты упорядочены
+    по похожести на запрос.
+    """
+    query = query.strip().lower()
+
     if query:
         users = users.filter(
-            Q(username__icontains=query)
-            | Q(skills__icontains=query)
-            | Q(specialization__icontains=query)
-        )
+            Q(search_text__contains=query) | Q(search_text__trigram_word_similar=query)
+        ).annotate(rank=TrigramWordSimilarity(query, "search_text"))
 
     if sort_by == "newest":
         users = users.order_by("-date_joined")
     elif sort_by == "oldest":
         users = users.order_by("date_joined")
+    elif query:
+        users = users.order_by("-rank", "-date_joined")
 
     return users
 
@@ -42,3 +42,51 @@ if (!hasData) {
     },
   });
 }
+
+const reviewCtx = document.querySelector("[data-js-review-stats-canvas]");
+const reviewStats = JSON.parse(
+  document.getElementById("review-stats-data").textContent,
+);
+
+if (!reviewStats.some((day) => day.reviews > 0)) {
+  const message = document.createElement("p");
+  message.textContent = "Пока нет повторений карточек";
+  message.className = "text-center text-gray-500 py-8";
+  reviewCtx.replaceWith(message);
+} else {
+  new Chart(reviewCtx, {
+    type: "bar",
+    data: {
+      labels: reviewStats.map((day) =>
+        new Date(day.date).toLocaleDateString("ru-RU", {
+          day: "numeric",
+          month: "short",
+        }),
+      ),
+      datasets: [
+        {
+          label: "Правильные ответы",
+          data: reviewStats.map((day) => day.correct_reviews),
+          backgroundColor: "#66d666",
+        },
+        {
+          label: "Ошибки",
+          data: reviewStats.map((day) => day.reviews - day.correct_reviews),
+          backgroundColor: "#ff85a0",
+        },
+      ],
+    },
+    options: {
+      responsive: true,
+      scales: {
+        x: { stacked: true },
+        y: { stacked: true, beginAtZero: true, ticks: { precision: 0 } },
+      },
+      plugins: {
+        legend: {
+          position: "bottom",
+        },
+      },
+    },
+  });
+}
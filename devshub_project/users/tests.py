@@ -1,3 +1,58 @@
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from cards.models import Card
+from decks import services as deck_services
+from repetitions import services as repetition_services
+
+from . import services
+
+
+class UserSearchTest(TestCase):
+    def setUp(self):
+        services.create_user(
+            "alice", "password123", specialization="Backend", skills="Python, Django"
+        )
+        services.create_user(
+            "bob", "password123", specialization="Frontend", skills="TypeScript"
+        )
+        services.create_user("pythonista", "password123")
+
+    def search(self, query, sort_by=""):
+        users = services.filter_sort_users(
+            users=services.get_users(), query=query, sort_by=sort_by
+        )
+        return [user.username for user in users]
+
+    def test_search_by_username_skills_and_specialization(self):
+        self.assertEqual(self.search("bob"), ["bob"])
+        self.assertEqual(self.search("typescript"), ["bob"])
+        self.assertEqual(self.search("Backend"), ["alice"])
+        self.assertEqual(set(self.search("python")), {"alice", "pythonista"})
+
+    def test_search_tolerates_typos(self):
+        self.assertEqual(self.search("djangoo"), ["alice"])
+        self.assertEqual(self.search("typscript"), ["bob"])
+
+    def test_search_ranks_by_similarity(self):
+        self.assertEqual(self.search("pythonista"), ["pythonista"])
+        self.assertEqual(self.search("pyth")[0], "pythonista")
+
+
+class UserDecksTest(TestCase):
+    def setUp(self):
+        self.owner = services.create_user("owner", "password123")
+        card = Card.objects.create(author=self.owner, question="q", answer="a")
+        self.deck = deck_services.create_deck(
+            author=self.owner, title="deck", cards=[card]
+        )
+        repetition_services.enroll_user_in_deck(deck=self.deck, user=self.owner)
+
+        self.client.force_login(services.create_user("viewer", "password123"))
+
+    def test_in_study_is_the_same_in_html_and_api(self):
+        response = self.client.get(reverse("user_decks", args=["owner"]))
+        self.assertTrue(response.context["user_decks"][0].in_study)
+
+        response = self.client.get(reverse("user-decks", args=["owner"]))
+        self.assertTrue(response.json()[0]["in_study"])
@@ -6,11 +6,11 @@ from django.contrib.auth.views import (
     PasswordResetConfirmView,
     PasswordResetView,
 )
-from django.core.paginator import Paginator
 from django.shortcuts import redirect, render
 from django.urls import reverse, reverse_lazy
 
 from cards import services as card_services
+from core.pagination import paginate
 from decks import services as deck_services
 from projects import services as project_services
 from repetitions import services as repetition_services
@@ -73,7 +73,6 @@ class UserPasswordResetConfirmView(PasswordResetConfirmView):
 def user_list(request):
     query = request.GET.get("query", "")
     sort_by = request.GET.get("sort_by", "")
-    page_number = request.GET.get("page", 1)
 
     users = services.filter_sort_users(
         users=services.get_users(),
@@ -81,8 +80,7 @@ def user_list(request):
         sort_by=sort_by,
     )
 
-    paginator = Paginator(users, 20)
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, users)
 
     context = {
         "users": page_obj,
@@ -98,12 +96,14 @@ def user_detail(request, username):
     cards_stats = card_services.get_cards_stats(user=user)
     decks_stats = deck_services.get_decks_stats(user=user)
     projects_stats = project_services.get_projects_stats(user=user)
+    review_stats = repetition_services.get_review_stats(user=user)
 
     context = {
         "user": user,
         "cards_stats": cards_stats,
         "decks_stats": decks_stats,
         "projects_stats": projects_stats,
+        "review_stats": review_stats,
     }
 
     return render(request, "users/user_detail.html", context)
@@ -115,19 +115,15 @@ def user_cards(request, username):
 
     query = request.GET.get("query", "")
     sort_by = request.GET.get("sort_by", "")
-    page_number = request.GET.get("page", 1)
 
     user_cards = card_services.filter_sort_cards(
-        cards=card_services.get_user_cards_with_saved_status(
-            user=user,
-            current_user=current_user,
-        ),
+        cards=card_services.get_cards_created_or_saved_by_user(user=user),
         query=query,
         sort_by=sort_by,
     )
 
-    paginator = Paginator(user_cards, 20)
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, user_cards)
+    card_services.attach_saved_status(cards=page_obj, user=current_user)
 
     context = {
         "user": user,
@@ -142,28 +138,26 @@ def user_cards(request, username):
 def user_decks(request, username):
     user = services.get_user(username=username)
     current_user = request.user if request.user.is_authenticated else None
-    studying_decks_ids = repetition_services.get_studying_decks_ids(user=user)
 
     query = request.GET.get("query", "")
     sort_by = request.GET.get("sort_by", "")
-    page_number = request.GET.get("page", 1)
 
     user_decks = deck_services.filter_sort_decks(
-        decks=deck_services.get_user_decks_with_saved_status(
-            user=user,
-            current_user=current_user,
-        ),
+        decks=deck_services.get_decks_created_or_saved_by_user(user=user),
         query=query,
         sort_by=sort_by,
     )
 
-    paginator = Paginator(user_decks, 20)
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, user_decks)
+    deck_services.attach_statuses(
+        decks=page_obj,
+        user=current_user,
+        learner=user,
+    )
 
     context = {
         "user": user,
         "user_decks": page_obj,
-        "studying_decks_ids": studying_decks_ids,
         "query": query,
         "sort_by": sort_by,
     }
@@ -176,22 +170,23 @@ def user_projects(request, username):
 
     query = request.GET.get("query", "")
     sort_by = request.GET.get("sort_by", "")
-    page_number = request.GET.get("page", 1)
+    in_description = bool(request.GET.get("in_description"))
 
     user_projects = project_services.filter_sort_projects(
         projects=project_services.get_projects_created_by_user(user=user),
         query=query,
         sort_by=sort_by,
+        in_description=in_description,
     )
 
-    paginator = Paginator(user_projects, 20)
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, user_projects)
 
     context = {
         "user": user,
         "user_projects": page_obj,
         "query": query,
         "sort_by": sort_by,
+        "in_description": in_description,
     }
 
     return render(request, "users/user_projects.html", context)